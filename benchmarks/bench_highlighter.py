@@ -0,0 +1,169 @@
+# Compara el resaltado por reglas separadas (una pasada por regla, como hacía
+# PythonHighlighter) con el escáner de una sola pasada de highlight_scanner.
+#
+#     python benchmarks/bench_highlighter.py [--lines N] [--repeat R] [--qt] [--editor]
+#
+# Sin --qt solo se calculan los tramos de cada línea, sin interfaz; también
+# se recorre el documento dos veces con ScanCache, de modo que la segunda
+# pasada solo reproduce tramos. Con --qt se resalta además un QTextDocument
+# completo con PythonHighlighter, sin ventana (plataforma offscreen). Con
+# --editor se mide cuánto tarda un CodeEditor en estar listo tras cargar el
+# texto, con resaltado síncrono (setPlainText) y diferido (load_text).
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LEGACY_KEYWORDS = [
+    r'\bclass\b', r'\bdef\b', r'\breturn\b', r'\bif\b', r'\belse\b', r'\belif\b',
+    r'\bwhile\b', r'\bfor\b', r'\bin\b', r'\bimport\b', r'\bfrom\b', r'\bas\b',
+    r'\bwith\b', r'\btry\b', r'\bexcept\b', r'\bfinally\b', r'\bpass\b',
+    r'\bcontinue\b', r'\bbreak\b', r'\braise\b', r'\bTrue\b', r'\bFalse\b', r'\bNone\b'
+]
+LEGACY_RULES = [re.compile(keyword) for keyword in LEGACY_KEYWORDS] + [
+    re.compile(r'\b\d+\b'),
+    re.compile(r'\".*?\"|\'.*?\''),
+    re.compile(r'#.*'),
+    re.compile(r'[\+\-\*/=()\[\]{}:;]'),
+]
+
+
+def sample_document(lines):
+    source = []
+    for i in range(lines):
+        kind = i % 10
+        if kind == 0:
+            source.append(f'def function_{i}(value, other=None):')
+        elif kind == 1:
+            source.append(f'    """Documentación de la función {i}')
+        elif kind == 2:
+            source.append('    que ocupa varias líneas."""')
+        elif kind == 3:
+            source.append(f'    if value in (1, 2, 3) and other is None:  # caso {i}')
+        elif kind == 4:
+            source.append(f'        return "while for in" + str(value * {i})')
+        else:
+            source.append(f'    result_{i} = [value + {i}, other or {i} / 2]')
+    return source
+
+
+def legacy_spans(lines):
+    # Una pasada por regla y por línea; cada coincidencia es un setFormat
+    count = 0
+    for text in lines:
+        for pattern in LEGACY_RULES:
+            for _ in pattern.finditer(text):
+                count += 1
+    return count
+
+
+def scanner_spans(lines):
+    from editor.editor.highlight_scanner import scan
+    count = 0
+    state = 0
+    for text in lines:
+        spans, state = scan(text, state)
+        count += len(spans)
+    return count
+
+
+def cached_spans(lines):
+    # Dos pasadas con la misma caché: la segunda solo reproduce tramos
+    from editor.editor.highlight_scanner import ScanCache
+    cache = ScanCache(len(lines) + 1)
+    for _ in range(2):
+        state = 0
+        for text in lines:
+            spans, state = cache.scan(text, state)
+    return cache
+
+
+def measure(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def qt_highlight(text, repeat):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtGui import QGuiApplication, QTextDocument
+    from editor.editor.syntax_highlighter import PythonHighlighter
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+    document = QTextDocument()
+    document.setPlainText(text)
+    highlighter = PythonHighlighter(None)
+
+    highlighter.setDocument(document)
+
+    def run():
+        # rehighlight resalta todos los bloques de forma síncrona (setDocument
+        # lo deja pendiente para el bucle de eventos)
+        highlighter.rehighlight()
+
+    return measure(run, repeat)
+
+
+def editor_ready(text):
+    # Tiempo hasta que el editor ha cargado el texto y pintado la primera
+    # pantalla, con el resaltado síncrono y con el diferido. Como referencia,
+    # lo mismo en un QPlainTextEdit sin resaltador
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication, QPlainTextEdit
+    from editor.editor.code_editor import CodeEditor
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = []
+    for name, widget, load in (
+            ('sin resaltador', QPlainTextEdit, QPlainTextEdit.setPlainText),
+            ('setPlainText', CodeEditor, CodeEditor.setPlainText),
+            ('load_text (diferido)', CodeEditor, CodeEditor.load_text)):
+        editor = widget()
+        editor.resize(800, 600)
+        editor.show()
+        app.processEvents()
+        start = time.perf_counter()
+        load(editor, text)
+        editor.repaint()
+        results.append((name, time.perf_counter() - start))
+        if widget is CodeEditor:
+            editor.highlight_scheduler.timer.stop()
+        editor.close()
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--lines', type=int, default=100000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--qt', action='store_true',
+                            help='resaltar también un QTextDocument con PythonHighlighter')
+    arg_parser.add_argument('--editor', action='store_true',
+                            help='medir la carga del texto en un CodeEditor')
+    args = arg_parser.parse_args()
+
+    lines = sample_document(args.lines)
+    legacy = measure(lambda: legacy_spans(lines), args.repeat)
+    single = measure(lambda: scanner_spans(lines), args.repeat)
+    print(f'{"reglas separadas":24} {legacy * 1000:9.1f} ms')
+    print(f'{"escáner de una pasada":24} {single * 1000:9.1f} ms   x{legacy / single:.1f}')
+    twice = measure(lambda: cached_spans(lines), args.repeat)
+    cache = cached_spans(lines)
+    print(f'{"escáner con caché (x2)":24} {twice * 1000:9.1f} ms   '
+          f'aciertos {cache.hits}, fallos {cache.misses}')
+    if args.qt:
+        seconds = qt_highlight('\n'.join(lines), args.repeat)
+        print(f'{"QTextDocument completo":24} {seconds * 1000:9.1f} ms')
+    if args.editor:
+        for name, seconds in editor_ready('\n'.join(lines)):
+            print(f'{"editor, " + name:24} {seconds * 1000:9.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
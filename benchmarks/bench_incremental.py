@@ -0,0 +1,77 @@
+# Compara volver a analizar un archivo completo tras editar una línea con el
+# análisis incremental de IncrementalParser.
+#
+#     python benchmarks/bench_incremental.py [--lines N] [--repeat R]
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def sample_program(lines):
+    source = []
+    for i in range(lines):
+        if i % 50 == 0:
+            source.append(f'def f{i}(a, b):')
+            source.append('    return a + b')
+        elif i % 7 == 0:
+            source.append(f'print(x{i - 1})')
+        else:
+            source.append(f'x{i} = {i} + y * (z - {i})')
+    return '\n'.join(source) + '\n'
+
+
+def measure(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--lines', type=int, default=20000)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    import ply.yacc as yacc
+    from editor.analyzer_s.sintax_analyzer import get_parser
+    from editor.analyzer_s.incremental import IncrementalParser
+
+    parser = get_parser(errorlog=yacc.NullLogger())
+    code = sample_program(args.lines)
+    incremental = IncrementalParser(parser)
+    incremental.parse(code)
+    middle = code.index('\n', len(code) // 2) + 1
+
+    def full():
+        parser.parse(code)
+
+    def edit_line():
+        # Cambiar un carácter y restaurarlo: dos ediciones sin cambiar líneas
+        incremental.apply_edit(middle, 1, 'w')
+        incremental.apply_edit(middle, 1, code[middle])
+
+    def insert_line():
+        # Insertar y quitar una línea: desplaza las líneas de todo lo de abajo
+        incremental.apply_edit(middle, 0, 'w = 1\n')
+        incremental.apply_edit(middle, 6, '')
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = [
+            ('análisis completo', measure(full, args.repeat)),
+            ('editar una línea', measure(edit_line, args.repeat) / 2),
+            ('insertar una línea', measure(insert_line, args.repeat) / 2),
+        ]
+    for name, seconds in results:
+        print(f'{name:28} {seconds * 1000:9.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# Compara el coste de un análisis sintáctico en frío (generando las tablas LALR)
+# con uno en caliente (tablas persistidas) y con el Parser compartido.
+#
+#     python benchmarks/bench_parser.py [--statements N] [--repeat R]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def sample_program(statements):
+    lines = []
+    for i in range(statements):
+        lines.append(f'x{i} = {i} + y * (z - {i})')
+        if i % 10 == 0:
+            lines.append(f'print(x{i})')
+    return '\n'.join(lines) + '\n'
+
+
+def measure(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--statements', type=int, default=50)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    # Caché aislada para poder medir la generación de tablas desde cero
+    os.environ['EDITOR_TEXTO_CACHE'] = tempfile.mkdtemp(prefix='bench_parser_')
+    import ply.yacc as yacc
+    from editor.analyzer_s.sintax_analyzer import Parser, get_parser
+
+    code = sample_program(args.statements)
+    quiet = yacc.NullLogger()
+
+    def cold():
+        if os.path.exists(Parser.tables_path()):
+            os.remove(Parser.tables_path())
+        parser = Parser()
+        parser.build(errorlog=quiet)
+        parser.parse(code)
+
+    def warm_tables():
+        parser = Parser()
+        parser.build(errorlog=quiet)
+        parser.parse(code)
+
+    def shared():
+        get_parser(errorlog=quiet).parse(code)
+
+    results = [
+        ('en frío (genera tablas)', measure(cold, args.repeat)),
+        ('tablas persistidas', measure(warm_tables, args.repeat)),
+        ('parser compartido', measure(shared, args.repeat)),
+    ]
+    for name, seconds in results:
+        print(f'{name:28} {seconds * 1000:9.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# Compara la VM de bytecode con el intérprete que recorre el árbol sintáctico
+# en programas con bucles. Los dos ejecutan el mismo AST y se comprueba que
+# producen la misma salida y las mismas globales.
+#
+#     python benchmarks/bench_vm.py [--size N] [--repeat R]
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# La gramática no tiene INDENT/DEDENT: el cuerpo de un bloque llega hasta el
+# final del programa, así que cada bucle anidado es la última sentencia
+PROGRAMS = {
+    'while con contador': '''
+total = 0
+i = 0
+while i < {n}:
+    total = total + i * 2 - 1
+    i = i + 1
+''',
+    'for anidados': '''
+total = 0
+for i in range({hundreds}):
+    for j in range(100):
+        if j < 50:
+            total = total + i * j
+        else:
+            total = total - j
+''',
+    'fibonacci iterativo': '''
+count = 0
+while count < {fifties}:
+    count = count + 1
+    a = 0
+    b = 1
+    for k in range(50):
+        c = a + b
+        a = b
+        b = c
+''',
+}
+
+
+def measure(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--size', type=int, default=200000,
+                            help='iteraciones aproximadas de cada programa')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    import ply.yacc as yacc
+    from editor.analyzer_s.compiler import compile_program
+    from editor.analyzer_s.interpreter import TreeInterpreter
+    from editor.analyzer_s.sintax_analyzer import get_parser
+    from editor.analyzer_s.vm import VM
+
+    parser = get_parser(errorlog=yacc.NullLogger())
+    for name, template in PROGRAMS.items():
+        success, errors, ast = parser.parse(template.format(
+            n=args.size, hundreds=args.size // 100, fifties=args.size // 50))
+        if not success:
+            raise SystemExit(f'{name}: {errors}')
+        program = compile_program(ast)
+
+        results = {}
+
+        def tree():
+            out = io.StringIO()
+            results['tree'] = (TreeInterpreter(out).run(ast), out.getvalue())
+
+        def vm():
+            out = io.StringIO()
+            results['vm'] = (VM(out).run(program), out.getvalue())
+
+        tree_seconds = measure(tree, args.repeat)
+        vm_seconds = measure(vm, args.repeat)
+        if results['tree'] != results['vm']:
+            raise SystemExit(f'{name}: la VM y el intérprete no coinciden')
+        print(f'{name:22} árbol {tree_seconds * 1000:9.1f} ms   '
+              f'VM {vm_seconds * 1000:9.1f} ms   x{tree_seconds / vm_seconds:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+# Análisis léxico y sintáctico de un directorio completo, sin interfaz gráfica:
+#
+#     python -m editor.analyze <directorio> [--ext .py] [--jobs N]
+#
+# Escribe un objeto JSON por archivo en la salida estándar (JSON Lines) a medida
+# que se analizan y, al final, un resumen agregado en la salida de errores.
+# Este módulo no debe importar PyQt6.
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import ply.yacc as yacc
+
+from editor.analyzer.lexical_analyzer import LexicalAnalyzer
+from editor.analyzer_s.sintax_analyzer import Parser, get_parser
+from editor.cache import AnalysisCache, data_digest
+from editor.fileio import decode_text
+
+DEFAULT_EXTENSIONS = ('.py',)
+
+# Analizadores y caché del proceso actual; se construyen una vez por worker
+_analyzer = None
+_parser = None
+_cache = None
+_version = None
+
+
+def _init_worker(cache_dir=None, use_cache=True):
+    global _analyzer, _parser, _cache, _version
+    _analyzer = LexicalAnalyzer()
+    _parser = get_parser(errorlog=yacc.NullLogger())
+    _cache = AnalysisCache(cache_dir) if use_cache else None
+    _version = f'{_analyzer.version()}-{Parser.version()}'
+
+
+def find_files(root, extensions=DEFAULT_EXTENSIONS):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        for filename in sorted(filenames):
+            if filename.endswith(tuple(extensions)):
+                yield os.path.join(dirpath, filename)
+
+
+def analyze_file(path):
+    if _parser is None:
+        _init_worker()
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+        if _cache is None:
+            result = _analyze_data(data)
+        else:
+            result = _cache.get_or_compute(data_digest(data), 'batch', _version, lambda: _analyze_data(data))
+    except Exception as e:
+        result = {'error': str(e)}
+    return {'path': path, **result}
+
+
+def _analyze_data(data):
+    code, _ = decode_text(data)
+    tokens, stats = _analyzer.analyze(code)
+    result = {'tokens': len(tokens), 'lines': code.count('\n') + 1, 'stats': stats}
+
+    # El lexer y el parser de PLY informan los errores con print();
+    # se descartan para no mezclarlos con la salida JSON
+    with contextlib.redirect_stdout(io.StringIO()):
+        success, errors, _ = _parser.parse(code)
+    result['syntax'] = {'success': success, 'errors': list(errors)}
+    return result
+
+
+def analyze_paths(paths, jobs=None, chunksize=8, cache_dir=None, use_cache=True):
+    # Devuelve los resultados en el mismo orden que las rutas, a medida que
+    # los workers los van terminando
+    if jobs == 1:
+        _init_worker(cache_dir, use_cache)
+        yield from map(analyze_file, paths)
+        return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(cache_dir, use_cache)) as executor:
+        yield from executor.map(analyze_file, paths, chunksize=chunksize)
+
+
+def _positive_int(value):
+    # Tipo de argparse para --jobs: ProcessPoolExecutor no admite 0 ni negativos
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'debe ser un entero positivo: {value!r}')
+    return number
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog='python -m editor.analyze',
+                                         description='Análisis léxico y sintáctico por lotes.')
+    arg_parser.add_argument('directory', help='directorio a analizar')
+    arg_parser.add_argument('--ext', action='append', dest='extensions',
+                            help='extensión de archivo a incluir (por defecto .py); se puede repetir')
+    arg_parser.add_argument('--jobs', '-j', type=_positive_int, default=None,
+                            help='número de procesos (por defecto, uno por núcleo)')
+    arg_parser.add_argument('--cache-dir', default=None,
+                            help='directorio de la caché de resultados')
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help='analizar todo sin usar la caché')
+    args = arg_parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        arg_parser.error(f"No existe el directorio: {args.directory}")
+
+    paths = list(find_files(args.directory, args.extensions or DEFAULT_EXTENSIONS))
+    summary = {
+        'files': 0,
+        'failed_files': 0,
+        'syntax_errors': 0,
+        'tokens': 0,
+        'lines': 0,
+        'stats': LexicalAnalyzer.empty_stats(),
+    }
+
+    results = analyze_paths(paths, jobs=args.jobs, cache_dir=args.cache_dir,
+                            use_cache=not args.no_cache)
+    for result in results:
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + '\n')
+        summary['files'] += 1
+        if 'error' in result:
+            summary['failed_files'] += 1
+            continue
+        summary['tokens'] += result['tokens']
+        summary['lines'] += result['lines']
+        summary['syntax_errors'] += len(result['syntax']['errors'])
+        for key, value in result['stats'].items():
+            summary['stats'][key] += value
+
+    sys.stdout.flush()
+    print(json.dumps({'summary': summary}, ensure_ascii=False), file=sys.stderr)
+    return 1 if summary['failed_files'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
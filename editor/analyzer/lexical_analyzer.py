@@ -1,3 +1,10 @@
+import hashlib
+import re
+import sys
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from operator import add, sub
 from enum import Enum, auto
 
 class TokenType(Enum):
@@ -11,17 +18,177 @@ class TokenType(Enum):
     INVALID = auto()      # Tokens inválidos
 
 class Token:
-    def __init__(self, token_type, value, line, column):
-        self.type = token_type
-        self.value = value
-        self.line = line
-        self.column = column
+    # Vista sobre un token de un TokenBuffer; el valor se extrae al pedirlo
+    __slots__ = ('buffer', 'index')
+
+    def __init__(self, buffer, index):
+        self.buffer = buffer
+        self.index = index
+
+    @property
+    def type(self):
+        return TokenType(self.buffer.types[self.index])
+
+    @property
+    def value(self):
+        return self.buffer.value(self.index)
+
+    @property
+    def line(self):
+        return self.buffer.lines[self.index]
+
+    @property
+    def column(self):
+        return self.buffer.column(self.index)
 
     def __repr__(self):
         return f'Token(type={self.type}, value={self.value}, line={self.line}, column={self.column})'
 
+class TokenBuffer:
+    # Tokens en formato columnar: un código de tipo (TokenType.value) y las
+    # posiciones de inicio/fin y línea de cada token en arrays compactos.
+    # El texto fuente se guarda una sola vez y los valores son cortes de él.
+    __slots__ = ('source', 'types', 'starts', 'ends', 'lines')
+
+    def __init__(self, source):
+        self.source = source
+        self.types = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.lines = array('I')
+
+    def append(self, token_type, start, end, line):
+        self.types.append(token_type.value)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.types)
+        if not 0 <= index < len(self.types):
+            raise IndexError('índice de token fuera de rango')
+        return Token(self, index)
+
+    def __iter__(self):
+        for index in range(len(self.types)):
+            yield Token(self, index)
+
+    def value(self, index):
+        return self.source[self.starts[index]:self.ends[index]]
+
+    def column(self, index):
+        # Columna (desde 0) calculada a partir del último salto de línea
+        start = self.starts[index]
+        return start - self.source.rfind('\n', 0, start) - 1
+
+    def to_tuples(self):
+        # Formato clásico de analyze(): lista de (TokenType, valor)
+        source = self.source
+        return [
+            (TokenType(type_code), source[start:end])
+            for type_code, start, end in zip(self.types, self.starts, self.ends)
+        ]
+
+    def nbytes(self):
+        # Memoria ocupada por los arrays (sin contar el texto fuente)
+        return sum(a.itemsize * len(a) for a in (self.types, self.starts, self.ends, self.lines))
+
+# Caracteres que str.isdigit() acepta pero que \d no reconoce (superíndices, etc.)
+# y caracteres numéricos que \w acepta pero que el analizador trata como inválidos.
+# Se calculan una sola vez, la primera vez que se compila el patrón.
+_unicode_classes = None
+
+
+def _extra_unicode_classes():
+    global _unicode_classes
+    if _unicode_classes is None:
+        digits = []
+        numerics = []
+        for char in map(chr, range(sys.maxunicode + 1)):
+            if not char.isnumeric() or char.isdecimal() or char.isalpha():
+                continue
+            if char.isdigit():
+                digits.append(char)
+            else:
+                numerics.append(char)
+        _unicode_classes = (_char_ranges(digits), _char_ranges(numerics))
+    return _unicode_classes
+
+
+def _char_ranges(chars):
+    # Agrupa los caracteres en rangos 'a-z' para que la clase compilada sea compacta
+    ranges = []
+    for char in chars:
+        if ranges and ord(char) == ord(ranges[-1][1]) + 1:
+            ranges[-1][1] = char
+        else:
+            ranges.append([char, char])
+    return ''.join(
+        re.escape(first) if first == last else f'{re.escape(first)}-{re.escape(last)}'
+        for first, last in ranges
+    )
+
+
+def word_trie(words):
+    # Alternativa en forma de árbol de prefijos: 'i(?:f|mport|n|s)' en lugar de
+    # 'if|import|in|is', para que el motor descarte las palabras por su prefijo.
+    # También la usan las reglas de resaltado (editor.editor.highlight_scanner)
+    branches = {}
+    for word in words:
+        if word:
+            branches.setdefault(word[0], []).append(word[1:])
+    alternatives = []
+    for char, rests in sorted(branches.items()):
+        optional = '' in rests
+        rests = [rest for rest in rests if rest]
+        if not rests:
+            alternatives.append(re.escape(char))
+            continue
+        tail = word_trie(rests)
+        if len(rests) > 1 or optional:
+            tail = f'(?:{tail})'
+        alternatives.append(re.escape(char) + tail + ('?' if optional else ''))
+    return '|'.join(alternatives)
+
+
+def _read_chunks(fileobj, chunk_size):
+    return iter(lambda: fileobj.read(chunk_size), '')
+
+
 class LexicalAnalyzer:
-    def __init__(self):
+    # Motores disponibles: 'regex' (patrón maestro compilado) y 'scan' (recorrido
+    # carácter a carácter original, se conserva para poder comparar resultados)
+    ENGINES = ('regex', 'scan')
+
+    # Se incrementa cuando cambian las reglas de análisis (invalida cachés)
+    VERSION = 1
+
+    # Grupos del patrón maestro y el tipo de token que producen
+    GROUP_TYPES = {
+        'KEYWORD': TokenType.KEYWORD,
+        'IDENTIFIER': TokenType.IDENTIFIER,
+        'UNICODE_IDENTIFIER': TokenType.IDENTIFIER,
+        'DELIMITER': TokenType.DELIMITER,
+        'OPERATOR': TokenType.OPERATOR,
+        'NUMBER': TokenType.NUMBER,
+        'STRING': TokenType.STRING,
+        'COMMENT': TokenType.COMMENT,
+        'INVALID_NUMERIC': TokenType.INVALID,
+        'INVALID': TokenType.INVALID,
+    }
+
+    def __init__(self, engine='regex'):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Motor de análisis desconocido: {engine}")
+        self.engine = engine
+        self._pattern = None
+        # Estadísticas acumuladas del último iter_tokens()
+        self.stats = self.empty_stats()
+
         self.keywords = {
             'and', 'as', 'assert', 'break', 'class', 'continue', 'def',
             'del', 'elif', 'else', 'except', 'False', 'finally', 'for',
@@ -49,6 +216,311 @@ class LexicalAnalyzer:
         }
 
     def analyze(self, code):
+        if self.engine == 'regex':
+            return self.analyze_regex(code)
+        return self.analyze_scan(code)
+
+    def version(self):
+        # Identifica las reglas de este analizador: versión y tablas de símbolos
+        rules = repr((self.VERSION, sorted(self.keywords), sorted(self.operators), sorted(self.delimiters)))
+        return hashlib.sha256(rules.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def empty_stats():
+        return {
+            'total_numbers': 0,
+            'total_special_chars': 0,
+            'total_keywords': 0,
+            'total_invalid_chars': 0,
+            'total_comments': 0,
+            'total_operators': 0,
+        }
+
+    def iter_tokens(self, fileobj, chunk_size=1 << 16):
+        # Lee el archivo por bloques (_blocks) y produce los tokens a medida
+        # que avanza. self.stats se mantiene al día con lo analizado hasta el
+        # momento.
+        self.stats = stats = self.empty_stats()
+        for block in self._blocks(_read_chunks(fileobj, chunk_size), chunk_size):
+            yield from self._analyze_block(block, stats)
+
+    def iter_buffers(self, fileobj, chunk_size=1 << 16):
+        # Como iter_tokens, pero produce un TokenBuffer por bloque con la
+        # línea (desde 1) y la columna (desde 0) en que empieza el bloque:
+        # (buffer, primera_línea, primera_columna). Las líneas del buffer son
+        # relativas al bloque; la del archivo es primera_línea +
+        # buffer.lines[i] - 1. La columna solo se desplaza en la primera línea
+        # del bloque (buffer.lines[i] == 1), que es distinta de 0 cuando el
+        # bloque anterior cortó una línea demasiado larga.
+        return self.iter_chunk_buffers(_read_chunks(fileobj, chunk_size), chunk_size)
+
+    def iter_chunk_buffers(self, chunks, chunk_size=1 << 16):
+        # Como iter_buffers, sobre chunks (trozos de texto). Un trozo None
+        # produce None y vuelve a empezar, como en analyze_chunks: lo
+        # producido hasta entonces no vale
+        self.stats = stats = self.empty_stats()
+        first_line = 1
+        first_column = 0
+        for block in self._blocks(chunks, chunk_size):
+            if block is None:
+                self.stats = stats = self.empty_stats()
+                first_line = 1
+                first_column = 0
+                yield None
+                continue
+            yield self._buffer_block(block, stats), first_line, first_column
+            newlines = block.count('\n')
+            if newlines:
+                first_line += newlines
+                first_column = len(block) - block.rfind('\n') - 1
+            else:
+                first_column += len(block)
+
+    def analyze_chunks(self, chunks, chunk_size=1 << 16):
+        # Como analyze_buffer sobre el texto de chunks (trozos de texto) unido,
+        # pero analizado por bloques a medida que llegan los trozos: devuelve
+        # (TokenBuffer, estadísticas). Un trozo None descarta lo anterior y
+        # vuelve a empezar (así avisa TextReader de editor.fileio de que
+        # cambia la codificación). El buffer necesita el texto completo como
+        # source, así que los bloques se unen al final.
+        chunks = iter(chunks)
+        while True:
+            self.stats = stats = self.empty_stats()
+            buffer = TokenBuffer('')
+            blocks = []
+            offset = 0
+            line = 1
+            for block in self._blocks(chunks, chunk_size):
+                if block is None:
+                    break
+                _, block_stats = self.analyze_buffer(block, buffer, offset, line)
+                for key, value in block_stats.items():
+                    stats[key] += value
+                blocks.append(block)
+                offset += len(block)
+                line += block.count('\n')
+            else:
+                buffer.source = ''.join(blocks)
+                return buffer, dict(stats)
+
+    def _blocks(self, chunks, chunk_size):
+        # Texto de chunks en bloques que no cortan ningún token. Ningún token
+        # cruza un salto de línea, así que cada bloque se corta en el último
+        # '\n' y el resto de la línea se deja para el siguiente. Si una línea
+        # supera chunk_size (un archivo minificado o de una sola línea), se
+        # corta antes del último token, que puede estar incompleto: lo
+        # retenido no crece con el archivo, salvo dentro de un único token más
+        # largo que chunk_size. Un trozo None se devuelve tal cual, sin lo
+        # pendiente (analyze_chunks, iter_chunk_buffers).
+        pending = []
+        size = 0
+        limit = chunk_size
+        for chunk in chunks:
+            if chunk is None:
+                pending = []
+                size = 0
+                limit = chunk_size
+                yield None
+                continue
+            cut = chunk.rfind('\n')
+            if cut != -1:
+                pending.append(chunk[:cut + 1])
+                yield ''.join(pending)
+                pending = [chunk[cut + 1:]]
+                size = len(pending[0])
+                limit = chunk_size
+                continue
+            pending.append(chunk)
+            size += len(chunk)
+            if size > limit:
+                text = ''.join(pending)
+                cut = self._last_token_start(text)
+                if cut:
+                    yield text[:cut]
+                    text = text[cut:]
+                pending = [text]
+                size = len(text)
+                # Si el último token es muy largo, no se vuelve a buscar hasta
+                # que lo retenido se duplique (coste lineal en total)
+                limit = max(chunk_size, 2 * size)
+        text = ''.join(pending)
+        if text:
+            yield text
+
+    def _last_token_start(self, text):
+        # Posición del último token de text (con los espacios que lo preceden).
+        # Los anteriores están completos aunque text corte una línea: ninguna
+        # regla mira más allá del comienzo del token siguiente
+        start = 0
+        for match in self.compiled_pattern().finditer(text):
+            if match.lastgroup != 'END':
+                start = match.start()
+        return start
+
+    def _buffer_block(self, block, stats):
+        buffer, block_stats = self.analyze_buffer(block)
+        for key, value in block_stats.items():
+            stats[key] += value
+        return buffer
+
+    def analyze_line(self, line, state=0):
+        # Analiza una sola línea partiendo del estado en que terminó la anterior
+        # y devuelve (TokenBuffer, estadísticas, estado al final de la línea);
+        # las posiciones del buffer son columnas de la línea, y son las que usa
+        # el resaltado (PythonHighlighter con un IncrementalAnalysis).
+        # Ningún token de estas reglas ocupa varias líneas (una comilla triple
+        # se lee como cadenas de una línea), así que el estado es siempre 0.
+        buffer, stats = self.analyze_buffer(line)
+        return buffer, stats, state
+
+    def incremental(self, code=''):
+        return IncrementalAnalysis(self, code)
+
+    def _analyze_block(self, block, stats):
+        tokens, block_stats = self.analyze(block)
+        for key, value in block_stats.items():
+            stats[key] += value
+        return tokens
+
+    def build_pattern(self):
+        # Un único patrón con grupos nombrados. Las alternativas más frecuentes
+        # van primero; las que se solapan conservan la prioridad del recorrido
+        # carácter a carácter (números antes que identificadores, operadores
+        # antes que delimitadores, etc.)
+        extra_digits, extra_numerics = _extra_unicode_classes()
+        keywords = word_trie(self.keywords)
+        # Solo los operadores que el recorrido voraz puede formar: cada prefijo
+        # debe ser a su vez un operador (o un delimitador, si es de un carácter)
+        reachable = [
+            op for op in self.operators
+            if (op[0] in self.operators or op[0] in self.delimiters)
+            and all(op[:n] in self.operators for n in range(2, len(op)))
+        ]
+        operators = '|'.join(sorted(map(re.escape, reachable), key=len, reverse=True))
+        delimiters = ''.join(
+            re.escape(d) for d in sorted(self.delimiters)
+            if len(d) == 1 and d not in {op[0] for op in reachable}
+        )
+        digit = rf'\d{extra_digits}'
+        parts = [
+            rf'(?P<KEYWORD>(?:{keywords})(?!\w))',
+            r'(?P<IDENTIFIER>[A-Za-z_]\w*)',
+            rf'(?P<DELIMITER>[{delimiters}])',
+            rf'(?P<OPERATOR>{operators})',
+            rf'(?P<NUMBER>(?:[0-9]|(?=[^\x00-\x7f])[{digit}])[.{digit}]*)',
+            r'(?P<STRING>"(?:[^"\\\n]|\\[^\n])*"|\'(?:[^\'\\\n]|\\[^\n])*\')',
+            # Cadena sin cerrar: se descarta el resto de la línea sin emitir token
+            r'(?P<UNTERMINATED>["\'][^\n]*)',
+            r'(?P<COMMENT>#[^\n]*)',
+        ]
+        if extra_numerics:
+            # Caracteres numéricos que no son dígitos ni letras: inválidos
+            parts.append(rf'(?P<INVALID_NUMERIC>(?=[^\x00-\x7f])[{extra_numerics}])')
+        parts += [
+            # Identificadores que empiezan con una letra no ASCII
+            r'(?P<UNICODE_IDENTIFIER>(?=[^\x00-\x7f])[^\W\d]\w*)',
+            r'(?P<INVALID>\S)',
+            # Espacios al final del texto
+            r'(?P<END>\Z)',
+        ]
+        # Los espacios previos a cada token se consumen dentro del mismo match,
+        # así la búsqueda no prueba todas las alternativas en cada espacio
+        return re.compile(r'\s*+(?:' + '|'.join(parts) + ')')
+
+    def compiled_pattern(self):
+        if self._pattern is None:
+            self._pattern = self.build_pattern()
+            # Tipo de token por número de grupo (None para las coincidencias
+            # que no generan token)
+            self._group_types = [None] * (self._pattern.groups + 1)
+            for name, index in self._pattern.groupindex.items():
+                self._group_types[index] = self.GROUP_TYPES.get(name)
+        return self._pattern
+
+    def analyze_regex(self, code):
+        pattern = self.compiled_pattern()
+        group_types = self._group_types
+        number = pattern.groupindex['NUMBER']
+        operator = pattern.groupindex['OPERATOR']
+
+        tokens = []
+        append = tokens.append
+        counts = [0] * (pattern.groups + 1)
+        total_numbers = 0
+        total_operator_chars = 0
+
+        for match in pattern.finditer(code):
+            index = match.lastindex
+            token_type = group_types[index]
+            if token_type is None:
+                continue
+            value = match[index]
+            append((token_type, value))
+            counts[index] += 1
+            if index == number:
+                total_numbers += len(value)
+            elif index == operator:
+                total_operator_chars += len(value)
+
+        return tokens, self._group_stats(counts, total_numbers, total_operator_chars)
+
+    def analyze_buffer(self, code, buffer=None, offset=0, first_line=1):
+        # Igual que analyze_regex, pero guarda los tokens en un TokenBuffer
+        # (tipos y posiciones en arrays) en lugar de una lista de tuplas.
+        # Siempre usa el patrón maestro, que es el que conoce las posiciones.
+        # buffer: TokenBuffer al que añadir los tokens (por defecto, uno nuevo
+        # sobre code); offset y first_line: posición y línea en que empieza
+        # code dentro de buffer.source
+        pattern = self.compiled_pattern()
+        group_codes = [token_type.value if token_type else 0 for token_type in self._group_types]
+        number = pattern.groupindex['NUMBER']
+        operator = pattern.groupindex['OPERATOR']
+
+        if buffer is None:
+            buffer = TokenBuffer(code)
+        types_append = buffer.types.append
+        starts_append = buffer.starts.append
+        ends_append = buffer.ends.append
+        lines_append = buffer.lines.append
+        count_newlines = code.count
+        counts = [0] * (pattern.groups + 1)
+        total_numbers = 0
+        total_operator_chars = 0
+        line = first_line
+        position = 0
+
+        for match in pattern.finditer(code):
+            index = match.lastindex
+            type_code = group_codes[index]
+            if not type_code:
+                continue
+            start, end = match.span(index)
+            line += count_newlines('\n', position, start)
+            position = start
+            types_append(type_code)
+            starts_append(start + offset)
+            ends_append(end + offset)
+            lines_append(line)
+            counts[index] += 1
+            if index == number:
+                total_numbers += end - start
+            elif index == operator:
+                total_operator_chars += end - start
+
+        return buffer, self._group_stats(counts, total_numbers, total_operator_chars)
+
+    def _group_stats(self, counts, total_numbers, total_operator_chars):
+        groups = self._pattern.groupindex
+        return {
+            'total_numbers': total_numbers,
+            'total_special_chars': total_operator_chars + counts[groups['DELIMITER']],
+            'total_keywords': counts[groups['KEYWORD']],
+            'total_invalid_chars': counts[groups['INVALID']] + counts[groups.get('INVALID_NUMERIC', 0)],
+            'total_comments': counts[groups['COMMENT']],
+            'total_operators': counts[groups['OPERATOR']],
+        }
+
+    def analyze_scan(self, code):
         tokens = []
         total_numbers = 0
         total_special_chars = 0
@@ -143,3 +615,114 @@ class LexicalAnalyzer:
             'total_comments': total_comments,
             'total_operators': total_operators,
         }
+
+
+class IncrementalAnalysis:
+    # Caché de tokens por línea para volver a analizar solo lo que cambia.
+    # Por cada línea se guardan sus tokens (un TokenBuffer de la línea), sus
+    # estadísticas y el estado del analizador al terminarla; una edición
+    # re-analiza las líneas tocadas y sigue hacia abajo solo mientras el
+    # estado final difiera del guardado.
+    def __init__(self, analyzer, code=''):
+        self.analyzer = analyzer
+        self.reset(code)
+
+    def reset(self, code):
+        self.lines = code.split('\n')
+        self.line_tokens = []
+        self.line_stats = []
+        self.line_states = []
+        state = 0
+        for line in self.lines:
+            tokens, stats, state = self.analyzer.analyze_line(line, state)
+            self.line_tokens.append(tokens)
+            self.line_stats.append(tuple(stats.values()))
+            self.line_states.append(state)
+        self._totals = [sum(column) for column in zip(*self.line_stats)]
+        self._starts = None
+        self._tokens = None
+        # Número de líneas analizadas en la última operación
+        self.relexed_lines = len(self.lines)
+
+    def text(self):
+        return '\n'.join(self.lines)
+
+    def line_starts(self):
+        # Desplazamiento de inicio de cada línea; se recalcula tras cada edición
+        if self._starts is None:
+            lengths = accumulate(map(len, self.lines), initial=0)
+            self._starts = list(map(add, lengths, range(len(self.lines))))
+        return self._starts
+
+    def tokens(self):
+        # Todos los tokens en un TokenBuffer sobre text(), unido a partir de
+        # los de cada línea sin volver a analizar nada
+        if self._tokens is None:
+            buffer = TokenBuffer(self.text())
+            for number, (offset, line_buffer) in enumerate(
+                    zip(self.line_starts(), self.line_tokens), 1):
+                count = len(line_buffer)
+                if not count:
+                    continue
+                buffer.types.extend(line_buffer.types)
+                buffer.starts.extend(array('I', [start + offset for start in line_buffer.starts]))
+                buffer.ends.extend(array('I', [end + offset for end in line_buffer.ends]))
+                buffer.lines.extend(array('I', [number]) * count)
+            self._tokens = buffer
+        return self._tokens
+
+    @property
+    def stats(self):
+        return dict(zip(self.analyzer.empty_stats(), self._totals))
+
+    def apply_edit(self, offset, removed_len, inserted_text):
+        # Aplica una edición (desplazamiento, caracteres borrados, texto
+        # insertado) y devuelve el rango [primera, última) de líneas re-analizadas
+        starts = self.line_starts()
+        end = offset + removed_len
+        if offset < 0 or removed_len < 0 or end > starts[-1] + len(self.lines[-1]):
+            raise ValueError('La edición queda fuera del texto analizado')
+
+        first = bisect_right(starts, offset) - 1
+        last = bisect_right(starts, end) - 1
+        head = self.lines[first][:offset - starts[first]]
+        tail = self.lines[last][end - starts[last]:]
+        new_lines = (head + inserted_text + tail).split('\n')
+
+        state = self.line_states[first - 1] if first else 0
+        old_state = self.line_states[last]
+        self._replace_lines(first, last + 1, new_lines, state)
+        index = first + len(new_lines)
+        state = self.line_states[index - 1]
+
+        # Propagar mientras el estado de salida cambie respecto al guardado
+        while index < len(self.lines) and state != old_state:
+            old_state = self.line_states[index]
+            self._replace_lines(index, index + 1, [self.lines[index]], state)
+            state = self.line_states[index]
+            index += 1
+
+        self.relexed_lines = index - first
+        self._starts = None
+        self._tokens = None
+        return first, index
+
+    def _replace_lines(self, start, stop, lines, state):
+        tokens_list = []
+        stats_list = []
+        states = []
+        for line in lines:
+            tokens, stats, state = self.analyzer.analyze_line(line, state)
+            tokens_list.append(tokens)
+            stats_list.append(tuple(stats.values()))
+            states.append(state)
+
+        for stats in self.line_stats[start:stop]:
+            self._totals = list(map(sub, self._totals, stats))
+        for stats in stats_list:
+            self._totals = list(map(add, self._totals, stats))
+
+        self.lines[start:stop] = lines
+        self.line_tokens[start:stop] = tokens_list
+        self.line_stats[start:stop] = stats_list
+        self.line_states[start:stop] = states
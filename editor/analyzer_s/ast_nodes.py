@@ -0,0 +1,206 @@
+# Nodos del árbol sintáctico que construye Parser.
+#
+# Cada nodo es una clase con __slots__ (sin __dict__ por instancia) que guarda
+# sus campos y la posición en el código fuente: línea (desde 1) y columna
+# (desde 0) del primer token del nodo. Los nodos que empiezan por su primer
+# hijo (BinaryOp por su operando izquierdo, Program por su primera sentencia)
+# no guardan la posición: la toman de ese hijo.
+#
+# Formato anterior: hasta ahora el árbol se representaba con tuplas anidadas,
+# por ejemplo ('BINARY_OP', '+', ('VALUE', 'a'), ('VALUE', '1')). to_tuples(node)
+# convierte un árbol de nodos a ese formato exacto, incluidos los envoltorios
+# ('BLOCK', [...]) y ('ELSE', ('BLOCK', [...])), para el código que aún lo usa.
+
+
+class Node:
+    __slots__ = ()
+    kind = None  # Etiqueta del nodo en el formato de tuplas
+    fields = ()
+
+    # Los nodos son mutables (shift_lines, IncrementalParser) y __eq__ compara
+    # la estructura: no se pueden usar como claves de dict ni en sets. Para
+    # indexar nodos concretos, usar id(node)
+    __hash__ = None
+
+    def __init__(self, *values, line=0, column=0):
+        if len(values) != len(self.fields):
+            raise TypeError(f'{type(self).__name__} espera {len(self.fields)} campos')
+        for name, value in zip(self.fields, values):
+            setattr(self, name, value)
+        # En los nodos sin posición propia, la asignación no hace nada
+        self.line = line
+        self.column = column
+
+    # Posición de los nodos sin posición propia: la del primer descendiente
+    # por first_child() que la tiene. En los demás (_Located) los slots 'line'
+    # y 'column' tapan estas propiedades
+    def first_child(self):
+        return None
+
+    def _origin(self):
+        # Sin recursión: a + b + c + ... anida los BinaryOp por la izquierda
+        node = self.first_child()
+        while node is not None and not isinstance(node, _Located):
+            node = node.first_child()
+        return node
+
+    @property
+    def line(self):
+        origin = self._origin()
+        return 1 if origin is None else origin.line
+
+    @line.setter
+    def line(self, value):
+        pass  # Se mueve con el hijo (walk también lo recorre)
+
+    @property
+    def column(self):
+        origin = self._origin()
+        return 0 if origin is None else origin.column
+
+    @column.setter
+    def column(self, value):
+        pass
+
+    def children(self):
+        return [getattr(self, name) for name in self.fields]
+
+    def to_tuple(self):
+        return (self.kind, *map(to_tuples, self.children()))
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.children() == other.children()
+
+    def __repr__(self):
+        values = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.fields)
+        return f'{type(self).__name__}({values}, line={self.line}, column={self.column})'
+
+
+class _Located(Node):
+    # Nodo con posición propia
+    __slots__ = ('line', 'column')
+
+
+def _block(statements):
+    return ('BLOCK', to_tuples(statements))
+
+
+class Program(Node):
+    __slots__ = ('statements',)
+    kind = 'PROGRAM'
+    fields = ('statements',)
+
+    def first_child(self):
+        return self.statements[0] if self.statements else None
+
+
+class Assign(_Located):
+    __slots__ = ('name', 'value')
+    kind = 'ASSIGN'
+    fields = ('name', 'value')
+
+
+class If(_Located):
+    __slots__ = ('condition', 'body', 'orelse')
+    kind = 'IF'
+    fields = ('condition', 'body', 'orelse')
+
+    def to_tuple(self):
+        orelse = None if self.orelse is None else ('ELSE', _block(self.orelse))
+        return (self.kind, to_tuples(self.condition), _block(self.body), orelse)
+
+
+class While(_Located):
+    __slots__ = ('condition', 'body')
+    kind = 'WHILE'
+    fields = ('condition', 'body')
+
+    def to_tuple(self):
+        return (self.kind, to_tuples(self.condition), _block(self.body))
+
+
+class For(_Located):
+    __slots__ = ('target', 'iterable', 'body')
+    kind = 'FOR'
+    fields = ('target', 'iterable', 'body')
+
+    def to_tuple(self):
+        return (self.kind, self.target, to_tuples(self.iterable), _block(self.body))
+
+
+class FunctionDef(_Located):
+    __slots__ = ('name', 'params', 'body')
+    kind = 'FUNCTION_DEF'
+    fields = ('name', 'params', 'body')
+
+    def to_tuple(self):
+        return (self.kind, self.name, list(self.params), _block(self.body))
+
+
+class FunctionCall(_Located):
+    __slots__ = ('name', 'args')
+    kind = 'FUNCTION_CALL'
+    fields = ('name', 'args')
+
+
+class Print(_Located):
+    __slots__ = ('value',)
+    kind = 'PRINT'
+    fields = ('value',)
+
+
+class Return(_Located):
+    __slots__ = ('value',)
+    kind = 'RETURN'
+    fields = ('value',)
+
+
+class ListExpr(_Located):
+    __slots__ = ('items',)
+    kind = 'LIST'
+    fields = ('items',)
+
+
+class BinaryOp(Node):
+    __slots__ = ('op', 'left', 'right')
+    kind = 'BINARY_OP'
+    fields = ('op', 'left', 'right')
+
+    def first_child(self):
+        return self.left
+
+
+class Value(_Located):
+    __slots__ = ('value',)
+    kind = 'VALUE'
+    fields = ('value',)
+
+
+def to_tuples(node):
+    # Convierte un árbol de nodos (o listas de nodos) al formato de tuplas
+    if isinstance(node, Node):
+        return node.to_tuple()
+    if isinstance(node, list):
+        return [to_tuples(item) for item in node]
+    return node
+
+
+
+def walk(node):
+    # Todos los nodos del árbol (o lista de árboles), sin recursión
+    pending = [node]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, Node):
+            yield item
+            pending.extend(item.children())
+        elif isinstance(item, list):
+            pending.extend(item)
+
+
+def shift_lines(node, delta):
+    # Suma delta a la línea de todos los nodos del árbol, en sitio; se usa al
+    # reubicar un subárbol cuando cambian las líneas de encima sin que cambie
+    # su texto
+    for item in walk(node):
+        item.line += delta
@@ -0,0 +1,406 @@
+# Compilador del árbol sintáctico (ast_nodes) a bytecode para la VM (vm.py).
+#
+# Cada función, y el programa principal, se compila a un CodeObject:
+#   ops        array con el código de operación de cada instrucción
+#   args       array con el argumento entero de cada instrucción (en las
+#              operaciones binarias, 0 si los dos operandos están en la pila o
+#              el índice de la constante del operando derecho más uno)
+#   constants  tabla de constantes (LOAD_CONST indexa en ella)
+#   lines      línea del código fuente de cada instrucción, para los errores
+# Las variables locales de una función (parámetros y nombres asignados en su
+# cuerpo) tienen un índice fijo en el marco de la llamada. Los nombres
+# asignados en el programa principal son globales, también con índice fijo en
+# una única tabla. Un nombre que no es ni local ni global se resuelve a su
+# builtin al compilar.
+#
+# Antes de generar código se pliegan las constantes: una operación con dos
+# operandos constantes se calcula al compilar, y un if/while con condición
+# constante solo genera la rama que se puede ejecutar.
+#
+# La gramática no tiene INDENT/DEDENT, así que el cuerpo de un bloque llega
+# hasta el final del archivo (o hasta el else); se ejecuta el árbol tal cual
+# lo construye Parser.
+import operator
+from array import array
+
+from editor.analyzer_s.ast_nodes import (
+    Program, Assign, If, While, For, FunctionDef, FunctionCall,
+    Print, Return, ListExpr, BinaryOp, Value,
+)
+
+# Códigos de operación
+LOAD_CONST = 0
+LOAD_FAST = 1
+STORE_FAST = 2
+LOAD_GLOBAL = 3
+STORE_GLOBAL = 4
+BINARY_ADD = 5
+BINARY_SUB = 6
+BINARY_MUL = 7
+BINARY_DIV = 8
+COMPARE_LT = 9
+COMPARE_GT = 10
+COMPARE_LE = 11
+COMPARE_GE = 12
+COMPARE_EQ = 13
+COMPARE_NE = 14
+JUMP = 15
+POP_JUMP_IF_FALSE = 16
+GET_ITER = 17
+FOR_ITER = 18
+CALL = 19
+PRINT = 20
+RETURN = 21
+POP = 22
+BUILD_LIST = 23
+
+OPNAMES = {value: name for name, value in list(globals().items())
+           if name.isupper() and isinstance(value, int)}
+
+# Operador del lenguaje -> (código de operación, función de Python)
+BINARY_OPS = {
+    '+': (BINARY_ADD, operator.add),
+    '-': (BINARY_SUB, operator.sub),
+    '*': (BINARY_MUL, operator.mul),
+    '/': (BINARY_DIV, operator.truediv),
+    '<': (COMPARE_LT, operator.lt),
+    '>': (COMPARE_GT, operator.gt),
+    '<=': (COMPARE_LE, operator.le),
+    '>=': (COMPARE_GE, operator.ge),
+    '==': (COMPARE_EQ, operator.eq),
+    '!=': (COMPARE_NE, operator.ne),
+}
+
+_BINARY_CODES = {code for code, _ in BINARY_OPS.values()}
+
+BUILTINS = {
+    'True': True,
+    'False': False,
+    'None': None,
+    'range': range,
+    'len': len,
+    'str': str,
+    'int': int,
+    'float': float,
+    'abs': abs,
+    'min': min,
+    'max': max,
+}
+
+_NOT_CONSTANT = object()
+
+
+class ExecutionError(Exception):
+    # Error al ejecutar un programa; line es la línea del código fuente
+    def __init__(self, message, line=None):
+        super().__init__(f"Línea {line}: {message}" if line else message)
+        self.line = line
+
+
+def literal(text):
+    # Valor de un literal del lenguaje, o _NOT_CONSTANT si text es un nombre
+    first = text[:1]
+    if first.isdigit():
+        return float(text) if '.' in text else int(text)
+    if first in ('"', "'"):
+        return text[1:-1]
+    return _NOT_CONSTANT
+
+
+class CodeObject:
+    __slots__ = ('name', 'ops', 'args', 'constants', 'lines', 'nparams', 'nlocals', 'local_names',
+                 '_pairs')
+
+    def __init__(self, name):
+        self.name = name
+        self.ops = array('B')
+        self.args = array('i')
+        self.constants = []
+        self.lines = array('I')
+        self.nparams = 0
+        self.nlocals = 0
+        self.local_names = []
+        self._pairs = None
+
+    def __len__(self):
+        return len(self.ops)
+
+    def pairs(self):
+        # Instrucciones como lista de pares (op, arg), que la VM indexa más
+        # rápido que los dos arrays; se construye la primera vez que se pide
+        if self._pairs is None or len(self._pairs) != len(self.ops):
+            self._pairs = list(zip(self.ops, self.args))
+        return self._pairs
+
+    def disassemble(self):
+        # Listado legible de las instrucciones, para depurar el compilador
+        result = []
+        for pc, (op, arg) in enumerate(zip(self.ops, self.args)):
+            text = f'{pc:5} {OPNAMES[op]:18} {arg}'
+            if op == LOAD_CONST:
+                text += f' ({self.constants[arg]!r})'
+            elif op in (LOAD_FAST, STORE_FAST):
+                text += f' ({self.local_names[arg]})'
+            elif op in _BINARY_CODES and arg:
+                text += f' ({self.constants[arg - 1]!r})'
+            result.append(text)
+        return '\n'.join(result)
+
+
+class Function:
+    # Función del programa: su código compilado
+    __slots__ = ('name', 'code')
+
+    def __init__(self, name, code):
+        self.name = name
+        self.code = code
+
+    def __repr__(self):
+        return f'<función {self.name}>'
+
+
+class CompiledProgram:
+    # Código del programa principal y nombres de las variables globales (el
+    # índice de cada una en la tabla de globales de la VM)
+    def __init__(self, code, global_names):
+        self.code = code
+        self.global_names = global_names
+
+
+def _assigned_names(statements, names):
+    # Nombres asignados (o definidos) en una lista de sentencias, sin entrar
+    # en las funciones anidadas, en orden de aparición
+    pending = list(reversed(statements))
+    while pending:
+        node = pending.pop()
+        if isinstance(node, Assign):
+            names.setdefault(node.name, len(names))
+        elif isinstance(node, For):
+            names.setdefault(node.target, len(names))
+            pending.extend(reversed(node.body))
+        elif isinstance(node, FunctionDef):
+            names.setdefault(node.name, len(names))
+        elif isinstance(node, If):
+            pending.extend(reversed(node.orelse or []))
+            pending.extend(reversed(node.body))
+        elif isinstance(node, While):
+            pending.extend(reversed(node.body))
+    return names
+
+
+class Compiler:
+    # Uso: Compiler().compile(programa) -> CompiledProgram
+    def compile(self, program):
+        if not isinstance(program, Program):
+            raise TypeError('Se esperaba el nodo Program del árbol sintáctico')
+        self.globals = _assigned_names(program.statements, {})
+        self.locals = None  # Índices de las locales de la función en curso
+        code = self._begin('<programa>')
+        self._statements(program.statements)
+        self._finish(program.line)
+        return CompiledProgram(code, list(self.globals))
+
+    # Generación de código
+
+    def _begin(self, name):
+        self.code = CodeObject(name)
+        self._constant_index = {}
+        return self.code
+
+    def _finish(self, line):
+        # Toda función termina devolviendo None si no hay return
+        self._emit(LOAD_CONST, self._constant(None), line)
+        self._emit(RETURN, 0, line)
+
+    def _emit(self, op, arg, line):
+        code = self.code
+        code.ops.append(op)
+        code.args.append(arg)
+        code.lines.append(line)
+        return len(code.ops) - 1
+
+    def _patch(self, index, target):
+        self.code.args[index] = target
+
+    def _here(self):
+        return len(self.code.ops)
+
+    def _constant(self, value):
+        # La clave incluye el tipo para no confundir 1, 1.0 y True
+        key = (type(value), value)
+        index = self._constant_index.get(key)
+        if index is None:
+            index = self._constant_index[key] = len(self.code.constants)
+            self.code.constants.append(value)
+        return index
+
+    # Sentencias
+
+    def _statements(self, statements):
+        for statement in statements:
+            self._statement(statement)
+
+    def _statement(self, node):
+        line = node.line
+        if isinstance(node, Assign):
+            self._expression(node.value)
+            self._store(node.name, line)
+        elif isinstance(node, Print):
+            self._expression(node.value)
+            self._emit(PRINT, 0, line)
+        elif isinstance(node, FunctionCall):
+            self._call(node)
+            self._emit(POP, 0, line)
+        elif isinstance(node, If):
+            self._if(node)
+        elif isinstance(node, While):
+            self._while(node)
+        elif isinstance(node, For):
+            self._for(node)
+        elif isinstance(node, FunctionDef):
+            self._function(node)
+        elif isinstance(node, Return):
+            self._expression(node.value)
+            self._emit(RETURN, 0, line)
+        else:
+            raise TypeError(f'Sentencia no soportada: {type(node).__name__}')
+
+    def _if(self, node):
+        condition = self.fold(node.condition)
+        if condition is not _NOT_CONSTANT:
+            # Solo se genera la rama que se puede ejecutar
+            self._statements(node.body if condition else node.orelse or [])
+            return
+        self._expression(node.condition)
+        jump_else = self._emit(POP_JUMP_IF_FALSE, 0, node.line)
+        self._statements(node.body)
+        if node.orelse:
+            jump_end = self._emit(JUMP, 0, node.line)
+            self._patch(jump_else, self._here())
+            self._statements(node.orelse)
+            self._patch(jump_end, self._here())
+        else:
+            self._patch(jump_else, self._here())
+
+    def _while(self, node):
+        condition = self.fold(node.condition)
+        if condition is not _NOT_CONSTANT and not condition:
+            return
+        start = self._here()
+        jump_end = None
+        if condition is _NOT_CONSTANT:
+            self._expression(node.condition)
+            jump_end = self._emit(POP_JUMP_IF_FALSE, 0, node.line)
+        self._statements(node.body)
+        self._emit(JUMP, start, node.line)
+        if jump_end is not None:
+            self._patch(jump_end, self._here())
+
+    def _for(self, node):
+        self._expression(node.iterable)
+        self._emit(GET_ITER, 0, node.line)
+        start = self._emit(FOR_ITER, 0, node.line)
+        self._store(node.target, node.line)
+        self._statements(node.body)
+        self._emit(JUMP, start, node.line)
+        self._patch(start, self._here())
+
+    def _function(self, node):
+        # Las funciones no capturan variables, así que el objeto Function se
+        # crea al compilar y se guarda como una constante más
+        outer_code, outer_index, outer_locals = self.code, self._constant_index, self.locals
+        local_names = {name: index for index, name in enumerate(node.params)}
+        if len(local_names) != len(node.params):
+            raise ExecutionError(f"Parámetros repetidos en la función '{node.name}'", node.line)
+        self.locals = _assigned_names(node.body, local_names)
+        code = self._begin(node.name)
+        code.nparams = len(node.params)
+        code.nlocals = len(self.locals)
+        code.local_names = list(self.locals)
+        function = Function(node.name, code)
+        try:
+            self._statements(node.body)
+            self._finish(node.line)
+        finally:
+            self.code, self._constant_index, self.locals = outer_code, outer_index, outer_locals
+        self._emit(LOAD_CONST, self._constant(function), node.line)
+        self._store(node.name, node.line)
+
+    def _store(self, name, line):
+        if self.locals is not None and name in self.locals:
+            self._emit(STORE_FAST, self.locals[name], line)
+        else:
+            self._emit(STORE_GLOBAL, self.globals[name], line)
+
+    # Expresiones
+
+    def _expression(self, node):
+        value = self.fold(node)
+        if value is not _NOT_CONSTANT:
+            self._emit(LOAD_CONST, self._constant(value), node.line)
+        elif isinstance(node, Value):
+            if isinstance(node.value, FunctionCall):
+                self._call(node.value)
+            else:
+                self._load(node.value, node.line)
+        elif isinstance(node, BinaryOp):
+            self._expression(node.left)
+            right = self.fold(node.right)
+            if right is _NOT_CONSTANT:
+                self._expression(node.right)
+                self._emit(BINARY_OPS[node.op][0], 0, node.line)
+            else:
+                # Operando derecho constante (i + 1, n < 10): va en el
+                # argumento, como índice en la tabla de constantes más uno
+                self._emit(BINARY_OPS[node.op][0], self._constant(right) + 1, node.line)
+        elif isinstance(node, ListExpr):
+            for item in node.items:
+                self._expression(item)
+            self._emit(BUILD_LIST, len(node.items), node.line)
+        elif isinstance(node, FunctionCall):
+            self._call(node)
+        else:
+            raise TypeError(f'Expresión no soportada: {type(node).__name__}')
+
+    def _load(self, name, line):
+        if self.locals is not None and name in self.locals:
+            self._emit(LOAD_FAST, self.locals[name], line)
+        elif name in self.globals:
+            self._emit(LOAD_GLOBAL, self.globals[name], line)
+        elif name in BUILTINS:
+            self._emit(LOAD_CONST, self._constant(BUILTINS[name]), line)
+        else:
+            # Puede que nunca se asigne: la VM da el error si se llega a leer
+            index = self.globals.setdefault(name, len(self.globals))
+            self._emit(LOAD_GLOBAL, index, line)
+
+    def _call(self, node):
+        self._load(node.name, node.line)
+        for arg in node.args:
+            self._expression(arg)
+        self._emit(CALL, len(node.args), node.line)
+
+    def fold(self, node):
+        # Valor de la expresión si se conoce al compilar; _NOT_CONSTANT si no.
+        # Una operación que fallaría (1 / 0, "a" - 1) no se pliega: el error
+        # se da al ejecutarla, con su línea.
+        if isinstance(node, Value):
+            if isinstance(node.value, str):
+                return literal(node.value)
+            return _NOT_CONSTANT
+        if isinstance(node, BinaryOp):
+            left = self.fold(node.left)
+            if left is _NOT_CONSTANT:
+                return _NOT_CONSTANT
+            right = self.fold(node.right)
+            if right is _NOT_CONSTANT:
+                return _NOT_CONSTANT
+            try:
+                return BINARY_OPS[node.op][1](left, right)
+            except Exception:
+                return _NOT_CONSTANT
+        return _NOT_CONSTANT
+
+
+def compile_program(program):
+    return Compiler().compile(program)
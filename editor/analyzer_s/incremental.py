@@ -0,0 +1,380 @@
+# Análisis sintáctico incremental sobre la gramática de Parser.
+#
+# El código se divide en regiones que empiezan en las líneas cuya primera
+# columna abre una sentencia (un identificador o una palabra reservada que no
+# sea else, fuera de cadenas y comentarios '''). Cada región se analiza por
+# separado y su resultado (sentencias, errores) se guarda con el texto de la
+# región como clave, así que tras una edición solo se vuelven a analizar las
+# regiones cuyo texto cambió.
+#
+# La gramática no tiene bloques por indentación: un if/while/for/def absorbe
+# todas las sentencias que le siguen. Al unir las regiones, las sentencias de
+# cada una se añaden al cuerpo abierto más interno de lo anterior (copiando
+# solo los nodos de ese camino, nunca los de la caché), que es el mismo árbol
+# que produce un análisis completo. Si una región no se puede analizar sola
+# (una expresión que sigue en la línea siguiente, un else que cierra un if de
+# una región anterior...) se une con sus vecinas hasta que el análisis es
+# correcto o se alcanza MAX_MERGES; los errores que queden son los de esa
+# ventana, con las líneas del archivo completo. Hay dos casos que solo se
+# arreglan en una dirección y que pueden necesitar más uniones: una ventana
+# cuyo único error es que se acaba con algo abierto (una cadena de if/while/
+# for/def sin cuerpo todavía) se extiende hacia delante, y una con un else
+# (que se une al if abierto más interno, quizá muchas regiones más arriba)
+# absorbe las anteriores. En los dos, sin límite mientras el análisis siga
+# fallando: en el peor caso, hasta el final o desde el comienzo del archivo.
+#
+# Las líneas de los nodos son las del archivo completo. (Parser.parse no
+# cuenta los saltos de línea dentro de una cadena "..."; aquí cada región
+# empieza en su línea real, así que tras una cadena de varias líneas los
+# números pueden diferir de los de un análisis completo.)
+#
+# El AST devuelto comparte nodos con la caché: es válido hasta la siguiente
+# llamada a parse() o apply_edit().
+import copy
+import re
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+from editor.analyzer_s.sintax_analyzer import get_parser
+from editor.analyzer_s.ast_nodes import If, While, For, FunctionDef, Program, shift_lines, walk
+
+MAX_MERGES = 8
+MAX_RECENT = 256
+
+# Las cadenas y comentarios se consumen enteros para que un comienzo de línea
+# dentro de ellos no cuente como frontera (mismas reglas que Lexer). Una
+# comilla sin cierre se salta, como hace el lexer, pero se anota: una comilla
+# escrita más adelante puede cerrarla y cambiar las fronteras de antes
+_BOUNDARY = re.compile(r"""'''[\s\S]*?'''|"[^"]*"|'[^']*'|(?P<quote>['"])|^(?P<start>(?!else\b)[A-Za-z_])""", re.M)
+_ELSE = re.compile(r'^[ \t]*else\b', re.M)
+
+
+class _Window:
+    __slots__ = ('text', 'first_line', 'success', 'errors', 'statements', 'open', 'live', 'nodes',
+                 'incomplete')
+
+    def __init__(self, text, first_line, success, errors, statements):
+        self.text = text
+        self.first_line = first_line
+        self.success = success
+        self.errors = errors
+        self.statements = statements
+        # La última sentencia es compuesta: la siguiente ventana va dentro
+        self.open = bool(statements) and _open_body(statements[-1]) is not None
+        self.live = False  # Forma parte del árbol actual
+        self.nodes = None  # Lista plana de los nodos, para move()
+        self.incomplete = False  # El único error es el final del texto
+
+    def move(self, first_line):
+        # Reubica el árbol de la ventana a partir de first_line, en sitio
+        if self.nodes is None:
+            self.nodes = list(walk(self.statements))
+        delta = first_line - self.first_line
+        for node in self.nodes:
+            node.line += delta
+        self.first_line = first_line
+
+
+def _open_body(node):
+    # Lista de sentencias a la que el análisis completo añadiría las
+    # siguientes, o None si el nodo no es compuesto
+    if isinstance(node, If):
+        return node.body if node.orelse is None else node.orelse
+    if isinstance(node, (While, For, FunctionDef)):
+        return node.body
+    return None
+
+
+def _reopen(node):
+    # Copia del nodo compuesto con su cuerpo abierto copiado, para poder
+    # extenderlo sin tocar el árbol guardado en la caché
+    node = type(node)(*node.children(), line=node.line, column=node.column)
+    if isinstance(node, If) and node.orelse is not None:
+        node.orelse = list(node.orelse)
+        return node, node.orelse
+    node.body = list(node.body)
+    return node, node.body
+
+
+def _common_prefix(a, b):
+    # Longitud del prefijo común, comparando tramos cada vez más cortos
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix(a, b, limit):
+    low, high = 0, min(len(a), len(b), limit)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:len(a) - low] == b[len(b) - middle:len(b) - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class IncrementalParser:
+    def __init__(self, parser=None):
+        self.parser = parser or get_parser()
+        self.text = ''
+        self._starts = None  # posición de comienzo de cada región
+        self._lines = []  # línea de comienzo de cada región
+        self._open_quote = None  # posición de la primera comilla sin cierre
+        self._windows = []  # (primera región, última región, _Window)
+        self._cache = {}  # texto de la ventana -> _Window
+        self._recent = deque()  # textos de ventanas descartadas que aún se guardan
+        self.result = None
+        self.reparsed = 0  # ventanas analizadas en la última llamada
+        self.reused = 0  # ventanas tomadas de la caché en la última llamada
+
+    @staticmethod
+    def regions(code, pos=0, quotes=None):
+        # Posiciones de comienzo de las regiones desde pos (que debe ser el
+        # comienzo de una región o 0); las comillas sin cierre se añaden a
+        # quotes si se pasa una lista
+        for match in _BOUNDARY.finditer(code, pos):
+            if match.group('start'):
+                yield match.start()
+            elif quotes is not None and match.group('quote'):
+                quotes.append(match.start())
+
+    def parse(self, code):
+        # Analiza code reutilizando todo lo posible del texto anterior: la
+        # edición se deduce del prefijo y el sufijo comunes
+        if self._starts is None:
+            return self._update(code, 0, 0, 0)
+        old = self.text
+        if code == old:
+            self.reparsed = self.reused = 0
+            return self.result
+        prefix = _common_prefix(old, code)
+        suffix = _common_suffix(old, code, min(len(old), len(code)) - prefix)
+        return self.apply_edit(prefix, len(old) - prefix - suffix, code[prefix:len(code) - suffix])
+
+    def apply_edit(self, offset, removed_len, inserted_text):
+        # Sustituye removed_len caracteres desde offset por inserted_text y
+        # devuelve (éxito, errores, AST) del texto resultante
+        old = self.text
+        if not 0 <= offset <= offset + removed_len <= len(old):
+            raise ValueError('edición fuera del texto')
+        code = old[:offset] + inserted_text + old[offset + removed_len:]
+        if self._starts is None:
+            return self._update(code, 0, 0, 0)
+        line_delta = inserted_text.count('\n') - old.count('\n', offset, offset + removed_len)
+        return self._update(code, offset, offset + removed_len, line_delta,
+                            '"' in inserted_text or "'" in inserted_text)
+
+    def _update(self, code, offset, old_end, line_delta, quoted=False):
+        self.reparsed = self.reused = 0
+        starts = self._starts or []
+        lines = self._lines
+        delta = len(code) - len(self.text) if self._starts is not None else 0
+        edit_end = old_end + delta
+
+        # Regiones anteriores a la editada: intactas (salvo que la edición
+        # pueda cerrar una comilla abierta antes). Se vuelve a buscar
+        # fronteras desde la región editada hasta reencontrar una frontera
+        # antigua después de la edición; de ahí en adelante el texto es igual
+        first = max(bisect_left(starts, offset) - 1, 0)
+        open_quote = self._open_quote
+        if quoted and open_quote is not None and open_quote < offset:
+            first = min(first, bisect_right(starts, open_quote) - 1)
+        head = []
+        quotes = []
+        synced = len(starts)
+        old_index = max(bisect_left(starts, old_end), first + 1)
+        for start in self.regions(code, starts[first] if starts else 0, quotes):
+            if start >= edit_end:
+                while old_index < len(starts) and starts[old_index] + delta < start:
+                    old_index += 1
+                if old_index < len(starts) and starts[old_index] + delta == start:
+                    synced = old_index
+                    break
+            head.append(start)
+        tail = [start + delta for start in starts[synced:]]
+        if open_quote is None or starts and open_quote >= starts[first]:
+            if quotes:
+                open_quote = quotes[0]
+            elif open_quote is not None and synced < len(starts) and open_quote >= starts[synced]:
+                open_quote += delta
+            else:
+                open_quote = None
+        self._open_quote = open_quote
+
+        new_starts = starts[:first] + head + tail
+        if first == 0:
+            # La primera región empieza siempre en 0 (con las líneas en
+            # blanco iniciales, o con lo que no es una sentencia)
+            if not new_starts or code[:new_starts[0]].strip():
+                new_starts.insert(0, 0)
+            elif new_starts[0] != 0:
+                if not head:
+                    synced += 1  # La primera región del final cambia de texto
+                    tail.pop(0)
+                new_starts[0] = 0
+        count = len(new_starts)
+        tail_first = count - len(tail)  # Índice nuevo de la primera región del final
+
+        new_lines = lines[:first]
+        position, line = (starts[first - 1], lines[first - 1]) if first else (0, 1)
+        for start in new_starts[first:tail_first]:
+            line += code.count('\n', position, start)
+            position = start
+            new_lines.append(line)
+        new_lines.extend(line + line_delta for line in lines[len(lines) - len(tail):])
+
+        self.text = code
+        self._starts = new_starts
+        self._lines = new_lines
+        new_starts = new_starts + [len(code)]
+
+        # Ventanas: se conservan las que acaban antes de la región editada y
+        # las del final que empiezan en una región reencontrada
+        old_windows = self._windows
+        position = 0
+        while position < len(old_windows) and old_windows[position][1] < first:
+            position += 1
+        windows = old_windows[:position]
+        shift = count - len(starts)
+        reusable = deque(item for item in old_windows[position:] if item[0] >= synced)
+        for low, _, window in old_windows[position:]:
+            if low < synced:
+                self._discard(window)
+        added = []
+
+        index = windows[-1][1] + 1 if windows else 0
+        while index < count:
+            while reusable and reusable[0][0] + shift < index:
+                self._discard(reusable.popleft()[2])
+            if reusable and reusable[0][0] + shift == index:
+                break
+            low = high = index
+            window = self._window(code[new_starts[low]:new_starts[high + 1]], new_lines[low])
+            merges = 0
+            while not window.success and merges < MAX_MERGES:
+                # Alternar: extender hacia delante y absorber la ventana anterior
+                if merges % 2 == 0 and high + 1 < count:
+                    high += 1
+                elif windows:
+                    low, _, previous = windows.pop()
+                    self._discard(previous)
+                elif high + 1 < count:
+                    high += 1
+                else:
+                    break
+                merges += 1
+                window = self._window(code[new_starts[low]:new_starts[high + 1]], new_lines[low])
+            while not window.success:
+                if window.incomplete and high + 1 < count:
+                    high += 1
+                elif windows and _ELSE.search(window.text):
+                    low, _, previous = windows.pop()
+                    self._discard(previous)
+                else:
+                    break
+                window = self._window(code[new_starts[low]:new_starts[high + 1]], new_lines[low])
+            window.live = True
+            windows.append((low, high, window))
+            added.append(window)
+            index = high + 1
+        else:
+            for _, _, window in reusable:
+                self._discard(window)
+            reusable.clear()
+
+        for low, high, window in reusable:
+            low += shift
+            high += shift
+            if line_delta:
+                if window.success:
+                    window.move(window.first_line + line_delta)
+                else:
+                    # Los mensajes de error llevan el número de línea: se
+                    # vuelve a analizar
+                    self._discard(window)
+                    window = self._window(code[new_starts[low]:new_starts[high + 1]], new_lines[low])
+                    window.live = True
+                    added.append(window)
+            windows.append((low, high, window))
+        self.reused += len(windows) - len(added)
+        self._windows = windows
+
+        self._forget()
+
+        self.result = self._splice(window for _, _, window in windows)
+        return self.result
+
+    def _window(self, text, first_line):
+        window = self._cache.get(text)
+        if window is not None:
+            if window.first_line == first_line and not window.live:
+                self.reused += 1
+                return window
+            if window.success:
+                self.reused += 1
+                if window.live:
+                    # Mismo texto en otro lugar del archivo: su propio árbol
+                    statements = copy.deepcopy(window.statements)
+                    shift_lines(statements, first_line - window.first_line)
+                    return _Window(text, first_line, True, [], statements)
+                window.move(first_line)
+                return window
+            # Con errores, los mensajes llevan el número de línea: se vuelve a
+            # analizar si cambió
+        success, errors, ast = self.parser.parse(text, first_line=first_line)
+        statements = ast.statements if isinstance(ast, Program) else []
+        window = _Window(text, first_line, success, list(errors), statements)
+        window.incomplete = len(errors) == 1 and self.parser.unexpected_eof
+        self.reparsed += 1
+        if text not in self._cache or not self._cache[text].live:
+            self._cache[text] = window
+            self._recent.append(text)
+        return window
+
+    def _discard(self, window):
+        window.live = False
+        self._recent.append(window.text)
+
+    def _forget(self):
+        # La caché guarda las ventanas del árbol actual y, como mucho,
+        # MAX_RECENT de las descartadas (para deshacer, o para los intentos de
+        # unión que se repiten en cada edición de una región con errores)
+        recent = self._recent
+        cache = self._cache
+        while len(recent) > MAX_RECENT:
+            text = recent.popleft()
+            window = cache.get(text)
+            if window is not None and not window.live:
+                del cache[text]
+
+    def _splice(self, windows):
+        statements = []
+        errors = []
+        success = True
+        body = statements
+        reopen = False
+        for window in windows:
+            if not window.success:
+                success = False
+                errors.extend(window.errors)
+            if not window.statements:
+                continue
+            if reopen:
+                # Descender por el último nodo compuesto de lo ya unido
+                while body and _open_body(body[-1]) is not None:
+                    node, inner = _reopen(body[-1])
+                    body[-1] = node
+                    body = inner
+            body.extend(window.statements)
+            reopen = window.open
+
+        if not statements:
+            return success, errors, None
+        first = statements[0]
+        return success, errors, Program(statements, line=first.line, column=first.column)
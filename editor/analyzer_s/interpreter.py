@@ -0,0 +1,149 @@
+# Intérprete que recorre el árbol sintáctico directamente, sin compilarlo.
+#
+# Es la referencia con la que se compara la VM (vm.py): mismas reglas del
+# lenguaje (literales, operadores y builtins de compiler.py), pero cada nodo
+# se despacha por su tipo en cada ejecución, las variables viven en
+# diccionarios y los literales se convierten cada vez que se evalúan.
+import sys
+
+from editor.analyzer_s.ast_nodes import FunctionCall, Value
+from editor.analyzer_s.compiler import (
+    BINARY_OPS, BUILTINS, ExecutionError, _NOT_CONSTANT, literal,
+)
+from editor.analyzer_s.vm import MAX_DEPTH
+
+# Marcos de Python que puede usar una llamada del programa (eval_FunctionCall,
+# exec_block, execute, exec_If, evaluate...) con los anidamientos habituales
+_FRAMES_PER_CALL = 32
+
+
+class _ReturnSignal(Exception):
+    def __init__(self, value):
+        self.value = value
+
+
+class _TreeFunction:
+    def __init__(self, node):
+        self.node = node
+
+    def __repr__(self):
+        return f'<función {self.node.name}>'
+
+
+class TreeInterpreter:
+    def __init__(self, out=None):
+        self.out = out
+
+    def run(self, program):
+        # Ejecuta un nodo Program; devuelve el diccionario de globales
+        self.globals = {}
+        self.locals = None
+        self.depth = 0
+        # Sin esto, el límite de recursión de Python salta antes que
+        # MAX_DEPTH y el error no es el mismo que el de la VM
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(limit + MAX_DEPTH * _FRAMES_PER_CALL)
+        try:
+            self.exec_block(program.statements)
+        except _ReturnSignal:
+            pass
+        finally:
+            sys.setrecursionlimit(limit)
+        return self.globals
+
+    def exec_block(self, statements):
+        for statement in statements:
+            self.execute(statement)
+
+    def execute(self, node):
+        try:
+            getattr(self, 'exec_' + type(node).__name__)(node)
+        except (ExecutionError, _ReturnSignal):
+            raise
+        except Exception as e:
+            message = str(e) if isinstance(e, RecursionError) else f'{type(e).__name__}: {e}'
+            raise ExecutionError(message, node.line) from e
+
+    def exec_Assign(self, node):
+        self.store(node.name, self.evaluate(node.value))
+
+    def exec_Print(self, node):
+        print(self.evaluate(node.value), file=self.out or sys.stdout)
+
+    def exec_FunctionCall(self, node):
+        self.eval_FunctionCall(node)
+
+    def exec_If(self, node):
+        if self.evaluate(node.condition):
+            self.exec_block(node.body)
+        elif node.orelse:
+            self.exec_block(node.orelse)
+
+    def exec_While(self, node):
+        while self.evaluate(node.condition):
+            self.exec_block(node.body)
+
+    def exec_For(self, node):
+        for value in self.evaluate(node.iterable):
+            self.store(node.target, value)
+            self.exec_block(node.body)
+
+    def exec_FunctionDef(self, node):
+        self.store(node.name, _TreeFunction(node))
+
+    def exec_Return(self, node):
+        raise _ReturnSignal(self.evaluate(node.value))
+
+    def store(self, name, value):
+        (self.globals if self.locals is None else self.locals)[name] = value
+
+    def lookup(self, name):
+        if self.locals is not None and name in self.locals:
+            return self.locals[name]
+        if name in self.globals:
+            return self.globals[name]
+        if name in BUILTINS:
+            return BUILTINS[name]
+        raise NameError(f"nombre '{name}' no definido")
+
+    def evaluate(self, node):
+        return getattr(self, 'eval_' + type(node).__name__)(node)
+
+    def eval_Value(self, node):
+        if isinstance(node.value, FunctionCall):
+            return self.eval_FunctionCall(node.value)
+        value = literal(node.value)
+        if value is _NOT_CONSTANT:
+            return self.lookup(node.value)
+        return value
+
+    def eval_BinaryOp(self, node):
+        return BINARY_OPS[node.op][1](self.evaluate(node.left), self.evaluate(node.right))
+
+    def eval_ListExpr(self, node):
+        return [self.evaluate(item) for item in node.items]
+
+    def eval_FunctionCall(self, node):
+        function = self.lookup(node.name)
+        args = [self.evaluate(arg) for arg in node.args]
+        if not isinstance(function, _TreeFunction):
+            if not callable(function):
+                raise TypeError(f'{function!r} no es una función')
+            return function(*args)
+        definition = function.node
+        if len(args) != len(definition.params):
+            raise TypeError(f"'{definition.name}' espera {len(definition.params)} argumentos "
+                            f"y recibió {len(args)}")
+        if self.depth >= MAX_DEPTH:
+            raise RecursionError('Demasiadas llamadas anidadas')
+        outer = self.locals
+        self.locals = dict(zip(definition.params, args))
+        self.depth += 1
+        try:
+            self.exec_block(definition.body)
+        except _ReturnSignal as signal:
+            return signal.value
+        finally:
+            self.locals = outer
+            self.depth -= 1
+        return None
@@ -0,0 +1,89 @@
+# Instrumentación opcional de Parser: reducciones y tiempo por regla p_*,
+# tokens por segundo, profundidad máxima de la pila del parser y reparto del
+# tiempo entre el lexer y el parser.
+#
+# Se activa con Parser.enable_profiling(), que envuelve las acciones de las
+# producciones de yacc; Parser.disable_profiling() restaura las originales, así
+# que con la instrumentación apagada el análisis no paga ningún coste extra.
+import json
+import time
+
+perf_counter = time.perf_counter
+
+
+class ParserProfile:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.rules = {}  # nombre de la regla p_* -> [reducciones, segundos]
+        self.parses = 0
+        self.tokens = 0
+        self.lexer_seconds = 0.0
+        self.total_seconds = 0.0
+        self.peak_stack_depth = 0
+
+    def wrap_rule(self, name, action):
+        entry = self.rules.setdefault(name, [0, 0.0])
+
+        def timed_action(p):
+            start = perf_counter()
+            action(p)
+            entry[1] += perf_counter() - start
+            entry[0] += 1
+            # yacc ya quitó de la pila los símbolos de la parte derecha
+            depth = len(p.stack) + len(p.slice) - 1
+            if depth > self.peak_stack_depth:
+                self.peak_stack_depth = depth
+
+        timed_action.original = action
+        return timed_action
+
+    def to_dict(self):
+        rule_seconds = sum(seconds for _, seconds in self.rules.values())
+        return {
+            'parses': self.parses,
+            'tokens': self.tokens,
+            'total_seconds': self.total_seconds,
+            'lexer_seconds': self.lexer_seconds,
+            # Tiempo del parser: todo lo que no es el lexer (incluye las acciones)
+            'parser_seconds': max(self.total_seconds - self.lexer_seconds, 0.0),
+            'rule_seconds': rule_seconds,
+            'tokens_per_second': self.tokens / self.total_seconds if self.total_seconds else 0.0,
+            'peak_stack_depth': self.peak_stack_depth,
+            'rules': {
+                name: {'reductions': reductions, 'seconds': seconds}
+                for name, (reductions, seconds) in sorted(
+                    self.rules.items(), key=lambda item: item[1][1], reverse=True)
+                if reductions
+            },
+        }
+
+    def dump_json(self, fp, **kwargs):
+        # fp: ruta o archivo abierto en modo texto
+        if isinstance(fp, str):
+            with open(fp, 'w', encoding='utf-8') as file:
+                json.dump(self.to_dict(), file, indent=2, **kwargs)
+        else:
+            json.dump(self.to_dict(), fp, indent=2, **kwargs)
+
+
+class ProfilingLexer:
+    # Mide el tiempo que yacc pasa esperando tokens y cuántos recibe
+    def __init__(self, lexer, profile):
+        self.lexer = lexer
+        self.profile = profile
+
+    def input(self, data):
+        self.lexer.input(data)
+
+    def token(self):
+        start = perf_counter()
+        tok = self.lexer.token()
+        self.profile.lexer_seconds += perf_counter() - start
+        if tok is not None:
+            self.profile.tokens += 1
+        return tok
+
+    def __getattr__(self, name):
+        return getattr(self.lexer, name)
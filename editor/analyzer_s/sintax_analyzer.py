@@ -1,5 +1,15 @@
+import copy
+import hashlib
+import os
+import threading
 import ply.yacc as yacc
 import ply.lex as lex
+from editor.cache import default_cache_dir
+from editor.analyzer_s.profiling import ParserProfile, ProfilingLexer, perf_counter
+from editor.analyzer_s.ast_nodes import (
+    Node, Program, Assign, If, While, For, FunctionDef, FunctionCall,
+    Print, Return, ListExpr, BinaryOp, Value, to_tuples,
+)
 
 class Lexer:
     reserved = {
@@ -22,7 +32,8 @@ class Lexer:
         'LESS', 'GREATER', 'LESS_EQUAL', 'GREATER_EQUAL', 
         'EQUALS', 'EQUALS_EQUALS', 'NOT_EQUALS',
         'LPAREN', 'RPAREN', 'LBRACE', 'RBRACE', 
-        'COLON', 'COMMA', 'INDENT', 'DEDENT','LBRACKET', 'RBRACKET'
+        'COLON', 'COMMA', 'INDENT', 'DEDENT','LBRACKET', 'RBRACKET',
+        'SYNC',  # Solo lo genera Parser al recuperarse de un error
     ] + list(reserved.values())
 
     # Operadores
@@ -91,21 +102,116 @@ class Parser:
         self.parser = None
         self.errors = []
         self.success = True
+        # El último análisis encontró el final del código con algo abierto
+        # (una sentencia compuesta sin cuerpo, una expresión a medias)
+        self.unexpected_eof = False
+        self.profile = None  # ParserProfile mientras la instrumentación está activa
+
+    @classmethod
+    def version(cls):
+        # Hash de las reglas del lexer y de la gramática, incluido el código de
+        # las acciones p_*, que determina la forma del AST
+        digest = hashlib.sha256()
+        for owner in (Lexer, cls):
+            for name in sorted(vars(owner)):
+                if not name.startswith(('t_', 'p_')):
+                    continue
+                rule = getattr(owner, name)
+                code = getattr(rule, '__code__', None)
+                digest.update(f'{name}:{getattr(rule, "__doc__", None) if code else rule}'.encode())
+                if code is not None:
+                    digest.update(code.co_code)
+                    digest.update(repr([c for c in code.co_consts if not hasattr(c, 'co_code')]).encode())
+        digest.update(repr(sorted(Lexer.reserved.items())).encode())
+        return digest.hexdigest()[:16]
+
+    @classmethod
+    def grammar_hash(cls):
+        # Hash de lo que determina las tablas LALR: tokens, precedencia y las
+        # reglas declaradas en los docstrings de los métodos p_*
+        digest = hashlib.sha256()
+        digest.update(' '.join(Lexer.tokens).encode())
+        digest.update(repr(getattr(cls, 'precedence', None)).encode())
+        for name in sorted(vars(cls)):
+            if name.startswith('p_') and name != 'p_error':
+                digest.update(f'{name}:{getattr(cls, name).__doc__}'.encode())
+        return digest.hexdigest()[:16]
+
+    @classmethod
+    def tables_path(cls):
+        return os.path.join(default_cache_dir(), f'parsetab-{cls.grammar_hash()}.pickle')
 
     def build(self, **kwargs):
-        self.parser = yacc.yacc(module=self, **kwargs, debug=False, write_tables=False)
+        # Las tablas LALR se guardan en disco con el hash de la gramática en el
+        # nombre: si las reglas p_* cambian, el archivo anterior deja de usarse
+        tables = self.tables_path()
+        if os.path.exists(tables):
+            try:
+                self.parser = yacc.yacc(module=self, **kwargs, debug=False, picklefile=tables)
+                return
+            except Exception:
+                pass  # Tablas dañadas: se regeneran
+
+        # Generar en un temporal y publicarlo de forma atómica, por si otro
+        # proceso está construyendo las mismas tablas
+        temp_tables = f'{tables}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(tables), exist_ok=True)
+        except OSError:
+            pass
+        self.parser = yacc.yacc(module=self, **kwargs, debug=False, picklefile=temp_tables)
+        try:
+            os.replace(temp_tables, tables)
+        except OSError:
+            try:
+                os.remove(temp_tables)
+            except OSError:
+                pass
+
+    def enable_profiling(self):
+        # Envuelve la acción de cada producción para medir reducciones y tiempo
+        # por regla; devuelve el ParserProfile donde se acumulan los datos
+        if not self.parser:
+            self.build()
+        if self.profile is None:
+            self.profile = ParserProfile()
+            for production in self.parser.productions:
+                if production.callable is not None:
+                    production.callable = self.profile.wrap_rule(production.func, production.callable)
+        return self.profile
+
+    def disable_profiling(self):
+        profile = self.profile
+        if profile is not None:
+            for production in self.parser.productions:
+                production.callable = getattr(production.callable, 'original', production.callable)
+            self.profile = None
+        return profile
+
+    def _position(self, p, index):
+        # (línea, columna) del token terminal p[index]
+        lexpos = p.lexpos(index)
+        return p.lineno(index), lexpos - self._source.rfind('\n', 0, lexpos) - 1
 
     def p_program(self, p):
         '''program : statement_list'''
-        p[0] = ('PROGRAM', p[1])
+        if p[1]:
+            first = p[1][0]
+            p[0] = Program(p[1], line=first.line, column=first.column)
+        else:
+            p[0] = Program(p[1], line=1, column=0)  # Solo sentencias con errores
 
     def p_statement_list(self, p):
         '''statement_list : statement
                           | statement_list statement'''
+        # La lista se extiende en sitio: copiarla en cada reducción sería O(N²).
+        # Las sentencias descartadas por un error (None) no se añaden
         if len(p) == 2:
-            p[0] = [p[1]]
+            p[0] = [] if p[1] is None else [p[1]]
         else:
-            p[0] = p[1] + [p[2]]
+            if p[2] is not None:
+                p[1].append(p[2])
+            p[0] = p[1]
 
     def p_statement(self, p):
         '''statement : assignment
@@ -118,37 +224,48 @@ class Parser:
                      | return_statement'''
         p[0] = p[1]
 
+    def p_statement_error(self, p):
+        '''statement : error SYNC'''
+        # Tokens descartados por p_error hasta el punto de sincronización; el
+        # error ya está anotado y el siguiente debe volver a informarse
+        p[0] = None
+        p.parser.errok()
+
     def p_assignment(self, p):
         '''assignment : IDENTIFIER EQUALS expression'''
-        p[0] = ('ASSIGN', p[1], p[3])
+        line, column = self._position(p, 1)
+        p[0] = Assign(p[1], p[3], line=line, column=column)
 
     def p_if_statement(self, p):
         '''if_statement : IF expression COLON statement_list
                         | IF expression COLON statement_list ELSE COLON statement_list'''
-        if len(p) == 5:
-            p[0] = ('IF', p[2], ('BLOCK', p[4]), None)
-        else:
-            p[0] = ('IF', p[2], ('BLOCK', p[4]), ('ELSE', ('BLOCK', p[7])))
+        line, column = self._position(p, 1)
+        orelse = p[7] if len(p) == 8 else None
+        p[0] = If(p[2], p[4], orelse, line=line, column=column)
     def p_expression_group(self, p):
         '''expression : LPAREN expression RPAREN'''
         p[0] = p[2]
 
     def p_while_statement(self, p):
         '''while_statement : WHILE expression COLON statement_list'''
-        p[0] = ('WHILE', p[2], ('BLOCK', p[4]))
+        line, column = self._position(p, 1)
+        p[0] = While(p[2], p[4], line=line, column=column)
 
     def p_expression_list(self, p):
         '''expression : LBRACE argument_list RBRACE
                     | LBRACKET argument_list RBRACKET'''
-        p[0] = ('LIST', p[2])
+        line, column = self._position(p, 1)
+        p[0] = ListExpr(p[2], line=line, column=column)
 
     def p_for_statement(self, p):
         '''for_statement : FOR IDENTIFIER IN expression COLON statement_list'''
-        p[0] = ('FOR', p[2], p[4], ('BLOCK', p[6]))
+        line, column = self._position(p, 1)
+        p[0] = For(p[2], p[4], p[6], line=line, column=column)
 
     def p_function_definition(self, p):
         '''function_definition : DEF IDENTIFIER LPAREN parameter_list RPAREN COLON statement_list'''
-        p[0] = ('FUNCTION_DEF', p[2], p[4], ('BLOCK', p[7]))
+        line, column = self._position(p, 1)
+        p[0] = FunctionDef(p[2], p[4], p[7], line=line, column=column)
     
     def p_parameter_list(self, p):
         '''parameter_list : 
@@ -159,11 +276,13 @@ class Parser:
         elif len(p) == 2:
             p[0] = [p[1]]
         else:
-            p[0] = p[1] + [p[3]]
+            p[1].append(p[3])
+            p[0] = p[1]
 
     def p_function_call(self, p):
         '''function_call : IDENTIFIER LPAREN argument_list RPAREN'''
-        p[0] = ('FUNCTION_CALL', p[1], p[3])
+        line, column = self._position(p, 1)
+        p[0] = FunctionCall(p[1], p[3], line=line, column=column)
 
     def p_argument_list(self, p):
         '''argument_list : 
@@ -174,15 +293,18 @@ class Parser:
         elif len(p) == 2:
             p[0] = [p[1]]
         else:
-            p[0] = p[1] + [p[3]]
+            p[1].append(p[3])
+            p[0] = p[1]
 
     def p_print_statement(self, p):
         '''print_statement : PRINT LPAREN expression RPAREN'''
-        p[0] = ('PRINT', p[3])
+        line, column = self._position(p, 1)
+        p[0] = Print(p[3], line=line, column=column)
 
     def p_return_statement(self, p):
         '''return_statement : RETURN expression'''
-        p[0] = ('RETURN', p[2])
+        line, column = self._position(p, 1)
+        p[0] = Return(p[2], line=line, column=column)
 
     def p_expression(self, p):
         '''expression : expression PLUS expression
@@ -202,36 +324,247 @@ class Parser:
                       | function_call'''
 
         if len(p) == 4:
-            p[0] = ('BINARY_OP', p[2], p[1], p[3])
+            left = p[1]
+            p[0] = BinaryOp(p[2], left, p[3], line=left.line, column=left.column)
+        elif isinstance(p[1], Node):
+            p[0] = Value(p[1], line=p[1].line, column=p[1].column)
         else:
-            p[0] = ('VALUE', p[1])
+            line, column = self._position(p, 1)
+            p[0] = Value(p[1], line=line, column=column)
 
     def p_error(self, p):
+        if p is not None and (p.type == 'SYNC' or p.lexpos == self._last_sync):
+            # El SYNC de fin de archivo, o el punto de sincronización que vuelve
+            # a fallar: el error ya está anotado
+            return self._recover(p) if p.type != 'SYNC' else None
         if p is None:
             error_msg = "Error sintáctico: fin inesperado de archivo"
+            self.unexpected_eof = True
         else:
             error_msg = f"Error sintáctico: token inesperado '{p.value}' en la línea {p.lineno}"
         
         self.errors.append(error_msg)
         self.success = False
         print(error_msg)
-
-    def parse(self, code):
+        return self._recover(p)
+
+    # Tokens que reanudan el análisis tras un error: estas palabras reservadas
+    # en cualquier lugar, y estos tipos si son los primeros de su línea
+    SYNC_KEYWORDS = frozenset(('DEF', 'IF', 'WHILE', 'FOR'))
+    SYNC_LINE_START = frozenset(('IDENTIFIER', 'PRINT', 'RETURN', 'ELSE'))
+
+    def _is_sync(self, tok, after_colon):
+        if tok.lexpos == self._last_sync:
+            return False  # Ya se reanudó aquí y volvió a fallar
+        return (after_colon or tok.type in self.SYNC_KEYWORDS
+                or tok.line_start and tok.type in self.SYNC_LINE_START)
+
+    def _recover(self, p):
+        # Recuperación en modo pánico: descartar tokens hasta un punto de
+        # sincronización, devolverlo al flujo y convertir el token erróneo en
+        # SYNC. yacc desapila entonces hasta la lista de sentencias más
+        # interna, reduce 'statement : error SYNC' y sigue con el árbol parcial
+        parser = self.parser
+        stream = self._stream
+        if p is None:
+            # Fin de archivo: un SYNC final permite cerrar lo que quede abierto
+            if self._eof_recovered or len(parser.statestack) <= 1:
+                return None
+            self._eof_recovered = True
+            sync = lex.LexToken()
+            sync.type = 'SYNC'
+            sync.value = ''
+            sync.lineno = self.lexer.lexer.lineno
+            sync.lexpos = len(self._source)
+            parser.errok()
+            return sync
+
+        tok = p
+        after_colon = False
+        while tok is not None and not self._is_sync(tok, after_colon):
+            after_colon = tok.type == 'COLON'
+            tok = stream.token()
+        if tok is not None:
+            self._last_sync = tok.lexpos
+            stream.push(copy.copy(tok) if tok is p else tok)
+            if len(parser.statestack) <= 1:
+                # Nada que desapilar: seguir desde el punto de sincronización
+                parser.errok()
+                return stream.token()
+        p.type = 'SYNC'
+        return None
+
+    def parse(self, code, lexer=None, first_line=1, monitor=None):
+        # lexer: adaptador opcional sobre el lexer del parser (por ejemplo un
+        # RecordingLexer) por el que yacc pedirá los tokens.
+        # first_line: número de línea del comienzo de code, para analizar un
+        # fragmento de un archivo con las líneas del archivo completo.
+        # monitor: función opcional que recibe periódicamente la posición del
+        # lexer en code; si lanza una excepción, el análisis se interrumpe y
+        # la excepción se propaga (por ejemplo, para cancelarlo)
         self.errors = []
         self.success = True
+        self.unexpected_eof = False
+        self._source = code
     
         if not self.parser:
             self.build()
 
+        # El lexer se reutiliza entre análisis: reiniciar el contador de líneas
+        self.lexer.lexer.lineno = first_line
+        monitored = None
+        if lexer is None:
+            lexer = self.lexer.lexer
+            if monitor is not None:
+                lexer = monitored = MonitoredLexer(lexer, monitor)
+
+        profile = self.profile
+        if profile is not None:
+            lexer = ProfilingLexer(lexer, profile)
+            start = perf_counter()
+
+        # p_error lee y devuelve tokens a través de este envoltorio
+        lexer = self._stream = PushbackLexer(lexer)
+        self._last_sync = None
+        self._eof_recovered = False
+
         try:
-            ast = self.parser.parse(code, lexer=self.lexer.lexer)
+            ast = self.parser.parse(code, lexer=lexer)
             return self.success, self.errors, ast
         
         except Exception as e:
+            if monitored is not None and monitored.aborted is e:
+                raise
             self.errors.append(f"Error durante el análisis: {str(e)}")
             return False, self.errors, None
 
+        finally:
+            if profile is not None:
+                profile.total_seconds += perf_counter() - start
+                profile.parses += 1
+
+    def parse_with_tokens(self, code, monitor=None):
+        # Una sola pasada del lexer alimenta a yacc y a la vez registra los
+        # tokens (tipo, valor, línea) y las estadísticas para el informe léxico
+        lexer = self.lexer.lexer
+        if monitor is not None:
+            lexer = MonitoredLexer(lexer, monitor)
+        recorder = RecordingLexer(lexer)
+        success, errors, ast = self.parse(code, lexer=recorder)
+        if monitor is not None and lexer.aborted is not None:
+            raise lexer.aborted
+        # Si el análisis se detuvo antes del final, registrar el resto
+        recorder.drain()
+        return success, errors, ast, recorder.tokens, recorder.stats
+
+class PushbackLexer:
+    # Permite devolver tokens al flujo durante la recuperación de errores y
+    # marca en cada token si es el primero de su línea
+    def __init__(self, lexer):
+        self.lexer = lexer
+        self.pending = []
+        self.last_line = None
+
+    def input(self, data):
+        self.pending = []
+        self.last_line = None
+        self.lexer.input(data)
+
+    def token(self):
+        if self.pending:
+            return self.pending.pop()
+        tok = self.lexer.token()
+        if tok is not None:
+            tok.line_start = tok.lineno != self.last_line
+            self.last_line = tok.lineno
+        return tok
+
+    def push(self, tok):
+        self.pending.append(tok)
+
+    def __getattr__(self, name):
+        return getattr(self.lexer, name)
+
+class MonitoredLexer:
+    # Llama a callback(lexpos) cada `interval` tokens. Si callback lanza una
+    # excepción, se guarda en aborted para que Parser.parse la distinga de un
+    # error del propio análisis
+    def __init__(self, lexer, callback, interval=1024):
+        self.lexer = lexer
+        self.callback = callback
+        self.interval = interval
+        self.countdown = interval
+        self.aborted = None
+
+    def input(self, data):
+        self.countdown = self.interval
+        self.aborted = None
+        self.lexer.input(data)
+
+    def token(self):
+        self.countdown -= 1
+        if not self.countdown:
+            self.countdown = self.interval
+            try:
+                self.callback(self.lexer.lexpos)
+            except Exception as e:
+                self.aborted = e
+                raise
+        return self.lexer.token()
+
+    def __getattr__(self, name):
+        return getattr(self.lexer, name)
+
+class RecordingLexer:
+    # Envuelve un lexer de PLY y guarda cada token que se le pide
+    def __init__(self, lexer):
+        self.lexer = lexer
+        self.tokens = []
+        self.lines = 0
+
+    def input(self, data):
+        self.tokens = []
+        self.lines = data.count('\n') + 1
+        self.lexer.input(data)
+
+    def token(self):
+        tok = self.lexer.token()
+        if tok is not None:
+            self.tokens.append((tok.type, tok.value, tok.lineno))
+        return tok
+
+    def drain(self):
+        while self.token() is not None:
+            pass
+
+    @property
+    def stats(self):
+        return {'total_tokens': len(self.tokens), 'lines': self.lines}
+
+    def __getattr__(self, name):
+        # lineno, lexpos, etc. se leen del lexer envuelto
+        return getattr(self.lexer, name)
+
+_shared_parser = None
+_shared_parser_lock = threading.Lock()
+
+
+def get_parser(**kwargs):
+    # Parser compartido por todo el proceso, construido la primera vez que se
+    # pide (kwargs se pasan a Parser.build en ese momento). Parser.parse no es
+    # reentrante: no llamarlo desde varios hilos a la vez.
+    global _shared_parser
+    if _shared_parser is None:
+        with _shared_parser_lock:
+            if _shared_parser is None:
+                parser = Parser()
+                parser.build(**kwargs)
+                _shared_parser = parser
+    return _shared_parser
+
 def print_ast(node, level=0):
+    if isinstance(node, Node):
+        node = to_tuples(node)
     indent = "  " * level
     if isinstance(node, tuple):
         print(f"{indent}{node[0]}")
@@ -0,0 +1,198 @@
+# Máquina virtual de pila que ejecuta el bytecode de compiler.py.
+#
+# Cada llamada a una función del programa ejecuta su CodeObject con un marco
+# propio: una lista con una casilla por variable local. Las globales están en
+# una única lista indexada igual que CompiledProgram.global_names.
+#
+# El bucle de despacho lee las instrucciones como pares (CodeObject.pairs) y
+# compara el código de operación con variables locales, en orden aproximado
+# de frecuencia.
+import sys
+
+from editor.analyzer_s.compiler import (
+    LOAD_CONST, LOAD_FAST, STORE_FAST, LOAD_GLOBAL, STORE_GLOBAL,
+    BINARY_ADD, BINARY_SUB, BINARY_MUL, BINARY_DIV,
+    COMPARE_LT, COMPARE_GT, COMPARE_LE, COMPARE_GE, COMPARE_EQ, COMPARE_NE,
+    JUMP, POP_JUMP_IF_FALSE, GET_ITER, FOR_ITER, CALL, PRINT, RETURN, POP,
+    BUILD_LIST, ExecutionError, Function, compile_program,
+)
+
+# Casilla de una variable todavía sin asignar
+_UNDEFINED = object()
+
+# Profundidad máxima de llamadas del programa ejecutado
+MAX_DEPTH = 200
+
+
+class VM:
+    def __init__(self, out=None, monitor=None, check_interval=1 << 14):
+        # out: archivo donde escribe print (por defecto, la salida estándar)
+        # monitor: función opcional, sin argumentos, que se llama cada
+        # check_interval saltos hacia atrás y llamadas; si lanza una excepción, la ejecución se
+        # interrumpe y la excepción se propaga (por ejemplo, para cancelarla)
+        self.out = out
+        self.monitor = monitor
+        self.check_interval = check_interval
+        self.aborted = None  # Excepción del monitor que detuvo la ejecución
+        self._depth = 0
+        self._budget = check_interval
+
+    def run(self, program):
+        # Ejecuta un CompiledProgram; devuelve el diccionario de globales
+        self.global_names = program.global_names
+        self.globals = [_UNDEFINED] * len(program.global_names)
+        self._depth = 0
+        self._budget = self.check_interval
+        self.execute(program.code, [])
+        return {name: value for name, value in zip(program.global_names, self.globals)
+                if value is not _UNDEFINED}
+
+    def call(self, function, args):
+        code = function.code
+        if len(args) != code.nparams:
+            raise TypeError(f"'{function.name}' espera {code.nparams} argumentos "
+                            f"y recibió {len(args)}")
+        if self._depth >= MAX_DEPTH:
+            raise RecursionError('Demasiadas llamadas anidadas')
+        frame = list(args)
+        frame.extend([_UNDEFINED] * (code.nlocals - code.nparams))
+        self._depth += 1
+        try:
+            return self.execute(code, frame)
+        finally:
+            self._depth -= 1
+
+    def execute(self, code, frame):
+        instructions = code.pairs()
+        constants = code.constants
+        g = self.globals
+        out = self.out or sys.stdout
+        undefined = _UNDEFINED
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+        # Códigos de operación como variables locales del bucle
+        load_fast, store_fast, load_const = LOAD_FAST, STORE_FAST, LOAD_CONST
+        load_global, store_global = LOAD_GLOBAL, STORE_GLOBAL
+        add, sub, mul, div = BINARY_ADD, BINARY_SUB, BINARY_MUL, BINARY_DIV
+        lt, gt, le, ge, eq, ne = COMPARE_LT, COMPARE_GT, COMPARE_LE, COMPARE_GE, COMPARE_EQ, COMPARE_NE
+        jump, jump_if_false, for_iter = JUMP, POP_JUMP_IF_FALSE, FOR_ITER
+        try:
+            while True:
+                op, arg = instructions[pc]
+                pc += 1
+                if op == load_fast:
+                    value = frame[arg]
+                    if value is undefined:
+                        raise NameError(f"variable local '{code.local_names[arg]}' sin asignar")
+                    push(value)
+                elif op == load_global:
+                    value = g[arg]
+                    if value is undefined:
+                        raise NameError(f"nombre '{self.global_names[arg]}' no definido")
+                    push(value)
+                elif op == load_const:
+                    push(constants[arg])
+                elif op == store_fast:
+                    frame[arg] = pop()
+                elif op == store_global:
+                    g[arg] = pop()
+                elif op == add:
+                    right = constants[arg - 1] if arg else pop()
+                    stack[-1] = stack[-1] + right
+                elif op == sub:
+                    right = constants[arg - 1] if arg else pop()
+                    stack[-1] = stack[-1] - right
+                elif op == mul:
+                    right = constants[arg - 1] if arg else pop()
+                    stack[-1] = stack[-1] * right
+                elif op == lt:
+                    right = constants[arg - 1] if arg else pop()
+                    stack[-1] = stack[-1] < right
+                elif op == jump_if_false:
+                    if not pop():
+                        pc = arg
+                elif op == jump:
+                    if arg < pc:
+                        self._tick()
+                    pc = arg
+                elif op == for_iter:
+                    try:
+                        push(next(stack[-1]))
+                    except StopIteration:
+                        pop()
+                        pc = arg
+                elif op == gt:
+                    right = constants[arg - 1] if arg else pop()
+                    stack[-1] = stack[-1] > right
+                elif op == le:
+                    right = constants[arg - 1] if arg else pop()
+                    stack[-1] = stack[-1] <= right
+                elif op == ge:
+                    right = constants[arg - 1] if arg else pop()
+                    stack[-1] = stack[-1] >= right
+                elif op == eq:
+                    right = constants[arg - 1] if arg else pop()
+                    stack[-1] = stack[-1] == right
+                elif op == ne:
+                    right = constants[arg - 1] if arg else pop()
+                    stack[-1] = stack[-1] != right
+                elif op == div:
+                    right = constants[arg - 1] if arg else pop()
+                    stack[-1] = stack[-1] / right
+                elif op == CALL:
+                    if arg:
+                        args = stack[-arg:]
+                        del stack[-arg:]
+                    else:
+                        args = ()
+                    function = pop()
+                    self._tick()
+                    if isinstance(function, Function):
+                        push(self.call(function, args))
+                    elif callable(function):
+                        push(function(*args))
+                    else:
+                        raise TypeError(f'{function!r} no es una función')
+                elif op == RETURN:
+                    return pop()
+                elif op == POP:
+                    pop()
+                elif op == PRINT:
+                    print(pop(), file=out)
+                elif op == GET_ITER:
+                    stack[-1] = iter(stack[-1])
+                elif op == BUILD_LIST:
+                    if arg:
+                        items = stack[-arg:]
+                        del stack[-arg:]
+                    else:
+                        items = []
+                    push(items)
+                else:
+                    raise SystemError(f'Código de operación desconocido: {op}')
+        except ExecutionError:
+            raise
+        except Exception as e:
+            if e is self.aborted:
+                raise
+            message = str(e) if isinstance(e, RecursionError) else f'{type(e).__name__}: {e}'
+            raise ExecutionError(message, code.lines[pc - 1]) from e
+
+    def _tick(self):
+        self._budget -= 1
+        if not self._budget:
+            self._budget = self.check_interval
+            if self.monitor is not None:
+                try:
+                    self.monitor()
+                except Exception as e:
+                    # Se propaga tal cual a través de todos los marcos
+                    self.aborted = e
+                    raise
+
+
+def run_program(program, out=None, monitor=None):
+    # Compila y ejecuta un árbol sintáctico (nodo Program)
+    return VM(out, monitor).run(compile_program(program))
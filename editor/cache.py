@@ -0,0 +1,177 @@
+# Caché en disco de resultados de análisis, direccionada por contenido.
+#
+# La clave combina el hash del contenido del archivo, el tipo de análisis y la
+# versión del analizador o de la gramática, así que un cambio en cualquiera de
+# ellos invalida la entrada sin tener que borrar nada. Cada entrada es un
+# archivo pickle; se escribe en un temporal y se publica con os.replace, de modo
+# que varios procesos pueden leer y escribir a la vez sin ver archivos a medias.
+# El tamaño total está acotado: al superarlo se eliminan las entradas usadas
+# hace más tiempo (la fecha de modificación se actualiza en cada acierto).
+# Recorrer el directorio cuesta tanto como entradas tenga, así que no se hace
+# en cada escritura: cada AnalysisCache lleva la cuenta del tamaño desde el
+# último recuento y solo vuelve a contar al superar el límite o tras escribir
+# max_bytes / RECOUNT_DIVISOR bytes (lo que hayan escrito otros procesos
+# mientras tanto se ve en el recuento siguiente).
+import hashlib
+import os
+import pickle
+import tempfile
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+RECOUNT_DIVISOR = 8
+
+# Al superar el límite se eliminan entradas hasta quedar en esta fracción de
+# max_bytes, para no tener que volver a eliminar en la escritura siguiente
+EVICT_TO = 0.75
+
+_MISSING = object()
+_default_cache = None
+
+
+def default_cache_dir():
+    return os.environ.get('EDITOR_TEXTO_CACHE') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'editor_texto')
+
+
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = AnalysisCache()
+    return _default_cache
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def data_digest(data):
+    if isinstance(data, str):
+        data = data.encode('utf-8', 'surrogatepass')
+    return hashlib.sha256(data).hexdigest()
+
+
+class AnalysisCache:
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._total = None  # Tamaño estimado del directorio (None: sin contar)
+        self._written = 0  # Bytes escritos desde el último recuento
+
+    def key(self, digest, kind, version):
+        return hashlib.sha256(f'{kind}:{version}:{digest}'.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.pickle')
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                value = pickle.load(file)
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        except Exception:
+            # Entrada corrupta o de una versión incompatible: se descarta
+            self._remove(path)
+            self.misses += 1
+            return default
+        try:
+            os.utime(path)  # Marca de uso reciente para el LRU
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+                    size = file.tell()
+                os.replace(temp_path, path)
+            except BaseException:
+                self._remove(temp_path)
+                raise
+        except OSError:
+            # Una caché que no se puede escribir no debe impedir el análisis
+            return
+        if self._total is None:
+            self.evict()
+            return
+        # Si la entrada ya existía se cuenta dos veces: la estimación solo
+        # puede quedarse por encima y adelantar el recuento
+        self._total += size
+        self._written += size
+        if self._total > self.max_bytes or self._written > self.max_bytes // RECOUNT_DIVISOR:
+            self.evict()
+
+    def get_or_compute(self, digest, kind, version, compute):
+        key = self.key(digest, kind, version)
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def entries(self):
+        # (fecha de último uso, tamaño, ruta) de cada entrada publicada
+        result = []
+        try:
+            buckets = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return result
+        for bucket in buckets:
+            if not bucket.is_dir():
+                continue
+            try:
+                for entry in os.scandir(bucket.path):
+                    if entry.name.endswith('.pickle'):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue  # Otro proceso la eliminó
+                        result.append((stat.st_mtime, stat.st_size, entry.path))
+            except FileNotFoundError:
+                continue
+        return result
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        # Recuenta el directorio y, si supera max_bytes, elimina las entradas
+        # menos usadas hasta quedar en EVICT_TO de max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            target = int(self.max_bytes * EVICT_TO)
+            for _, size, path in sorted(entries):
+                self._remove(path)
+                total -= size
+                if total <= target:
+                    break
+        self._total = total
+        self._written = 0
+
+    def clear(self):
+        for _, _, path in self.entries():
+            self._remove(path)
+        self._total = 0
+        self._written = 0
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
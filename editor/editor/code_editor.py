@@ -1,16 +1,34 @@
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import QPlainTextEdit, QWidget,QTextEdit 
-from PyQt6.QtGui import QPainter, QColor, QTextFormat , QPalette,QFont
-from .syntax_highlighter import PythonHighlighter
+from PyQt6.QtGui import QPainter, QColor, QTextFormat , QPalette,QFont, QTextCursor
+from .syntax_highlighter import HighlightScheduler
+from .languages import PYTHON
 from .line_numbers import LineNumberArea
+from editor.analyzer.lexical_analyzer import LexicalAnalyzer
+from editor.fileio import TextEncoding
 
 class CodeEditor(QPlainTextEdit):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, language=PYTHON):
+        # language: lenguaje de languages.py que se resalta, o None para
+        # texto plano (sin resaltador)
         super().__init__(parent)
         self.line_number_area = LineNumberArea(self)
+        self.analysis = None  # Análisis léxico incremental (opcional)
+        # Líneas anteriores al documento (visor de archivos grandes, que solo
+        # muestra una ventana del archivo); se suman a los números de línea
+        self.line_offset = 0
+        # Codificación, BOM y salto de línea con que se guarda el texto (los
+        # del archivo abierto)
+        self.file_encoding = TextEncoding()
+        # Conectado antes que el resaltador: el análisis se actualiza antes de
+        # que se vuelvan a resaltar los bloques que cambian
+        self.document().contentsChange.connect(self.on_contents_change)
         
         # Agregar el resaltador de sintaxis aquí
-        self.highlighter = PythonHighlighter(self.document())
+        self.language = None
+        self.highlighter = None
+        self.highlight_scheduler = None
+        self.set_language(language)
 
         # Conectar los eventos de actualización
         self.blockCountChanged.connect(self.update_line_number_area_width)
@@ -25,6 +43,107 @@ class CodeEditor(QPlainTextEdit):
 
 
 
+    def set_language(self, language):
+        # Cambia el resaltador por el del lenguaje (None: ninguno). Las reglas
+        # del lenguaje se cargan la primera vez y las comparten las pestañas
+        if self.highlighter is not None:
+            self.highlight_scheduler.timer.stop()
+            self.updateRequest.disconnect(self.highlight_scheduler.update_visible)
+            self.highlighter.setDocument(None)
+            self.highlight_scheduler.deleteLater()
+            self.highlighter.deleteLater()
+            self.highlighter = self.highlight_scheduler = None
+        self.language = language
+        if language is not None:
+            self.highlighter = language.create_highlighter(self.document())
+            self.highlight_scheduler = HighlightScheduler(self, self.highlighter)
+
+    def go_to_line(self, number):
+        # Lleva el cursor al comienzo de la línea number (desde 1)
+        block = self.document().findBlockByNumber(max(0, number - 1))
+        if not block.isValid():
+            block = self.document().lastBlock()
+        self.setTextCursor(QTextCursor(block))
+        self.centerCursor()
+        self.setFocus()
+
+    def load_text(self, text):
+        # Carga el texto sin resaltarlo entero de forma síncrona: primero los
+        # bloques visibles y el resto en segundo plano (HighlightScheduler)
+        if self.highlight_scheduler is None:
+            self.setPlainText(text)
+        else:
+            self.highlight_scheduler.load(text)
+
+    def begin_stream(self):
+        # Carga progresiva: vacía el editor, que queda de solo lectura y sin
+        # deshacer hasta end_stream(); el texto llega con append_text
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.clear()
+        if self.highlight_scheduler is not None:
+            self.highlight_scheduler.begin()
+
+    def append_text(self, text):
+        # Añade un trozo al final sin mover la vista ni el cursor del usuario
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text)
+
+    def end_stream(self):
+        self.setUndoRedoEnabled(True)
+        self.setReadOnly(False)
+        self.document().setModified(False)
+        if self.highlight_scheduler is not None:
+            self.highlight_scheduler.finish()
+
+    def enable_incremental_analysis(self, analyzer=None, highlight=False):
+        # Mantiene un flujo de tokens siempre al día: cada cambio del documento
+        # se re-analiza solo en las líneas afectadas. Con highlight, el
+        # resaltado usa esos mismos tokens en lugar de sus propias reglas.
+        # Conviene llamarlo con el texto ya cargado: durante una carga
+        # progresiva cada trozo añadido sería una edición más
+        self.analysis = (analyzer or LexicalAnalyzer()).incremental(self.toPlainText())
+        if highlight and self.highlighter is not None:
+            self.highlighter.analysis = self.analysis
+            # Con el resaltado diferido en marcha, la frontera ya volverá a
+            # resaltar todos los bloques en orden, con el análisis
+            if not self.highlight_scheduler.running():
+                self.highlighter.rehighlight()
+        return self.analysis
+
+    def on_contents_change(self, position, chars_removed, chars_added):
+        # Qt da las posiciones en unidades UTF-16 y el análisis cuenta puntos
+        # de código (no coinciden si hay caracteres fuera del BMP, como los
+        # emoji). Por eso no se usan los desplazamientos de Qt: las líneas
+        # afectadas se sustituyen enteras por el texto de sus bloques
+        if self.analysis is None:
+            return
+        document = self.document()
+        first = document.findBlock(position)
+        last = document.findBlock(min(position + chars_added, document.characterCount() - 1))
+        # Las líneas que había entre las dos son las de ahora más las que se
+        # borraron
+        lines = self.analysis.lines
+        old_last = last.blockNumber() + len(lines) - document.blockCount()
+        number = first.blockNumber()
+        if not number <= old_last < len(lines):
+            self.analysis.reset(self.toPlainText())
+            return
+        texts = []
+        block = first
+        while True:
+            texts.append(block.text())
+            if block == last:
+                break
+            block = block.next()
+        starts = self.analysis.line_starts()
+        # toPlainText (y por tanto reset) cambia los espacios duros por espacios
+        inserted = '\n'.join(texts).replace('\u00a0', ' ')
+        self.analysis.apply_edit(starts[number],
+                                 starts[old_last] + len(lines[old_last]) - starts[number],
+                                 inserted)
+
     def set_editor_font(self):
         # Cambiar la fuente a una más moderna
         font = QFont("Cascadia Code", 11)  # Puedes cambiar "Fira Code" por cualquier otra fuente
@@ -92,7 +211,7 @@ class CodeEditor(QPlainTextEdit):
 
         while block.isValid() and top <= event.rect().bottom():
             if block.isVisible() and bottom >= event.rect().top():
-                number = str(block_number + 1)
+                number = str(block_number + self.line_offset + 1)
                 painter.setPen(Qt.GlobalColor.black)
                 painter.drawText(0, int(top), self.line_number_area.width(), self.fontMetrics().height(),
                                  Qt.AlignmentFlag.AlignRight, number)
@@ -0,0 +1,203 @@
+# Reglas de resaltado de Python en un único patrón compilado.
+#
+# Cada bloque (línea) se recorre una sola vez de izquierda a derecha con una
+# alternativa de grupos nombrados. En cada posición gana la primera
+# alternativa que coincide, y el recorrido continúa después de ella, así que
+# lo que está dentro de un comentario o de una cadena nunca se vuelve a
+# colorear como palabra clave o número.
+#
+# El escáner no depende de Qt: scan(text, state) devuelve los tramos
+# (inicio, longitud, formato) y el estado al final del bloque, y
+# PythonHighlighter los aplica con setFormat. Los formatos son índices en
+# FORMATS.
+#
+# Estados de bloque: 0 fuera de cadena; MULTILINE_SINGLE dentro de una cadena
+# ''' sin cerrar y MULTILINE_DOUBLE dentro de una """ sin cerrar.
+#
+# token_spans convierte los tokens de una línea de LexicalAnalyzer (un
+# TokenBuffer) en tramos con los mismos formatos, para resaltar con el
+# análisis léxico en lugar de con estas reglas.
+#
+# Las posiciones de los tramos son índices de Python (puntos de código); Qt
+# cuenta en unidades UTF-16, en las que un carácter fuera del BMP (un emoji)
+# ocupa dos. utf16_spans convierte los tramos de una línea que los tenga.
+#
+# ScanCache guarda los resultados de scan por (texto, estado de entrada) con
+# un límite de entradas (LRU): deshacer/rehacer, pegar código repetido o
+# volver a mostrar un bloque no vuelven a recorrer el texto.
+import re
+from bisect import bisect_left
+from collections import OrderedDict
+
+from editor.analyzer.lexical_analyzer import TokenType, word_trie
+
+FORMATS = ('keyword', 'string', 'number', 'special', 'comment', 'multiline')
+KEYWORD, STRING, NUMBER, SPECIAL, COMMENT, MULTILINE = range(len(FORMATS))
+
+MULTILINE_SINGLE = 1
+MULTILINE_DOUBLE = 2
+
+KEYWORDS = (
+    'class', 'def', 'return', 'if', 'else', 'elif', 'while', 'for', 'in',
+    'import', 'from', 'as', 'with', 'try', 'except', 'finally', 'pass',
+    'continue', 'break', 'raise', 'True', 'False', 'None',
+)
+
+_DELIMITERS = {"'''": MULTILINE_SINGLE, '"""': MULTILINE_DOUBLE}
+_CLOSERS = {state: delimiter for delimiter, state in _DELIMITERS.items()}
+
+_SPECIALS = r'+\-*/=()\[\]{}:;'
+
+DEFAULT_CACHE_ENTRIES = 4096
+
+# Formato de cada tipo de token de LexicalAnalyzer (por TokenType.value); los
+# identificadores y los tokens inválidos no llevan formato
+_TOKEN_FORMATS = [None] * (max(token_type.value for token_type in TokenType) + 1)
+_TOKEN_FORMATS[TokenType.KEYWORD.value] = KEYWORD
+_TOKEN_FORMATS[TokenType.STRING.value] = STRING
+_TOKEN_FORMATS[TokenType.NUMBER.value] = NUMBER
+_TOKEN_FORMATS[TokenType.OPERATOR.value] = SPECIAL
+_TOKEN_FORMATS[TokenType.DELIMITER.value] = SPECIAL
+_TOKEN_FORMATS[TokenType.COMMENT.value] = COMMENT
+
+_pattern = None
+_group_formats = None
+
+
+def _compiled():
+    # El patrón se compila la primera vez que se resalta algo
+    global _pattern, _group_formats
+    if _pattern is None:
+        keywords = word_trie(KEYWORDS)
+        # Lo que nunca lleva formato se consume antes de cada tramo, dentro
+        # del mismo match: nombres que no son palabras clave, palabras que
+        # empiezan por dígito (12ab) y los caracteres que no pueden abrir un
+        # tramo. Así el motor no prueba todas las alternativas en cada
+        # carácter y Python solo ve los tramos con formato.
+        skip = (
+            rf'(?:(?!(?:{keywords})\b)[^\W\d]\w*'
+            r'|\d+[^\W\d]\w*'
+            rf'|[^\w\'"#{_SPECIALS}])*+'
+        )
+        alternatives = [
+            # Precedencia: cadenas multilínea, comentarios y cadenas primero
+            r'(?P<multiline>\'\'\'|""")',
+            r'(?P<comment>#.*)',
+            r'(?P<string>"[^"]*"|\'[^\']*\')',
+            rf'(?P<keyword>(?:{keywords})\b)',
+            r'(?P<number>\d+\b)',
+            # Los caracteres especiales seguidos forman un solo tramo
+            rf'(?P<special>[{_SPECIALS}]+)',
+            # Comilla sin cerrar: no lleva formato
+            r'(?P<unterminated>["\'])',
+            # Final del bloque: evita reintentar el patrón en cada posición
+            # del resto cuando ya no quedan tramos
+            r'(?P<end>\Z)',
+        ]
+        pattern = re.compile(skip + '(?:' + '|'.join(alternatives) + ')')
+        # Formato de cada grupo; None para los que no generan tramo (y para
+        # multiline, que scan trata aparte)
+        _group_formats = [None] * (pattern.groups + 1)
+        for name in ('keyword', 'string', 'number', 'special', 'comment'):
+            _group_formats[pattern.groupindex[name]] = FORMATS.index(name)
+        _pattern = pattern
+    return _pattern
+
+
+def scan(text, state=0):
+    # Tramos (inicio, longitud, formato) del bloque y estado al terminarlo
+    pattern = _compiled()
+    group_formats = _group_formats
+    spans = []
+    append = spans.append
+    position = 0
+    if state:
+        end = text.find(_CLOSERS[state])
+        if end == -1:
+            return [(0, len(text), MULTILINE)] if text else [], state
+        position = end + 3
+        append((0, position, MULTILINE))
+    multiline = pattern.groupindex['multiline']
+    while True:
+        for match in pattern.finditer(text, position):
+            index = match.lastindex
+            format_index = group_formats[index]
+            if format_index is not None:
+                start, end = match.span(index)
+                append((start, end - start, format_index))
+            elif index == multiline:
+                break
+        else:
+            return spans, 0
+        # Cadena multilínea: se busca su cierre y se sigue escaneando detrás
+        start = match.start(index)
+        delimiter = match.group(index)
+        end = text.find(delimiter, start + 3)
+        if end == -1:
+            append((start, len(text) - start, MULTILINE))
+            return spans, _DELIMITERS[delimiter]
+        position = end + 3
+        append((start, position - start, MULTILINE))
+
+
+def token_spans(buffer):
+    # Tramos (inicio, longitud, formato) de los tokens de una línea
+    token_formats = _TOKEN_FORMATS
+    return [
+        (start, end - start, token_formats[type_code])
+        for type_code, start, end in zip(buffer.types, buffer.starts, buffer.ends)
+        if token_formats[type_code] is not None
+    ]
+
+
+_ASTRAL = re.compile('[\U00010000-\U0010ffff]')
+
+
+def utf16_spans(text, spans):
+    # Tramos de text con posiciones en unidades UTF-16. Sin caracteres fuera
+    # del BMP (casi siempre) se devuelven los mismos
+    if text.isascii():
+        return spans
+    astral = [match.start() for match in _ASTRAL.finditer(text)]
+    if not astral:
+        return spans
+    result = []
+    for start, length, format_index in spans:
+        before = bisect_left(astral, start)
+        inside = bisect_left(astral, start + length) - before
+        result.append((start + before, length + inside, format_index))
+    return result
+
+
+class ScanCache:
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def scan(self, text, state=0):
+        # Igual que scan(), pero los tramos se devuelven como tupla compartida:
+        # no se deben modificar. La clave es el propio texto (el diccionario
+        # usa su hash y compara el texto, así que no hay colisiones)
+        key = (text, state)
+        entries = self._entries
+        result = entries.get(key)
+        if result is not None:
+            entries.move_to_end(key)
+            self.hits += 1
+            return result
+        self.misses += 1
+        spans, end_state = scan(text, state)
+        result = entries[key] = (tuple(spans), end_state)
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
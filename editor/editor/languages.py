@@ -0,0 +1,83 @@
+# Registro de lenguajes para el resaltado de sintaxis.
+#
+# Cada lenguaje se elige por la extensión del archivo o, si la extensión no
+# es de ningún lenguaje registrado, mirando el comienzo del contenido. Sus
+# reglas (módulo del resaltador, patrón compilado y formatos) se cargan la
+# primera vez que una pestaña lo necesita y después se comparten entre
+# todas. El texto plano no es un lenguaje: language_for devuelve None y el
+# editor no lleva resaltador.
+import os
+import re
+
+# Caracteres del comienzo del archivo que se miran para reconocer el lenguaje
+SNIFF_CHARS = 4096
+
+
+class Language:
+    def __init__(self, name, extensions, loader, sniff=None):
+        # loader: función sin argumentos que carga las reglas y devuelve una
+        # fábrica de resaltadores (documento -> QSyntaxHighlighter)
+        # sniff: función opcional (comienzo del texto) -> bool
+        self.name = name
+        self.extensions = frozenset(extensions)
+        self.loader = loader
+        self.sniff = sniff
+        self._factory = None
+
+    def loaded(self):
+        return self._factory is not None
+
+    def create_highlighter(self, document):
+        if self._factory is None:
+            self._factory = self.loader()
+        return self._factory(document)
+
+    def __repr__(self):
+        return f'<Language {self.name}>'
+
+
+_registry = []
+
+
+def register(language):
+    _registry.append(language)
+    return language
+
+
+def languages():
+    return list(_registry)
+
+
+def language_for(path, head=''):
+    # Lenguaje de un archivo, o None si es texto plano. head: comienzo del
+    # contenido, para los archivos cuya extensión no es de ningún lenguaje
+    extension = os.path.splitext(path)[1].lower()
+    for language in _registry:
+        if extension in language.extensions:
+            return language
+    head = head[:SNIFF_CHARS]
+    for language in _registry:
+        if language.sniff is not None and language.sniff(head):
+            return language
+    return None
+
+
+def _load_python():
+    # Se importa aquí: ni Qt ni las reglas de Python se cargan hasta que se
+    # abre el primer archivo de Python
+    from .syntax_highlighter import PythonHighlighter, python_formats
+    formats = python_formats()
+    return lambda document: PythonHighlighter(document, formats=formats)
+
+
+# Primera línea con shebang de Python o que empieza como un módulo de Python
+_PYTHON_HEAD = re.compile(
+    r'\A\ufeff?(?:#![^\n]*\bpython|\s*(?:from\s+[\w.]+\s+import\b|import\s+\w|'
+    r'def\s+\w+\s*\(|class\s+\w+\s*[:(]))')
+
+
+def _sniff_python(head):
+    return _PYTHON_HEAD.match(head) is not None
+
+
+PYTHON = register(Language('python', ('.py', '.pyw', '.pyi'), _load_python, _sniff_python))
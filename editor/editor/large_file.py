@@ -0,0 +1,226 @@
+# Visor de archivos grandes, de solo lectura.
+#
+# El archivo no se lee entero: se proyecta en memoria con mmap y se construye
+# un índice con el desplazamiento en bytes del comienzo de cada línea, en una
+# sola pasada (con NumPy si está instalado, por bloques para no duplicar el
+# archivo en memoria). El editor solo contiene una ventana de window_lines
+# líneas alrededor de lo que se ve; al desplazarse cerca de sus bordes se
+# decodifica la ventana siguiente a partir del índice. Ir a una línea es un
+# acceso al índice, sin recorrer nada.
+#
+# La codificación se detecta con el comienzo del archivo, como al abrir
+# cualquier otro (editor.fileio). En UTF-16 y UTF-32 el salto de línea ocupa
+# varios bytes y solo cuenta en posiciones alineadas con su tamaño.
+#
+# La barra de desplazamiento del visor representa el archivo entero (una
+# posición por línea); la del editor, oculta, solo la ventana.
+import mmap
+from array import array
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtWidgets import QHBoxLayout, QPlainTextEdit, QScrollBar, QWidget
+
+from editor.fileio import SAMPLE_SIZE, detect_encoding
+
+from .code_editor import CodeEditor
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+WINDOW_LINES = 4000
+
+# Cuando lo visible queda a menos de estas líneas del borde de la ventana,
+# la ventana se vuelve a centrar
+WINDOW_MARGIN = 500
+
+INDEX_CHUNK_SIZE = 1 << 26
+
+
+def line_starts(data, chunk_size=INDEX_CHUNK_SIZE, newline=b'\n', start=0):
+    # Desplazamiento del comienzo de cada línea de data (bytes, mmap...).
+    # newline: salto de línea ya codificado (b'\n\x00' en UTF-16-LE...), que
+    # solo se busca en posiciones start + k * len(newline); start: comienzo
+    # del texto (tras la BOM). Si data termina en un salto de línea, la
+    # última línea está vacía, como en el editor
+    size = len(data)
+    width = len(newline)
+    if numpy is not None:
+        # Cada unidad se lee como un entero; el orden de bytes da igual si
+        # el salto de línea se convierte con el mismo
+        dtype = numpy.dtype(f'<u{width}')
+        value = int.from_bytes(newline, 'little')
+        chunk_size -= chunk_size % width
+        parts = [numpy.array([start], dtype=numpy.int64)]
+        for offset in range(start, size, chunk_size):
+            count = min(chunk_size, size - offset) // width
+            chunk = numpy.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            parts.append(numpy.flatnonzero(chunk == value) * width + (offset + width))
+            del chunk  # Libera la vista sobre data (el mmap no se puede cerrar con vistas)
+        return numpy.concatenate(parts)
+    starts = array('q', [start])
+    append = starts.append
+    find = data.find
+    position = find(newline, start)
+    while position != -1:
+        if (position - start) % width:
+            # Bytes de dos caracteres distintos: no es un salto de línea
+            position = find(newline, position + 1)
+            continue
+        append(position + width)
+        position = find(newline, position + width)
+    return starts
+
+
+class LineIndex:
+    def __init__(self, data, encoding, chunk_size=INDEX_CHUNK_SIZE):
+        # encoding: TextEncoding del archivo (editor.fileio.detect_encoding)
+        self.data = data
+        self.size = len(data)
+        self.encoding = encoding
+        self.newline = '\n'.encode(encoding.encoding)
+        self.starts = line_starts(data, chunk_size, self.newline, len(encoding.bom))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def span(self, first, last):
+        # Bytes de las líneas [first, last), sin el salto que cierra la última
+        start = int(self.starts[first])
+        if last < len(self.starts):
+            end = int(self.starts[last]) - len(self.newline)
+        else:
+            end = self.size
+        return start, end
+
+    def text(self, first, last):
+        # La detección usa una muestra: si más adelante hay bytes que no son
+        # de la codificación, se muestran como caracteres de reemplazo
+        start, end = self.span(first, last)
+        text = self.data[start:end].decode(self.encoding.encoding, errors='replace')
+        return text.replace('\r\n', '\n')
+
+
+class _WindowEditor(CodeEditor):
+    # CodeEditor con los números de línea del archivo, no de la ventana: el
+    # ancho del margen es el de la última línea del archivo
+    total_lines = 1
+
+    def __init__(self, parent, total_lines):
+        super().__init__(parent, language=None)
+        self.total_lines = total_lines
+        self.update_line_number_area_width()
+
+    def line_number_area_width(self):
+        digits = len(str(max(1, self.total_lines)))
+        return 3 + self.fontMetrics().horizontalAdvance('9') * digits
+
+
+class LargeFileView(QWidget):
+    def __init__(self, path, parent=None, window_lines=WINDOW_LINES, encoding=None):
+        # encoding: TextEncoding; por defecto se detecta con el comienzo
+        super().__init__(parent)
+        self.path = path
+        self.window_lines = window_lines
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.encoding = encoding or detect_encoding(self.data[:SAMPLE_SIZE])
+        self.index = LineIndex(self.data, self.encoding)
+        self.first = 0  # Primera línea (desde 0) de la ventana
+        self.last = 0
+        self._moving = False
+
+        self.editor = _WindowEditor(self, len(self.index))
+        self.editor.setReadOnly(True)
+        self.editor.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.editor.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.scrollbar = QScrollBar(Qt.Orientation.Vertical)
+        self.scrollbar.setRange(0, len(self.index) - 1)
+
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        layout.addWidget(self.editor)
+        layout.addWidget(self.scrollbar)
+        self.setLayout(layout)
+
+        self.editor.verticalScrollBar().valueChanged.connect(self.on_editor_scroll)
+        self.scrollbar.valueChanged.connect(self.scroll_to)
+        self.load_window(0)
+
+    def line_count(self):
+        return len(self.index)
+
+    def top_line(self):
+        # Primera línea visible, desde 0
+        return self.first + self.editor.verticalScrollBar().value()
+
+    def load_window(self, top):
+        # Decodifica la ventana que deja top cerca de su centro y desplaza el
+        # editor hasta top; el cursor se conserva si sigue dentro
+        count = len(self.index)
+        cursor = self.editor.textCursor()
+        cursor_line = self.first + cursor.blockNumber()
+        cursor_column = cursor.positionInBlock()
+        first = max(0, min(top - self.window_lines // 2, count - self.window_lines))
+        last = min(count, first + self.window_lines)
+        self._moving = True
+        try:
+            self.editor.setPlainText(self.index.text(first, last))
+            self.first, self.last = first, last
+            self.editor.line_offset = first
+            if first <= cursor_line < last:
+                block = self.editor.document().findBlockByNumber(cursor_line - first)
+                cursor = QTextCursor(block)
+                cursor.movePosition(QTextCursor.MoveOperation.Right,
+                                    n=min(cursor_column, block.length() - 1))
+                self.editor.setTextCursor(cursor)
+            self.editor.verticalScrollBar().setValue(top - first)
+        finally:
+            self._moving = False
+        self.scrollbar.blockSignals(True)
+        self.scrollbar.setValue(self.top_line())
+        self.scrollbar.blockSignals(False)
+        self.editor.line_number_area.update()
+
+    def on_editor_scroll(self, value):
+        if self._moving:
+            return
+        top = self.first + value
+        # La barra del visor sigue al editor sin volver a desplazarlo
+        self.scrollbar.blockSignals(True)
+        self.scrollbar.setValue(top)
+        self.scrollbar.blockSignals(False)
+        visible = self.editor.viewport().height() // max(1, self.editor.fontMetrics().height())
+        if ((value < WINDOW_MARGIN and self.first > 0)
+                or (top + visible > self.last - WINDOW_MARGIN and self.last < len(self.index))):
+            self.load_window(top)
+
+    def scroll_to(self, top):
+        # Deja la línea top (desde 0) arriba del todo; dentro de la ventana
+        # basta con desplazar el editor (on_editor_scroll la recentra si hace
+        # falta)
+        if self.first <= top < self.last:
+            self.editor.verticalScrollBar().setValue(top - self.first)
+        else:
+            self.load_window(top)
+
+    def go_to_line(self, number):
+        # Lleva el cursor al comienzo de la línea number (desde 1). El índice
+        # da su posición directamente; solo se decodifica su ventana
+        line = max(0, min(number - 1, len(self.index) - 1))
+        if not self.first <= line < self.last:
+            self.load_window(line)
+        cursor = QTextCursor(self.editor.document().findBlockByNumber(line - self.first))
+        self.editor.setTextCursor(cursor)
+        self.editor.centerCursor()
+        self.editor.setFocus()
+
+    def release(self):
+        # Cierra el mmap y el archivo (al cerrar la pestaña)
+        self.editor.clear()
+        self.index = None
+        self.data.close()
+        self.file.close()
@@ -1,15 +1,19 @@
-import re
-from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
+from time import perf_counter
 
+from PyQt6.QtCore import QObject, QTimer
+from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont, QTextCursor
+from .highlight_scanner import DEFAULT_CACHE_ENTRIES, MULTILINE, ScanCache, token_spans, utf16_spans
+
+
+_formats = None
 
-class PythonHighlighter(QSyntaxHighlighter):
-    def __init__(self, document):
-        super().__init__(document)
-        self.highlighting_rules = []
-        self.setup_highlighting_rules()
 
-    def setup_highlighting_rules(self):
-        # Formatos
+def python_formats():
+    # Formatos, en el orden de highlight_scanner.FORMATS. Se crean una sola
+    # vez y los comparten todos los resaltadores; las reglas están en un
+    # único patrón compilado en highlight_scanner
+    global _formats
+    if _formats is None:
         keyword_format = QTextCharFormat()
         keyword_format.setForeground(QColor("#ff79c6"))
         keyword_format.setFontWeight(QFont.Weight.Bold)
@@ -27,65 +31,189 @@ class PythonHighlighter(QSyntaxHighlighter):
         comment_format.setForeground(QColor("#6272a4"))
         comment_format.setFontItalic(True)
 
-        self.multi_line_comment_format = QTextCharFormat()
-        self.multi_line_comment_format.setForeground(QColor("#6272a4"))
-        self.multi_line_comment_format.setFontItalic(True)
-
-        # Palabras clave
-        keywords = [
-            r'\bclass\b', r'\bdef\b', r'\breturn\b', r'\bif\b', r'\belse\b', r'\belif\b',
-            r'\bwhile\b', r'\bfor\b', r'\bin\b', r'\bimport\b', r'\bfrom\b', r'\bas\b',
-            r'\bwith\b', r'\btry\b', r'\bexcept\b', r'\bfinally\b', r'\bpass\b',
-            r'\bcontinue\b', r'\bbreak\b', r'\braise\b', r'\bTrue\b', r'\bFalse\b', r'\bNone\b'
+        multi_line_comment_format = QTextCharFormat()
+        multi_line_comment_format.setForeground(QColor("#6272a4"))
+        multi_line_comment_format.setFontItalic(True)
+
+        _formats = [
+            keyword_format,
+            string_format,
+            number_format,
+            special_char_format,
+            comment_format,
+            multi_line_comment_format,
         ]
+    return _formats
 
-        # Reglas de resaltado
-        for keyword in keywords:
-            pattern = re.compile(keyword)
-            self.highlighting_rules.append((pattern, keyword_format))
 
-        self.highlighting_rules.extend([
-            (re.compile(r'\b\d+\b'), number_format),
-            (re.compile(r'\".*?\"|\'.*?\''), string_format),
-            (re.compile(r'#.*'), comment_format),
-            (re.compile(r'[\+\-\*/=()\[\]{}:;]'), special_char_format)
-        ])
+class PythonHighlighter(QSyntaxHighlighter):
+    def __init__(self, document, cache_entries=DEFAULT_CACHE_ENTRIES, formats=None):
+        super().__init__(document)
+        # Formatos compartidos (python_formats) salvo que se pasen otros
+        self.formats = formats if formats is not None else python_formats()
+        self.multi_line_comment_format = self.formats[MULTILINE]
+        # Tramos ya calculados por (texto del bloque, estado de entrada);
+        # cache.hits y cache.misses sirven para ajustar su tamaño
+        self.cache = ScanCache(cache_entries)
+        # Con un IncrementalAnalysis (el del editor) los tramos salen de sus
+        # tokens y estados por línea: el mismo análisis sirve para colorear y
+        # para el análisis léxico. Debe estar al día antes de que se resalte
+        # un bloque (CodeEditor lo actualiza antes que el resaltador).
+        self.analysis = None
+        # Resaltado diferido (HighlightScheduler): frontier es un cursor al
+        # comienzo del primer bloque que aún no se ha resaltado en orden; los
+        # bloques desde ahí solo se resaltan si están en visible. Con
+        # frontier a None se resalta todo como siempre.
+        self.frontier = None
+        self.visible = range(0)
+        # Mientras se carga el texto no se resalta ningún bloque
+        self.loading = False
 
     def highlightBlock(self, text):
-        # Resaltar reglas estándar
-        for pattern, format in self.highlighting_rules:
-            for match in pattern.finditer(text):
-                start, end = match.span()
-                self.setFormat(start, end - start, format)
-
-        # Resaltar comentarios multilínea
-        self.setCurrentBlockState(0)
-
-        # Resaltar comentarios multilínea que comienzan o terminan en el bloque actual
-        start_index = 0
-        if self.previousBlockState() != 1:
-            start_index = text.find("'''")
-            if start_index == -1:
-                start_index = text.find('"""')
-
-        while start_index >= 0:
-            if self.previousBlockState() == 1:
-                # Si estamos en un comentario iniciado previamente
-                start_index = 0
-
-            end_index = text.find("'''", start_index + 3)
-            if end_index == -1:
-                end_index = text.find('"""', start_index + 3)
-
-            if end_index == -1:
-                # Comentario continúa en el siguiente bloque
-                self.setFormat(start_index, len(text) - start_index, self.multi_line_comment_format)
-                self.setCurrentBlockState(1)
+        if self.loading:
+            return
+        if self.frontier is not None or self.analysis is not None:
+            number = self.currentBlock().blockNumber()
+        if self.frontier is not None:
+            if number >= self.frontier.blockNumber() and number not in self.visible:
+                # Qt deja el bloque solo con los formatos que se apliquen
+                # aquí: se vuelven a aplicar los que ya tenía (de cuando
+                # estuvo visible, si lo estuvo) hasta que llegue la frontera.
+                # Sin tocar el estado: Qt no sigue con el bloque siguiente
+                self.keep_formats(self.currentBlock().length() - 1)
+                return
+        # El estado indica si el bloque empieza dentro de una cadena
+        # multilínea (si el anterior no se ha resaltado, -1)
+        state = self.previousBlockState()
+        if self.analysis is not None:
+            spans, state = self.analysis_spans(number, text, state if state > 0 else 0)
+        else:
+            # Una sola pasada por el bloque, o ninguna si el mismo texto ya
+            # se resaltó con el mismo estado de entrada
+            spans, state = self.cache.scan(text, state if state > 0 else 0)
+        formats = self.formats
+        set_format = self.setFormat
+        for start, length, format_index in utf16_spans(text, spans):
+            set_format(start, length, formats[format_index])
+        self.setCurrentBlockState(state)
+
+    def keep_formats(self, length):
+        # length: longitud del bloque en unidades UTF-16, como los formatos.
+        # Formatos actuales del bloque: Qt aún no los ha sustituido por los
+        # de esta llamada a highlightBlock. Si el texto ha cambiado pueden no
+        # cuadrar, pero la frontera lo resaltará bien al llegar
+        set_format = self.setFormat
+        for format_range in self.currentBlock().layout().formats():
+            if format_range.start < length:
+                set_format(format_range.start,
+                           min(format_range.length, length - format_range.start),
+                           format_range.format)
+
+    def analysis_spans(self, number, text, state):
+        # Tramos de la línea ya analizada; si el análisis no coincide con el
+        # bloque (no debería ocurrir) se analiza solo el bloque.
+        # El análisis léxico no conoce las cadenas multilínea (su estado de
+        # línea es siempre 0): los bloques que empiezan dentro de una o que
+        # pueden abrirla se resaltan con el escáner, que lleva ese estado
+        if state or "'''" in text or '"""' in text:
+            return self.cache.scan(text, state)
+        analysis = self.analysis
+        if number < len(analysis.lines) and analysis.lines[number] == text:
+            return token_spans(analysis.line_tokens[number]), analysis.line_states[number]
+        buffer, _, state = analysis.analyzer.analyze_line(text, state)
+        return token_spans(buffer), state
+
+
+class HighlightScheduler(QObject):
+    # Resaltado diferido para documentos grandes. Al cargar el texto no se
+    # resalta nada de forma síncrona: los bloques visibles se resaltan en
+    # cuanto se pintan, y el resto en orden, desde el principio, en tramos
+    # de slice_ms milisegundos cada vez que el bucle de eventos queda libre.
+    # El recorrido en orden es el que fija el estado de las cadenas
+    # multilínea: un bloque visible resaltado antes de que llegue el
+    # recorrido se vuelve a resaltar con el estado correcto cuando llega.
+    def __init__(self, editor, highlighter, slice_ms=8):
+        super().__init__(editor)
+        self.editor = editor
+        self.highlighter = highlighter
+        self.slice_seconds = slice_ms / 1000
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.highlight_slice)
+        editor.updateRequest.connect(self.update_visible)
+
+    def load(self, text):
+        # Carga el texto sin resaltar nada
+        highlighter = self.highlighter
+        self.begin()
+        highlighter.loading = True
+        try:
+            self.editor.setPlainText(text)
+        finally:
+            highlighter.loading = False
+        self.finish()
+
+    def begin(self):
+        # Llamar con el documento vacío, antes de añadir el texto (load, o
+        # por trozos durante una carga progresiva). El cursor de la frontera
+        # no avanza con lo que se inserta en su posición, así que queda al
+        # comienzo; hasta finish() solo se resaltan los bloques visibles
+        self.timer.stop()
+        frontier = QTextCursor(self.editor.document())
+        frontier.setKeepPositionOnInsert(True)
+        self.highlighter.frontier = frontier
+
+    def finish(self):
+        # Texto completo: se resalta lo visible y el resto por tramos
+        self.update_visible()
+        self.timer.start()
+
+    def running(self):
+        return self.highlighter.frontier is not None
+
+    def update_visible(self, *_):
+        # Bloques en pantalla: los que aún no se han resaltado nunca (estado
+        # -1) se resaltan ya, con el estado del anterior como entrada
+        highlighter = self.highlighter
+        if highlighter.frontier is None or highlighter.loading:
+            return
+        editor = self.editor
+        block = editor.firstVisibleBlock()
+        first = block.blockNumber()
+        height = editor.viewport().height()
+        offset = editor.contentOffset()
+        pending = []
+        while block.isValid():
+            if editor.blockBoundingGeometry(block).translated(offset).top() > height:
                 break
-            else:
-                # Comentario termina en el bloque actual
-                comment_length = end_index + 3 - start_index
-                self.setFormat(start_index, comment_length, self.multi_line_comment_format)
-                start_index = text.find("'''", end_index + 3)
-                if start_index == -1:
-                    start_index = text.find('"""', end_index + 3)
+            if block.userState() == -1:
+                pending.append(block)
+            block = block.next()
+        last = block.blockNumber() if block.isValid() else editor.blockCount()
+        highlighter.visible = range(first, last + 1)
+        frontier = highlighter.frontier.blockNumber()
+        for block in pending:
+            if block.blockNumber() >= frontier:
+                highlighter.rehighlightBlock(block)
+
+    def highlight_slice(self):
+        highlighter = self.highlighter
+        frontier = highlighter.frontier
+        if frontier is None:
+            self.timer.stop()
+            return
+        document = self.editor.document()
+        block = document.findBlock(frontier.position())
+        deadline = perf_counter() + self.slice_seconds
+        while block.isValid():
+            # Se avanza la frontera antes de resaltar: así el bloque queda
+            # permitido y el siguiente no (Qt no encadena más allá)
+            if not frontier.movePosition(QTextCursor.MoveOperation.NextBlock):
+                highlighter.frontier = None
+                highlighter.rehighlightBlock(block)
+                self.timer.stop()
+                return
+            highlighter.rehighlightBlock(block)
+            block = block.next()
+            if perf_counter() > deadline:
+                return
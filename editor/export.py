@@ -0,0 +1,285 @@
+# Exportación de los resultados del análisis a archivos, sin interfaz gráfica:
+#
+#     python -m editor.export <archivo> -o <salida> [--format jsonl|csv]
+#                             [--lexer lexical|ply] [--stats <salida>]
+#                             [--ast <salida>]
+#
+# Con --ast, si el Parser no puede construir el árbol no se escribe el archivo
+# y el código de salida es 1; los errores de sintaxis van a la salida de
+# errores.
+#
+# Los tokens se escriben a medida que se producen: pasan del lexer al
+# escritor de uno en uno y la memoria no crece con el tamaño de la salida.
+# El árbol sintáctico, en cambio, lo construye entero el Parser en memoria
+# (junto con el texto completo del archivo), así que es un paso aparte
+# (export_ast) que solo se hace si se pide; se escribe recorriéndolo con una
+# pila explícita.
+#
+# Tokens: un registro por token con los campos FIELDS (tipo, valor, línea y
+# columna). En JSON Lines cada línea es un objeto; en CSV la primera fila es
+# la cabecera.
+#
+# Estadísticas: un único objeto JSON, o filas (clave, valor) en CSV.
+#
+# Árbol sintáctico (solo JSON Lines): una línea por elemento, en preorden.
+#   ["N", tipo, línea, columna]  nodo; le siguen sus campos en orden
+#                                (Node.fields), uno por elemento
+#   ["L", n]                     lista; le siguen sus n elementos
+#   ["V", valor]                 cualquier otro valor (texto o null)
+# El número de elementos que sigue a cada nodo lo fija su tipo, así que no
+# hace falta cerrar nada y el árbol se puede leer también en streaming
+# (read_ast).
+# Este módulo no debe importar PyQt6.
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+
+from editor.analyzer.lexical_analyzer import LexicalAnalyzer, TokenType
+from editor.analyzer_s.ast_nodes import Node
+from editor.fileio import TextReader, read_text
+
+FORMATS = ('jsonl', 'csv')
+LEXERS = ('lexical', 'ply')
+FIELDS = ('type', 'value', 'line', 'column')
+
+
+def lexical_tokens(chunks, analyzer=None):
+    # Tokens de LexicalAnalyzer como tuplas (tipo, valor, línea, columna),
+    # a partir de los trozos de texto de chunks (TextReader.chunks). Un trozo
+    # None produce None: los tokens anteriores no valen y se vuelve a
+    # empezar. Las estadísticas quedan en analyzer.stats al terminar.
+    analyzer = analyzer or LexicalAnalyzer()
+    names = {token_type.value: token_type.name for token_type in TokenType}
+    for item in analyzer.iter_chunk_buffers(chunks):
+        if item is None:
+            yield None
+            continue
+        buffer, first_line, first_column = item
+        offset = first_line - 1
+        lines = buffer.lines
+        for index, type_code in enumerate(buffer.types):
+            column = buffer.column(index)
+            if lines[index] == 1:
+                column += first_column
+            yield (names[type_code], buffer.value(index), lines[index] + offset, column)
+
+
+def ply_tokens(code, lexer=None):
+    # Tokens del lexer de PLY (el que usa Parser) como tuplas (tipo, valor,
+    # línea, columna). PLY necesita el texto completo, pero los tokens se
+    # producen de uno en uno.
+    if lexer is None:
+        from editor.analyzer_s.sintax_analyzer import Lexer
+        lexer = Lexer()
+        lexer.build()
+    lexer.lexer.lineno = 1
+    lexer.input(code)
+    rfind = code.rfind
+    while True:
+        tok = lexer.token()
+        if tok is None:
+            return
+        yield tok.type, tok.value, tok.lineno, tok.lexpos - rfind('\n', 0, tok.lexpos) - 1
+
+
+def write_tokens(tokens, out, fmt='jsonl'):
+    # Escribe los tokens en out (archivo de texto abierto; para CSV, con
+    # newline='') y devuelve cuántos se escribieron. Un token None vacía out
+    # y vuelve a empezar (lexical_tokens), así que entonces out tiene que
+    # admitir seek
+    _check_format(fmt)
+    tokens = iter(tokens)
+    while True:
+        count = 0
+        if fmt == 'csv':
+            writer = csv.writer(out)
+            writer.writerow(FIELDS)
+            write = writer.writerow
+        else:
+            dumps = json.JSONEncoder(ensure_ascii=False).encode
+            write = lambda token: out.write(dumps(dict(zip(FIELDS, token))) + '\n')
+        for token in tokens:
+            if token is None:
+                out.seek(0)
+                out.truncate()
+                break
+            write(token)
+            count += 1
+        else:
+            return count
+
+
+def write_stats(stats, out, fmt='jsonl'):
+    _check_format(fmt)
+    if fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(('key', 'value'))
+        writer.writerows(stats.items())
+    else:
+        out.write(json.dumps(stats, ensure_ascii=False) + '\n')
+
+
+def ast_records(node):
+    # Recorrido en preorden con una pila explícita (sin límite de profundidad)
+    pending = [node]
+    pop = pending.pop
+    extend = pending.extend
+    while pending:
+        item = pop()
+        if isinstance(item, Node):
+            yield ['N', item.kind, item.line, item.column]
+            extend(reversed(item.children()))
+        elif isinstance(item, list):
+            yield ['L', len(item)]
+            extend(reversed(item))
+        else:
+            yield ['V', item]
+
+
+def write_ast(node, out):
+    # Escribe el árbol en out (JSON Lines) y devuelve el número de líneas
+    write = out.write
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    count = 0
+    for count, record in enumerate(ast_records(node), 1):
+        write(dumps(record) + '\n')
+    return count
+
+
+def _node_classes():
+    classes = {}
+    pending = [Node]
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        if cls.kind is not None:
+            classes[cls.kind] = cls
+    return classes
+
+
+def read_ast(lines):
+    # Reconstruye el árbol a partir de las líneas de write_ast
+    classes = _node_classes()
+    # Elementos abiertos: [valores, cuántos faltan, clase (None: lista),
+    # línea, columna]; el primero recoge la raíz
+    stack = [[[], 1, None, 0, 0]]
+    for line in lines:
+        record = json.loads(line)
+        tag = record[0]
+        if tag == 'N':
+            cls = classes[record[1]]
+            stack.append([[], len(cls.fields), cls, record[2], record[3]])
+        elif tag == 'L':
+            stack.append([[], record[1], None, 0, 0])
+        else:
+            stack[-1][0].append(record[1])
+            stack[-1][1] -= 1
+        # Cerrar los elementos completos (incluidos los que no tienen hijos)
+        while len(stack) > 1 and stack[-1][1] == 0:
+            values, _, cls, line_no, column = stack.pop()
+            value = values if cls is None else cls(*values, line=line_no, column=column)
+            stack[-1][0].append(value)
+            stack[-1][1] -= 1
+    if len(stack) != 1 or stack[0][1] != 0:
+        raise ValueError('Árbol sintáctico incompleto')
+    return stack[0][0][0]
+
+
+def _check_format(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de exportación desconocido: {fmt}")
+
+
+def export_file(path, out_path, fmt='jsonl', lexer='lexical', progress=None):
+    # Exporta los tokens de path a out_path y devuelve las estadísticas.
+    # El archivo se lee con editor.fileio (detección de la codificación).
+    # progress: función opcional que recibe la fracción del archivo leída
+    # (0 a 1) tras cada trozo
+    _check_format(fmt)
+    if lexer not in LEXERS:
+        raise ValueError(f"Lexer desconocido: {lexer}")
+    with open(out_path, 'w', encoding='utf-8', newline='') as out:
+        if lexer == 'lexical':
+            analyzer = LexicalAnalyzer()
+            with open(path, 'rb') as file:
+                chunks = TextReader(file).chunks()
+                if progress is not None:
+                    chunks = _reporting(chunks, file, progress)
+                total = write_tokens(lexical_tokens(chunks, analyzer), out, fmt)
+            stats = dict(analyzer.stats, total_tokens=total)
+        else:
+            code, _ = read_text(path, progress)
+            total = write_tokens(ply_tokens(code), out, fmt)
+            stats = {'total_tokens': total, 'lines': code.count('\n') + 1}
+    return stats
+
+
+def export_ast(path, ast_path, progress=None):
+    # Analiza path con el Parser y escribe el árbol en ast_path (JSON Lines).
+    # Devuelve (éxito, errores, escrito): con errores de sintaxis se escribe
+    # el árbol parcial que se pudo recuperar; si no hay árbol (ast None), no
+    # se crea ni se toca ast_path y escrito es False.
+    # progress: función opcional que recibe la fracción del análisis hecha
+    # (0 a 1); si lanza una excepción, el análisis se interrumpe y la
+    # excepción se propaga (por ejemplo, para cancelarlo)
+    from editor.analyzer_s.sintax_analyzer import get_parser
+    code, _ = read_text(path)
+    monitor = None
+    if progress is not None:
+        length = max(len(code), 1)
+        monitor = lambda pos: progress(pos / length)
+    success, errors, ast = get_parser().parse(code, monitor=monitor)
+    if ast is None:
+        return success, list(errors), False
+    with open(ast_path, 'w', encoding='utf-8') as out:
+        write_ast(ast, out)
+    return success, list(errors), True
+
+
+def _reporting(chunks, file, progress):
+    # Los trozos de chunks, informando a progress de la fracción leída de file
+    total = max(os.fstat(file.fileno()).st_size, 1)
+    for chunk in chunks:
+        yield chunk
+        progress(min(file.tell() / total, 1))
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog='python -m editor.export',
+                                         description='Exporta tokens, estadísticas y árbol sintáctico.')
+    arg_parser.add_argument('file', help='archivo a analizar')
+    arg_parser.add_argument('--output', '-o', required=True,
+                            help='archivo de salida de los tokens')
+    arg_parser.add_argument('--format', '-f', choices=FORMATS, default='jsonl')
+    arg_parser.add_argument('--lexer', choices=LEXERS, default='lexical',
+                            help='LexicalAnalyzer (por defecto) o el lexer de PLY del Parser')
+    arg_parser.add_argument('--stats', help='archivo de salida de las estadísticas')
+    arg_parser.add_argument('--ast', help='archivo de salida del árbol sintáctico (JSON Lines)')
+    args = arg_parser.parse_args(argv)
+
+    stats = export_file(args.file, args.output, args.format, args.lexer)
+    if args.stats:
+        with open(args.stats, 'w', encoding='utf-8', newline='') as out:
+            write_stats(stats, out, args.format)
+    else:
+        print(json.dumps(stats, ensure_ascii=False), file=sys.stderr)
+    if args.ast:
+        # El Parser también imprime cada error con print(); aquí van una vez,
+        # a la salida de errores
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, errors, written = export_ast(args.file, args.ast)
+        for error in errors:
+            print(error, file=sys.stderr)
+        if not written:
+            print(f"No se pudo construir el árbol sintáctico; no se escribió {args.ast}",
+                  file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# Lectura y escritura de archivos de texto con detección de la codificación.
+#
+# La codificación se elige por la marca de orden de bytes (BOM) si la hay y,
+# si no, con una muestra del comienzo: UTF-8 si la muestra es UTF-8 válido y,
+# si no, FALLBACK_ENCODING (latin-1, que acepta cualquier byte). El texto se
+# decodifica por trozos con un decodificador incremental y los saltos de
+# línea se normalizan a '\n', como al abrir un archivo en modo texto.
+#
+# Si la muestra parecía UTF-8 pero más adelante aparecen bytes que no lo son,
+# el archivo se vuelve a leer desde el principio con FALLBACK_ENCODING. Es el
+# único caso en que se lee dos veces; a cambio, no se guardan los bytes ya
+# decodificados por si hicieran falta.
+#
+# TextEncoding recuerda la codificación, la BOM y el salto de línea del
+# archivo para guardarlo después igual (write_text, que no sobrescribe el
+# archivo en sitio).
+# Este módulo no debe importar PyQt6.
+import codecs
+import io
+import os
+import stat
+
+SAMPLE_SIZE = 1 << 16
+FALLBACK_ENCODING = 'latin-1'
+
+# UTF-32 antes que UTF-16: la BOM de UTF-32-LE empieza por la de UTF-16-LE
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+
+class TextEncoding:
+    __slots__ = ('encoding', 'bom', 'newline')
+
+    def __init__(self, encoding='utf-8', bom=b'', newline='\n'):
+        self.encoding = encoding
+        self.bom = bom  # Bytes de la BOM del archivo (vacío si no tenía)
+        self.newline = newline  # '\n', '\r\n' o '\r'
+
+    def __repr__(self):
+        return f'TextEncoding({self.encoding!r}, bom={self.bom!r}, newline={self.newline!r})'
+
+
+def detect_encoding(sample):
+    # Codificación de unos bytes del comienzo de un archivo
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return TextEncoding(encoding, bom)
+    try:
+        # Sin final: la muestra puede cortar un carácter de varios bytes
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return TextEncoding(FALLBACK_ENCODING)
+    return TextEncoding('utf-8')
+
+
+def _decoder(encoding):
+    return io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder(encoding.encoding)(), translate=True)
+
+
+class TextReader:
+    def __init__(self, file, chunk_size=1 << 16, sample_size=SAMPLE_SIZE):
+        # file: archivo binario (con seek, por si hay que volver a leerlo)
+        self.file = file
+        self.chunk_size = chunk_size
+        self.sample_size = sample_size
+        self.encoding = None  # TextEncoding, elegida al leer el primer trozo
+
+    def chunks(self):
+        # Genera el texto por trozos. Si la codificación resulta no ser la de
+        # la muestra, genera None una vez: lo anterior no vale y el texto
+        # vuelve a empezar, decodificado con self.encoding
+        file = self.file
+        data = file.read(max(self.sample_size, self.chunk_size))
+        encoding = self.encoding = detect_encoding(data)
+        # Mientras la codificación pueda cambiar
+        tentative = not encoding.bom and encoding.encoding != FALLBACK_ENCODING
+        data = data[len(encoding.bom):]
+        decoder = _decoder(encoding)
+        while True:
+            try:
+                text = decoder.decode(data, final=not data)
+            except UnicodeDecodeError:
+                if not tentative:
+                    raise
+                # Sin BOM: se vuelve a empezar desde el byte 0
+                encoding = self.encoding = TextEncoding(FALLBACK_ENCODING)
+                decoder = _decoder(encoding)
+                tentative = False
+                yield None
+                file.seek(0)
+                data = file.read(self.chunk_size)
+                continue
+            if text:
+                yield text
+            if not data:
+                break
+            data = file.read(self.chunk_size)
+        # Salto de línea del archivo; si mezcla varios se guardará con '\n'
+        if isinstance(decoder.newlines, str):
+            encoding.newline = decoder.newlines
+
+
+def read_text(path, progress=None, chunk_size=1 << 16):
+    # Devuelve (texto, TextEncoding). progress: función opcional que recibe
+    # la fracción del archivo leída (0 a 1) tras cada trozo
+    total = max(os.path.getsize(path), 1)
+    with open(path, 'rb') as file:
+        return _read_all(TextReader(file, chunk_size), progress, total)
+
+
+def decode_text(data):
+    # Como read_text, para los bytes de un archivo ya leídos
+    return _read_all(TextReader(io.BytesIO(data)))
+
+
+def _read_all(reader, progress=None, total=1):
+    parts = []
+    for chunk in reader.chunks():
+        if chunk is None:
+            parts.clear()
+            continue
+        parts.append(chunk)
+        if progress is not None:
+            progress(min(reader.file.tell() / total, 1))
+    return ''.join(parts), reader.encoding
+
+
+def read_head(path, size):
+    # Comienzo del archivo como texto (para reconocer el lenguaje), con la
+    # misma detección de codificación; los bytes inválidos se reemplazan
+    with open(path, 'rb') as file:
+        sample = file.read(size * 4)  # Hasta 4 bytes por carácter (UTF-32)
+    encoding = detect_encoding(sample)
+    return sample[len(encoding.bom):].decode(encoding.encoding, errors='replace')[:size]
+
+
+def _create_temp(path):
+    # Crea un temporal nuevo junto a path y devuelve (descriptor, ruta). Se
+    # pide 0o666 como open(), así que el sistema aplica la umask del proceso
+    # en ese momento (mkstemp crea con 0o600)
+    directory, name = os.path.split(path)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    while True:
+        temp_path = os.path.join(directory, f'.{name}.{os.urandom(4).hex()}.tmp')
+        try:
+            return os.open(temp_path, flags, 0o666), temp_path
+        except FileExistsError:
+            continue
+
+
+def write_text(path, text, encoding=None):
+    # Guarda text ('\n' como salto de línea) con la codificación, la BOM y
+    # el salto de línea de encoding (por defecto, UTF-8 sin BOM y '\n').
+    # Se codifica antes de tocar nada: si algún carácter no cabe en la
+    # codificación (UnicodeEncodeError), el archivo queda como estaba. Se
+    # escribe en un temporal junto al archivo y se sustituye con os.replace,
+    # así que un fallo al escribir (disco lleno...) tampoco lo trunca
+    encoding = encoding or TextEncoding()
+    if encoding.newline != '\n':
+        text = text.replace('\n', encoding.newline)
+    data = encoding.bom + text.encode(encoding.encoding)
+    path = os.path.realpath(path)  # Si es un enlace, se sustituye su destino
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = None  # Archivo nuevo: los permisos del temporal
+    fd, temp_path = _create_temp(path)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        if mode is not None:
+            os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,159 @@
+# Modelo de Qt sobre el árbol sintáctico (nodos de ast_nodes) para mostrarlo
+# en un QTreeView.
+#
+# Las filas se crean bajo demanda: un elemento solo genera sus hijos cuando la
+# vista los pide con fetchMore (al expandirlo o al llegar al final de la lista
+# desplazándose), y de BATCH_SIZE en BATCH_SIZE. Mostrar un árbol con cientos
+# de miles de nodos cuesta lo mismo que mostrar uno pequeño; solo se paga por
+# lo que se expande.
+#
+# La estructura que se muestra es la del formato de tuplas (to_tuples): el
+# cuerpo de if/while/for/def cuelga de un elemento BLOCK, la rama else de
+# ELSE > BLOCK, y las listas (sentencias, parámetros, argumentos, elementos)
+# se aplanan en su padre.
+from PyQt6.QtCore import QAbstractItemModel, QModelIndex, Qt
+
+from editor.analyzer_s.ast_nodes import Node
+
+BATCH_SIZE = 256
+
+_END = object()
+
+
+class _Group:
+    # Envoltorio BLOCK/ELSE del formato de tuplas
+    __slots__ = ('kind', 'items')
+
+    def __init__(self, kind, items):
+        self.kind = kind
+        self.items = items
+
+
+def _entries(value):
+    # Hijos que se muestran de un nodo, en orden y sin materializar listas
+    if isinstance(value, _Group):
+        yield from value.items
+        return
+    for name in value.fields:
+        child = getattr(value, name)
+        if name == 'body':
+            yield _Group('BLOCK', child)
+        elif name == 'orelse':
+            yield None if child is None else _Group('ELSE', [_Group('BLOCK', child)])
+        elif isinstance(child, list):
+            yield from child
+        else:
+            yield child
+
+
+class _Item:
+    __slots__ = ('value', 'parent', 'row', 'children', 'pending', 'next_value')
+
+    def __init__(self, value, parent, row):
+        self.value = value
+        self.parent = parent
+        self.row = row
+        self.children = []
+        if isinstance(value, (Node, _Group)):
+            self.pending = _entries(value)
+            self.next_value = next(self.pending, _END)
+        else:
+            self.pending = None
+            self.next_value = _END
+
+    def can_fetch(self):
+        return self.next_value is not _END
+
+    def label(self):
+        value = self.value
+        if isinstance(value, (Node, _Group)):
+            return value.kind
+        return str(value)
+
+
+class AstTreeModel(QAbstractItemModel):
+    HEADERS = ("Nodo", "Línea", "Columna")
+
+    def __init__(self, ast, parent=None):
+        super().__init__(parent)
+        # Raíz invisible con un solo hijo: el nodo raíz del árbol
+        self._root = _Item(None, None, 0)
+        if ast is not None:
+            self._root.children.append(_Item(ast, self._root, 0))
+
+    def _item(self, index):
+        return index.internalPointer() if index.isValid() else self._root
+
+    def index(self, row, column, parent=QModelIndex()):
+        children = self._item(parent).children
+        if 0 <= row < len(children) and 0 <= column < len(self.HEADERS):
+            return self.createIndex(row, column, children[row])
+        return QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is self._root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self._item(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return False
+        item = self._item(parent)
+        return bool(item.children) or item.can_fetch()
+
+    def canFetchMore(self, parent):
+        if parent.column() > 0:
+            return False
+        return self._item(parent).can_fetch()
+
+    def fetchMore(self, parent):
+        item = self._item(parent)
+        # Se cuentan las filas antes de insertarlas: Qt necesita el rango
+        # exacto en beginInsertRows
+        start = len(item.children)
+        pending = []
+        value = item.next_value
+        while value is not _END and len(pending) < BATCH_SIZE:
+            pending.append(value)
+            value = next(item.pending, _END)
+        if not pending:
+            return
+        self.beginInsertRows(parent, start, start + len(pending) - 1)
+        for row, value in enumerate(pending, start):
+            item.children.append(_Item(value, item, row))
+        item.next_value = value
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        item = index.internalPointer()
+        column = index.column()
+        if column == 0:
+            return item.label()
+        if isinstance(item.value, Node):
+            return item.value.line if column == 1 else item.value.column
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def node(self, index):
+        # Nodo del árbol de la fila (o None si la fila no es un nodo)
+        if not index.isValid():
+            return None
+        value = index.internalPointer().value
+        return value if isinstance(value, Node) else None
@@ -1,3 +1,4 @@
+import io
 import os
 import sys
 import shutil
@@ -6,12 +7,32 @@ from PyQt6.QtCore import Qt, QDir
 from PyQt6.QtGui import QIcon, QColor, QPalette, QFileSystemModel
 from PyQt6.QtWidgets import (QMainWindow, QFileDialog, QSplitter, QVBoxLayout, QTextEdit,QDialog,QApplication,QApplication,
                            QWidget, QLabel, QPushButton, QHBoxLayout, QLineEdit,
-                           QMessageBox, QInputDialog, QTabWidget, QMenu)
+                           QMessageBox, QInputDialog, QTabWidget, QMenu, QProgressBar, QTreeView,
+                           QTableView, QHeaderView, QComboBox, QTabBar, QToolButton)
 from .tree_view import DragDropTreeView
+from .ast_model import AstTreeModel
+from .token_model import TokenTableModel
+from .workers import AnalysisRunner, FileLoader
 from ..editor.code_editor import CodeEditor
-from editor.analyzer.lexical_analyzer import LexicalAnalyzer, TokenType, Token
-from editor.analyzer_s.sintax_analyzer import Lexer,Parser
-
+from ..editor.languages import PYTHON, SNIFF_CHARS, language_for
+from ..editor.large_file import LargeFileView
+from editor.analyzer.lexical_analyzer import LexicalAnalyzer, TokenType, Token, TokenBuffer
+from editor.analyzer_s.sintax_analyzer import Parser,get_parser
+from editor.cache import default_cache, file_digest, data_digest
+from editor.fileio import TextReader, read_head, read_text, write_text
+from editor.export import export_ast, export_file, write_stats
+from editor.analyzer_s.compiler import ExecutionError, compile_program
+from editor.analyzer_s.vm import VM
+
+# Hasta este número de caracteres, el resaltado de una pestaña usa el
+# análisis léxico incremental del editor (el mismo que sirve a "Análisis
+# Léxico"); los archivos mayores se resaltan con las reglas propias, de forma
+# diferida, porque analizar todas sus líneas al abrirlos bloquearía la interfaz
+LEXICAL_HIGHLIGHT_MAX_CHARS = 512 * 1024
+
+# A partir de este tamaño los archivos se abren en el visor de solo lectura
+# (LargeFileView), que no lee el archivo entero
+LARGE_FILE_MIN_BYTES = 64 * 1024 * 1024
 
 
 class EditorTexto(QMainWindow):
@@ -82,6 +103,7 @@ class EditorTexto(QMainWindow):
 
         self.crearAcciones()
         self.crearMenus()
+        self.crearBarraDeEstado()
 
         self.setGeometry(100, 100, 1200, 800)
         self.setWindowTitle('Editor de Código')
@@ -91,6 +113,10 @@ class EditorTexto(QMainWindow):
         self.tab_widget.setTabsClosable(True)
         self.tab_widget.tabCloseRequested.connect(self.close_tab)
 
+        # Archivos que se están cargando en segundo plano: editor -> trabajo
+        self.file_loader = FileLoader(self)
+        self.loads = {}
+
         self.show()
 
     
@@ -167,83 +193,94 @@ class EditorTexto(QMainWindow):
     def lexical_analysis(self, index):
         # Obtener la ruta del archivo seleccionado
         file_path = self.model.filePath(index)
+        if self.mostrarAnalisisDePestana(file_path):
+            return
 
         try:
-            # Leer el contenido del archivo
-            with open(file_path, 'r') as file:
-                code = file.read()
-
-            if not code:
+            if os.path.getsize(file_path) == 0:
                 QMessageBox.warning(self, "Advertencia", "El archivo está vacío.")
                 return
+        except FileNotFoundError:
+            QMessageBox.critical(self, "Error", f"El archivo {file_path} no se encontró.")
+            return
 
-            # Eliminar espacios en blanco del código
-            code_without_whitespace = ''.join(code.split())
-
-            # Instancia del analizador léxico y análisis
-            analyzer = LexicalAnalyzer()
-            tokens, stats = analyzer.analyze(code)  # Recibe tokens y estadísticas
+        # El análisis y el formateo del resultado se hacen en segundo plano;
+        # el diálogo se crea en el hilo de la interfaz cuando termina
+        def analizar(job):
+            tokens, stats = self.analizarArchivoLexico(file_path, job)
+            return (tokens, stats) if tokens else None
 
-            if not tokens:
+        def mostrar(result):
+            if result is None:
                 QMessageBox.warning(self, "Advertencia", "No se encontraron tokens válidos.")
                 return
+            self.mostrarDialogoLexico(*result)
 
-            # Formatear los tokens para mostrarlos en un mensaje
-            token_message = "\n".join(str(token) for token in tokens)
-
-            # Formatear estadísticas para mostrarlas
-            stats_message = "\n".join(f"{key}: {value}" for key, value in stats.items())
-
-            # Crear mensaje completo
-            complete_message = (
-                f"Código sin espacios:\n{code_without_whitespace}\n\n"
-                f"Tokens:\n{token_message}\n\n"
-                f"Estadísticas de Tokens:\n{stats_message}"
-            )
-
-            # Crear un cuadro de diálogo personalizado para mostrar los resultados
-            dialog = QDialog(self)
-            dialog.setWindowTitle("Resultado del Análisis Léxico")
-
-            # Crear un QTextEdit para mostrar el mensaje completo con scroll
-            text_edit = QTextEdit()
-            text_edit.setPlainText(complete_message)
-            text_edit.setReadOnly(True)
-
-            # Ajustar el tamaño del cuadro de texto
-            text_edit.setFixedSize(600, 400)
+        def fallo(e):
+            if isinstance(e, FileNotFoundError):
+                QMessageBox.critical(self, "Error", f"El archivo {file_path} no se encontró.")
+            else:
+                QMessageBox.critical(self, "Error", f"No se pudo realizar el análisis léxico: {e}", 
+                                 QMessageBox.StandardButton.Ok)
 
-            # Layout para el diálogo
-            layout = QVBoxLayout()
-            layout.addWidget(text_edit)
+        self.runner.submit(f"Análisis léxico de {os.path.basename(file_path)}",
+                           analizar, mostrar, fallo)
+            
 
-            # Botón de cerrar
-            close_button = QPushButton("Cerrar")
-            close_button.clicked.connect(dialog.accept)
-            layout.addWidget(close_button)
+    def analyze_code(self, index):
+        file_path = self.model.filePath(index)
 
-            dialog.setLayout(layout)
+        # Lectura, análisis y formateo en segundo plano
+        def analizar(job):
+            code, _ = read_text(file_path)
 
-            # Ejecutar el diálogo de manera modal
-            dialog.exec()
+            if not code:
+                return None
+
+            # Realizar análisis léxico y sintáctico (o recuperarlos de la caché)
+            # Una sola pasada del lexer sirve al parser y al informe de tokens
+            def analizar_codigo():
+                success, errors, ast, tokens, stats = get_parser().parse_with_tokens(
+                    code, monitor=lambda pos: job.report(90 * pos / len(code)))
+                return tokens, stats, success, errors, ast
+
+            tokens, stats, success, errors, ast = default_cache().get_or_compute(
+                data_digest(code), 'parse_with_tokens', Parser.version(), analizar_codigo)
+            job.report(90)
+
+            # Resultados del análisis léxico
+            # Los tokens se muestran en una tabla; el texto lleva solo las
+            # estadísticas
+            lexical_output = "=== Análisis Léxico ===\n\n"
+            lexical_output += "Estadísticas del análisis léxico:\n"
+            lexical_output += f"  Total de tokens: {stats['total_tokens']}\n"
+            lexical_output += f"  Total de líneas: {stats['lines']}\n"
+            job.report(95)
 
-        except FileNotFoundError:
-            QMessageBox.critical(self, "Error", f"El archivo {file_path} no se encontró.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo realizar el análisis léxico: {e}", 
-                             QMessageBox.StandardButton.Ok)
+            # Resultados del análisis sintáctico
+            syntactic_output = "=== Análisis Sintáctico ===\n\n"
             
+            # El árbol no se convierte a texto: se muestra en un QTreeView
+            # que crea las filas a medida que se expanden
+            if success:
+                syntactic_output += "Análisis sintáctico exitoso!\n\n"
+                syntactic_output += "Árbol Sintáctico:"
+            else:
+                # El parser se recupera de cada error: se informan todos y el
+                # árbol de lo que sí se pudo analizar
+                syntactic_output += "Errores encontrados durante el análisis sintáctico:\n"
+                for error in errors:
+                    syntactic_output += f"- {error}\n"
+                if ast is not None:
+                    syntactic_output += "\nÁrbol Sintáctico parcial:"
 
-    def analyze_code(self, index):
-        file_path = self.model.filePath(index)
-        try:
-            # Leer el contenido del archivo
-            with open(file_path, 'r') as file:
-                code = file.read()
-            
-            if not code:
+            return tokens, lexical_output, syntactic_output, ast
+
+        def mostrar(outputs):
+            if outputs is None:
                 QMessageBox.warning(self, "Advertencia", "El archivo está vacío.")
                 return
+            tokens, lexical_output, syntactic_output, ast = outputs
 
             # Crear una ventana de resultados
             result_dialog = QDialog(self)
@@ -259,8 +296,10 @@ class EditorTexto(QMainWindow):
             # Tab para análisis léxico
             lexical_tab = QWidget()
             lexical_layout = QVBoxLayout()
+            lexical_layout.addWidget(self.crearTablaTokens(tokens), 1)
             lexical_text = QTextEdit()
             lexical_text.setReadOnly(True)
+            lexical_text.setMaximumHeight(150)
             lexical_layout.addWidget(lexical_text)
             lexical_tab.setLayout(lexical_layout)
             
@@ -270,6 +309,14 @@ class EditorTexto(QMainWindow):
             syntactic_text = QTextEdit()
             syntactic_text.setReadOnly(True)
             syntactic_layout.addWidget(syntactic_text)
+            if ast is not None:
+                ast_view = QTreeView()
+                ast_view.setUniformRowHeights(True)
+                ast_view.setModel(AstTreeModel(ast, ast_view))
+                ast_view.expandToDepth(0)
+                syntactic_layout.addWidget(ast_view, 1)
+                # Con árbol, el texto solo lleva el resumen y los errores
+                syntactic_text.setMaximumHeight(150)
             syntactic_tab.setLayout(syntactic_layout)
             
             # Agregar tabs al QTabWidget
@@ -286,81 +333,21 @@ class EditorTexto(QMainWindow):
             
             result_dialog.setLayout(layout)
 
-            # Realizar análisis léxico
-            lexer = Lexer()
-            lexer.build()
-            lexer.input(code)
-            
-            # Recolectar tokens
-            tokens = []
-            stats = {'total_tokens': 0, 'lines': code.count('\n') + 1}
-            
-            while True:
-                tok = lexer.token()
-                if not tok:
-                    break
-                tokens.append(tok)
-                stats['total_tokens'] += 1
-
-            # Mostrar resultados del análisis léxico
-            lexical_output = "=== Análisis Léxico ===\n\n"
-            lexical_output += "Tokens encontrados:\n"
-            for token in tokens:
-                lexical_output += f"  Token: {token.type}, Valor: {token.value}, Línea: {token.lineno}\n"
-            
-            lexical_output += "\nEstadísticas del análisis léxico:\n"
-            lexical_output += f"  Total de tokens: {stats['total_tokens']}\n"
-            lexical_output += f"  Total de líneas: {stats['lines']}\n"
-            
             lexical_text.setText(lexical_output)
-
-            # Realizar análisis sintáctico
-            parser = Parser()
-            success, errors, ast = parser.parse(code)
-
-            # Mostrar resultados del análisis sintáctico
-            syntactic_output = "=== Análisis Sintáctico ===\n\n"
-            
-            if success:
-                syntactic_output += "Análisis sintáctico exitoso!\n\n"
-                syntactic_output += "Árbol Sintáctico:\n"
-                
-                # Función para construir la representación del árbol
-                def build_ast_string(node, level=0):
-                    result = ""
-                    indent = "  " * level
-                    if isinstance(node, tuple):
-                        result += f"{indent}{node[0]}\n"
-                        for child in node[1:]:
-                            result += build_ast_string(child, level + 1)
-                    elif isinstance(node, list):
-                        for item in node:
-                            result += build_ast_string(item, level)
-                    else:
-                        result += f"{indent}{node}\n"
-                    return result
-                
-                syntactic_output += build_ast_string(ast)
-            else:
-                syntactic_output += "Errores encontrados durante el análisis sintáctico:\n"
-                for error in errors:
-                    syntactic_output += f"- {error}\n"
-            
             syntactic_text.setText(syntactic_output)
 
             result_dialog.exec()
 
-        except FileNotFoundError:
-            QMessageBox.critical(self, "Error", f"El archivo {file_path} no se encontró.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error durante el análisis: {str(e)}")
-
+        def fallo(e):
+            if isinstance(e, FileNotFoundError):
+                QMessageBox.critical(self, "Error", f"El archivo {file_path} no se encontró.")
+            else:
+                QMessageBox.critical(self, "Error", f"Error durante el análisis: {str(e)}")
 
+        self.runner.submit(f"Análisis sintáctico de {os.path.basename(file_path)}",
+                           analizar, mostrar, fallo)
 
 
-    
-  
-        
     def show_context_menu(self, position):
         index = self.tree.indexAt(position)
         menu = QMenu()
@@ -473,6 +460,17 @@ class EditorTexto(QMainWindow):
         self.analisis_lexico.setShortcut('Ctrl+L')
         self.analisis_lexico.triggered.connect(self.analizarLexico)
 
+        self.ejecutar = QAction('Ejecutar', self)
+        self.ejecutar.setShortcut('F5')
+        self.ejecutar.triggered.connect(self.ejecutarPrograma)
+
+        self.ir_a_linea = QAction('Ir a línea...', self)
+        self.ir_a_linea.setShortcut('Ctrl+G')
+        self.ir_a_linea.triggered.connect(self.irALinea)
+
+        self.exportar_analisis = QAction('Exportar análisis...', self)
+        self.exportar_analisis.triggered.connect(self.exportarAnalisis)
+
         self.salir = QAction('Salir', self)
         self.salir.setShortcut('Ctrl+Q')
         self.salir.triggered.connect(self.close)
@@ -483,9 +481,54 @@ class EditorTexto(QMainWindow):
         menu_archivo.addAction(self.abrir_archivo)
         menu_archivo.addAction(self.abrir_carpeta)
         menu_archivo.addAction(self.guardar_archivo)
+        menu_archivo.addAction(self.ir_a_linea)
         menu_archivo.addAction(self.analisis_lexico)
+        menu_archivo.addAction(self.exportar_analisis)
         menu_archivo.addAction(self.salir)
 
+        menu_ejecutar = menubar.addMenu('Ejecutar')
+        menu_ejecutar.addAction(self.ejecutar)
+
+    def crearBarraDeEstado(self):
+        # Los análisis se ejecutan en segundo plano; la barra de estado muestra
+        # el progreso del que está en curso y permite cancelarlo
+        self.runner = AnalysisRunner(self)
+
+        self.analysis_label = QLabel()
+        self.analysis_progress = QProgressBar()
+        self.analysis_progress.setRange(0, 100)
+        self.analysis_progress.setMaximumWidth(200)
+        self.cancel_analysis_btn = QPushButton("Cancelar")
+        self.cancel_analysis_btn.clicked.connect(self.runner.cancel)
+
+        status_bar = self.statusBar()
+        for widget in (self.analysis_label, self.analysis_progress, self.cancel_analysis_btn):
+            status_bar.addPermanentWidget(widget)
+            widget.hide()
+
+        self.runner.started.connect(self.on_analysis_started)
+        self.runner.progress.connect(self.analysis_progress.setValue)
+        self.runner.stopped.connect(self.on_analysis_stopped)
+
+    def on_analysis_started(self, description):
+        self.analysis_label.setText(description)
+        self.analysis_progress.setValue(0)
+        for widget in (self.analysis_label, self.analysis_progress, self.cancel_analysis_btn):
+            widget.show()
+
+    def on_analysis_stopped(self):
+        for widget in (self.analysis_label, self.analysis_progress, self.cancel_analysis_btn):
+            widget.hide()
+
+    def closeEvent(self, event):
+        # No dejar un análisis ni una carga en marcha en otro hilo al cerrar
+        # la ventana
+        self.runner.cancel()
+        self.file_loader.cancel_all()
+        self.runner.wait()
+        self.file_loader.wait()
+        super().closeEvent(event)
+
     def crearArchivo(self):
         file_name = self.input_nombre.text().strip()
         if file_name:
@@ -512,49 +555,265 @@ class EditorTexto(QMainWindow):
         if not file_path:
             QMessageBox.warning(self, "Advertencia", "No se seleccionó ningún archivo.")
             return
+        if self.mostrarAnalisisDePestana(file_path):
+            return
 
-        try:
-              
-            with open(file_path, 'r') as file:
-             code = file.read()
-             
-
-            # Realizar el análisis léxico
-            analyzer = LexicalAnalyzer()
-            tokens, stats = analyzer.analyze(code)
-            code_without_whitespace = ''.join(code.split())
-                # Formatear y mostrar los resultados
-            self.mostrarResultados(tokens, stats, code_without_whitespace)
-            
-            
+        # Realizar el análisis léxico en segundo plano; el resultado se
+        # muestra al terminar
+        def analizar(job):
+            return self.analizarArchivoLexico(file_path, job)
 
-        except Exception as e:
+        def fallo(e):
             QMessageBox.critical(self, "Error", f"Error al leer o analizar el archivo: {e}")
 
-    def mostrarResultados(self, tokens, stats,code_without_whitespace):
-        # Formatear los resultados para mostrarlos en un cuadro de diálogo
+        self.runner.submit(f"Análisis léxico de {os.path.basename(file_path)}",
+                           analizar, lambda result: self.mostrarDialogoLexico(*result), fallo)
 
-        token_message = "\n".join(str(token) for token in tokens)
-        stats_message = "\n".join(f"{key}: {value}" for key, value in stats.items())
-        
-    
-        complete_message = (
-            f"Código sin espacios:\n{code_without_whitespace}\n\n"
-            f"Tokens:\n{token_message}\n\n"
-            f"Estadísticas de Tokens:\n{stats_message}"
-        )
+    def ejecutarPrograma(self):
+        # Compila el código de la pestaña actual a bytecode y lo ejecuta en la
+        # VM, en segundo plano; la salida de print se muestra al terminar
+        current_tab = self.tab_widget.currentWidget()
+        if not isinstance(current_tab, CodeEditor):
+            QMessageBox.warning(self, "Advertencia", "No hay ningún archivo abierto.")
+            return
+        code = current_tab.toPlainText()
+        name = self.tab_widget.tabText(self.tab_widget.currentIndex())
+
+        def ejecutar(job):
+            success, errors, ast = get_parser().parse(code)
+            if not success:
+                return None, errors
+            job.report(10)
+            out = io.StringIO()
+            try:
+                # La VM llama al monitor en los bucles: así se puede cancelar
+                VM(out, monitor=lambda: job.report(10)).run(compile_program(ast))
+            except ExecutionError as e:
+                out.write(f"\nError de ejecución: {e}\n")
+            return out.getvalue(), None
+
+        def mostrar(result):
+            output, errors = result
+            if errors:
+                QMessageBox.critical(self, "Errores de sintaxis", "\n".join(errors))
+                return
+            dialog = QDialog(self)
+            dialog.setWindowTitle(f"Ejecución de {name}")
+            dialog.resize(600, 400)
+            output_text = QTextEdit()
+            output_text.setReadOnly(True)
+            output_text.setPlainText(output)
+            close_button = QPushButton("Cerrar")
+            close_button.clicked.connect(dialog.accept)
+            layout = QVBoxLayout()
+            layout.addWidget(output_text)
+            layout.addWidget(close_button)
+            dialog.setLayout(layout)
+            dialog.exec()
+
+        def fallo(e):
+            QMessageBox.critical(self, "Error", f"No se pudo ejecutar el programa: {e}")
+
+        self.runner.submit(f"Ejecución de {name}", ejecutar, mostrar, fallo)
 
+    def exportarAnalisis(self):
+        # Exporta los tokens y las estadísticas de un archivo y, si se pide,
+        # su árbol sintáctico (editor.export), en segundo plano. Los tokens
+        # se escriben a medida que se producen; el árbol, en cambio, se
+        # construye entero en memoria antes de escribirlo, por eso es
+        # opcional y va en un paso aparte.
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Seleccionar archivo para exportar su análisis", "",
+            "Python Files (*.py);;Text Files (*.txt);;All Files (*)")
+        if not file_path:
+            return
+        base = os.path.splitext(file_path)[0]
+        out_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Exportar tokens", base + ".tokens.jsonl",
+            "JSON Lines (*.jsonl);;CSV (*.csv)")
+        if not out_path:
+            return
+        fmt = 'csv' if selected_filter.startswith('CSV') or out_path.endswith('.csv') else 'jsonl'
+        out_base = os.path.splitext(out_path)[0]
+        if out_base.endswith('.tokens'):
+            out_base = out_base[:-len('.tokens')]
+        stats_path = f"{out_base}.stats.{fmt}"
+        ast_path = None
+        reply = QMessageBox.question(
+            self, "Exportar árbol sintáctico",
+            "¿Exportar también el árbol sintáctico?\n\n"
+            "El árbol se construye completo en memoria antes de escribirlo; "
+            "en archivos grandes puede tardar y ocupar bastante.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.Yes:
+            ast_path = f"{out_base}.ast.jsonl"
+
+        def exportar(job):
+            # Con árbol, la mayor parte del tiempo es del Parser
+            tokens_end = 30 if ast_path else 95
+            stats = export_file(file_path, out_path, fmt,
+                                progress=lambda fraction: job.report(tokens_end * fraction))
+            with open(stats_path, 'w', encoding='utf-8', newline='') as out:
+                write_stats(stats, out, fmt)
+            job.report(tokens_end)
+            syntax = None
+            if ast_path:
+                syntax = export_ast(
+                    file_path, ast_path,
+                    progress=lambda fraction: job.report(tokens_end + (100 - tokens_end) * fraction))
+            return stats, syntax
+
+        def terminado(result):
+            stats, syntax = result
+            message = (f"Se exportaron {stats['total_tokens']} tokens a:\n{out_path}\n\n"
+                       f"Estadísticas: {stats_path}")
+            if syntax is None:
+                QMessageBox.information(self, "Exportación", message)
+                return
+            success, errors, written = syntax
+            if written:
+                message += f"\nÁrbol sintáctico: {ast_path}"
+                if not success:
+                    message += " (parcial)"
+            else:
+                message += "\n\nNo se pudo construir el árbol sintáctico; no se exportó."
+            if success:
+                QMessageBox.information(self, "Exportación", message)
+                return
+            # Los errores pueden ser muchos: se muestran los primeros
+            shown = errors[:20]
+            message += "\n\nErrores del análisis sintáctico:\n" + "\n".join(f"- {e}" for e in shown)
+            if len(errors) > len(shown):
+                message += f"\n... y {len(errors) - len(shown)} más"
+            QMessageBox.warning(self, "Exportación", message)
+
+        def fallo(e):
+            QMessageBox.critical(self, "Error", f"No se pudo exportar el análisis: {e}")
+
+        self.runner.submit(f"Exportación de {os.path.basename(file_path)}",
+                           exportar, terminado, fallo)
+
+    def editorAbierto(self, file_path):
+        # CodeEditor de la pestaña que tiene abierto el archivo, o None
+        for i in range(self.tab_widget.count()):
+            if self.tab_widget.tabToolTip(i) == file_path:
+                editor = self.tab_widget.widget(i)
+                return editor if isinstance(editor, CodeEditor) else None
+        return None
+
+    def mostrarAnalisisDePestana(self, file_path):
+        # Si el archivo está abierto con análisis incremental, sus tokens ya
+        # existen (son los del resaltado): se muestran sin volver a leer ni
+        # analizar nada. Es el texto de la pestaña, con los cambios sin guardar
+        editor = self.editorAbierto(file_path)
+        if editor is None or editor.analysis is None:
+            return False
+        tokens = editor.analysis.tokens()
+        if not tokens:
+            QMessageBox.warning(self, "Advertencia", "No se encontraron tokens válidos.")
+        else:
+            self.mostrarDialogoLexico(tokens, editor.analysis.stats)
+        return True
+
+    def analizarArchivoLexico(self, file_path, job=None):
+        # Devuelve (TokenBuffer, estadísticas). Los resultados se guardan en la
+        # caché por hash del contenido, así que un archivo sin cambios no se
+        # vuelve a analizar.
+        # job: trabajo en segundo plano al que informar del progreso (el
+        # análisis se interrumpe con JobCancelled si se cancela)
+        analyzer = LexicalAnalyzer()
+
+        def analizar():
+            # Se lee y se analiza por bloques, con la misma detección de
+            # codificación que al abrir el archivo: el progreso y la
+            # cancelación llegan en cada bloque. Tipos y posiciones quedan en
+            # arrays compactos; los valores se extraen del texto solo para
+            # las filas que se muestran
+            total = max(os.path.getsize(file_path), 1)
+            with open(file_path, 'rb') as file:
+                def trozos():
+                    for chunk in TextReader(file).chunks():
+                        if job is not None:
+                            job.report(100 * file.tell() / total)
+                        yield chunk
+                return analyzer.analyze_chunks(trozos())
+
+        return default_cache().get_or_compute(
+            file_digest(file_path), 'lexical_buffer', analyzer.version(), analizar)
+
+    def textoSinEspacios(self, text, chunk_size=1 << 16):
+        # Texto sin espacios en blanco, procesado por bloques. Un bloque puede
+        # cortar una palabra, pero al unir los trozos sin separador da igual
+        return ''.join(''.join(text[start:start + chunk_size].split())
+                       for start in range(0, len(text), chunk_size))
+
+    def mostrarResultados(self, tokens, stats):
+        self.mostrarDialogoLexico(tokens, stats)
+
+    def crearTablaTokens(self, tokens):
+        # Tabla de tokens con filtro por tipo; la vista solo pide al modelo
+        # las filas visibles
+        model = TokenTableModel(tokens)
+
+        type_filter = QComboBox()
+        type_filter.addItem("Todos los tipos", None)
+        for name in model.token_types():
+            type_filter.addItem(name, name)
+        type_filter.currentIndexChanged.connect(
+            lambda: model.set_type_filter(type_filter.currentData()))
+
+        table = QTableView()
+        table.setModel(model)
+        model.setParent(table)
+        # Sin ordenar hasta que se pulse una cabecera: setSortingEnabled
+        # ordena por el indicador actual
+        table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        table.setSortingEnabled(True)
+        table.horizontalHeader().setStretchLastSection(True)
+        # Filas de altura fija: la vista no mide cada fila para desplazarse
+        table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        table.verticalHeader().hide()
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Filtrar por tipo:"))
+        filter_layout.addWidget(type_filter, 1)
+
+        widget = QWidget()
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(filter_layout)
+        layout.addWidget(table)
+        widget.setLayout(layout)
+        return widget
+
+    def mostrarDialogoLexico(self, tokens, stats):
         # Mostrar los resultados en un cuadro de diálogo
         dialog = QDialog(self)
         dialog.setWindowTitle("Resultado del Análisis Léxico")
+        dialog.resize(700, 500)
 
-        text_edit = QTextEdit()
-        text_edit.setPlainText(complete_message)
-        text_edit.setReadOnly(True)
-        text_edit.setFixedSize(600, 400)
+        stats_text = QTextEdit()
+        stats_text.setPlainText("Estadísticas de Tokens:\n" +
+                                "\n".join(f"{key}: {value}" for key, value in stats.items()))
+        stats_text.setReadOnly(True)
+        stats_text.setMaximumHeight(150)
 
         layout = QVBoxLayout()
-        layout.addWidget(text_edit)
+        layout.addWidget(self.crearTablaTokens(tokens), 1)
+        layout.addWidget(stats_text)
+
+        # El código sin espacios solo se calcula si se pide
+        if isinstance(tokens, TokenBuffer):
+            def mostrar_sin_espacios():
+                stats_text.setMaximumHeight(16777215)
+                stats_text.setPlainText(
+                    f"Código sin espacios:\n{self.textoSinEspacios(tokens.source)}")
+                no_whitespace_button.setEnabled(False)
+
+            no_whitespace_button = QPushButton("Código sin espacios")
+            no_whitespace_button.clicked.connect(mostrar_sin_espacios)
+            layout.addWidget(no_whitespace_button)
 
         close_button = QPushButton("Cerrar")
         close_button.clicked.connect(dialog.accept)
@@ -575,7 +834,31 @@ class EditorTexto(QMainWindow):
             self.input_nombre.clear()  # Limpiar el campo de entrada
 
     def close_tab(self, index):
+        widget = self.tab_widget.widget(index)
         self.tab_widget.removeTab(index)
+        job = self.loads.pop(widget, None)
+        if job is not None:
+            # Cierre durante la carga: se cancela la lectura
+            self.file_loader.cancel(job)
+        if isinstance(widget, LargeFileView):
+            # Libera el mmap en cuanto se cierra la pestaña
+            widget.release()
+            widget.deleteLater()
+
+    def irALinea(self):
+        current_tab = self.tab_widget.currentWidget()
+        if isinstance(current_tab, LargeFileView):
+            line_count = current_tab.line_count()
+            current = current_tab.top_line() + 1
+        elif isinstance(current_tab, CodeEditor):
+            line_count = current_tab.blockCount()
+            current = current_tab.textCursor().blockNumber() + 1
+        else:
+            return
+        number, ok = QInputDialog.getInt(self, "Ir a línea", f"Línea (1-{line_count}):",
+                                         current, 1, line_count)
+        if ok:
+            current_tab.go_to_line(number)
 
     def on_file_selected(self, index):
         file_path = self.model.filePath(index)
@@ -590,39 +873,132 @@ class EditorTexto(QMainWindow):
                 return
 
         # Si no está abierto, crear una nueva pestaña
-        try:
-            # Intentar abrir el archivo con utf-8
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-        except UnicodeDecodeError:
-            # Si utf-8 falla, intentar con latin-1
-            with open(file_path, 'r', encoding='latin-1') as file:
-                content = file.read()
+        if os.path.getsize(file_path) >= LARGE_FILE_MIN_BYTES:
+            # Solo lectura: se muestra por ventanas sin cargarlo en memoria
+            view = LargeFileView(file_path)
+            index = self.tab_widget.addTab(view, os.path.basename(file_path))
+            self.tab_widget.setTabToolTip(index, file_path)
+            self.tab_widget.setCurrentIndex(index)
+            return
 
-        editor = CodeEditor()  # Usar la nueva versión de CodeEditor
-        editor.setPlainText(content)
+        # Resaltador según la extensión o el comienzo del contenido; el texto
+        # plano no lleva ninguno
+        language = language_for(file_path, read_head(file_path, SNIFF_CHARS))
+        editor = CodeEditor(language=language)  # Usar la nueva versión de CodeEditor
+        # Un solo análisis léxico para el resaltado y para "Análisis Léxico"
+        lexical = language is PYTHON and os.path.getsize(file_path) <= LEXICAL_HIGHLIGHT_MAX_CHARS
 
         tab_name = os.path.basename(file_path)
         index = self.tab_widget.addTab(editor, tab_name)
         self.tab_widget.setTabToolTip(index, file_path)
         self.tab_widget.setCurrentIndex(index)
+        self.cargarArchivo(editor, file_path, lexical)
+
+    def cargarArchivo(self, editor, file_path, lexical=False):
+        # Lee y decodifica el archivo en otro hilo; los trozos se añaden al
+        # editor a medida que llegan, así que la primera pantalla aparece en
+        # seguida. Mientras tanto la pestaña muestra el progreso y un botón
+        # para cancelar (que la cierra). El resaltado de lo que no está en
+        # pantalla se hace por tramos al terminar. Con lexical, el análisis
+        # léxico incremental se crea una vez, con el texto completo, y el
+        # resaltado por tramos ya lo usa
+        job = self.file_loader.load(file_path)
+        self.loads[editor] = job
+
+        progress = QProgressBar()
+        progress.setRange(0, 100)
+        progress.setTextVisible(False)
+        progress.setFixedSize(48, 10)
+        cancel = QToolButton()
+        cancel.setText("Cancelar")
+        cancel.setAutoRaise(True)
+        cancel.clicked.connect(lambda: self.close_tab(self.tab_widget.indexOf(editor)))
+        indicator = QWidget()
+        indicator_layout = QHBoxLayout()
+        indicator_layout.setContentsMargins(0, 0, 0, 0)
+        indicator_layout.addWidget(progress)
+        indicator_layout.addWidget(cancel)
+        indicator.setLayout(indicator_layout)
+        tab_bar = self.tab_widget.tabBar()
+        tab_bar.setTabButton(self.tab_widget.indexOf(editor), QTabBar.ButtonPosition.LeftSide, indicator)
+
+        def vigente():
+            # Tras cancelar pueden quedar trozos en cola: se descartan
+            return self.loads.get(editor) is job
+
+        def trozo(text):
+            if vigente():
+                editor.append_text(text)
+                job.consumed()
+
+        def reiniciar(_encoding):
+            if vigente():
+                editor.begin_stream()
+
+        def terminar():
+            del self.loads[editor]
+            index = self.tab_widget.indexOf(editor)
+            if index != -1:
+                tab_bar.setTabButton(index, QTabBar.ButtonPosition.LeftSide, None)
+            indicator.deleteLater()
+
+        def terminado(encoding):
+            if vigente():
+                terminar()
+                # Se guardará con la misma codificación, BOM y saltos de línea
+                editor.file_encoding = encoding
+                if lexical:
+                    editor.enable_incremental_analysis(highlight=True)
+                editor.end_stream()
+
+        def fallo(e):
+            if vigente():
+                terminar()
+                self.close_tab(self.tab_widget.indexOf(editor))
+                QMessageBox.critical(self, "Error", f"No se pudo abrir {file_path}: {e}")
+
+        job.signals.chunk.connect(trozo)
+        job.signals.progress.connect(lambda percent: vigente() and progress.setValue(percent))
+        job.signals.restarted.connect(reiniciar)
+        job.signals.finished.connect(terminado)
+        job.signals.failed.connect(fallo)
+        editor.begin_stream()
+        self.file_loader.start(job)
 
     def abrirArchivo(self, file_path=None):
-        if not file_path:
-            file_path, _ = QFileDialog.getOpenFileName(self, "Abrir archivo", "", 
-                                                  "Archivos de texto (*.txt);;Archivos Python (*.py);;Todos los archivos (*)")
+        # Se pueden elegir varios archivos: se cargan a la vez
         if file_path:
+            file_paths = [file_path]
+        else:
+            file_paths, _ = QFileDialog.getOpenFileNames(self, "Abrir archivo", "", 
+                                                  "Archivos de texto (*.txt);;Archivos Python (*.py);;Todos los archivos (*)")
+        for file_path in file_paths:
             self.open_file(file_path)
 
     def guardarArchivo(self):
         current_tab = self.tab_widget.currentWidget()
+        if current_tab in self.loads:
+            # Guardar ahora escribiría el archivo a medias
+            QMessageBox.warning(self, "Advertencia", "El archivo todavía se está cargando.")
+            return
         if isinstance(current_tab, CodeEditor):
             file_path = self.tab_widget.tabToolTip(self.tab_widget.currentIndex())
             if file_path:
-                with open(file_path, 'w') as file:
-                    file.write(current_tab.toPlainText())
+                self.escribirArchivo(file_path, current_tab)
             else:
                 self.guardarArchivoComo()
+
+    def escribirArchivo(self, file_path, editor):
+        # Escribe el texto con la codificación del archivo que se abrió
+        try:
+            write_text(file_path, editor.toPlainText(), editor.file_encoding)
+        except UnicodeEncodeError as e:
+            QMessageBox.critical(
+                self, "Error",
+                f"El texto contiene caracteres que no se pueden guardar en "
+                f"{editor.file_encoding.encoding}: {e.object[e.start:e.end]!r}")
+            return False
+        return True
                 
 
     def guardarArchivoComo(self):
@@ -631,8 +1007,8 @@ class EditorTexto(QMainWindow):
             path, _ = QFileDialog.getSaveFileName(self, "Guardar archivo como", "", 
                                                   "Archivos de texto (*.txt);;Archivos Python (*.py);;Todos los archivos (*)")
             if path:
-                with open(path, 'w') as file:
-                    file.write(current_tab.toPlainText())
+                if not self.escribirArchivo(path, current_tab):
+                    return
                 self.tab_widget.setTabText(self.tab_widget.currentIndex(), os.path.basename(path))
                 self.tab_widget.setTabToolTip(self.tab_widget.currentIndex(), path)
 
@@ -0,0 +1,109 @@
+# Modelo de Qt sobre una secuencia de tokens para mostrarla en una QTableView.
+#
+# Los tokens no se copian ni se convierten a texto: data() lee solo las filas
+# que la vista pide, que son las visibles. Acepta un TokenBuffer de
+# LexicalAnalyzer (tipo, valor, línea y columna) o la lista de tuplas
+# (tipo, valor, línea) que guarda el Parser; en ese caso no hay columna.
+#
+# Ordenar y filtrar por tipo tampoco copian los tokens: el modelo guarda un
+# array con los índices de los tokens que se muestran y en qué orden.
+from array import array
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from editor.analyzer.lexical_analyzer import TokenBuffer, TokenType
+
+
+class TokenTableModel(QAbstractTableModel):
+    HEADERS = ("Tipo", "Valor", "Línea", "Columna")
+
+    def __init__(self, tokens, parent=None):
+        super().__init__(parent)
+        self.tokens = tokens
+        if isinstance(tokens, TokenBuffer):
+            names = {token_type.value: token_type.name for token_type in TokenType}
+            self._type = lambda index: names[tokens.types[index]]
+            self._value = tokens.value
+            self._line = tokens.lines.__getitem__
+            self._column = tokens.column
+            self._type_codes = {name: code for code, name in names.items()}
+        else:
+            self._type = lambda index: tokens[index][0]
+            self._value = lambda index: tokens[index][1]
+            self._line = lambda index: tokens[index][2]
+            self._column = lambda index: None
+            self._type_codes = None
+        self._order = None  # Índices en orden de la última ordenación
+        self._type_filter = None
+        self._rows = None  # Índices que se muestran (None: todos, en orden)
+
+    def _token(self, row):
+        return row if self._rows is None else self._rows[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.tokens) if self._rows is None else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        token = self._token(index.row())
+        column = index.column()
+        if column == 0:
+            return self._type(token)
+        if column == 1:
+            return str(self._value(token))
+        if column == 2:
+            return self._line(token)
+        return self._column(token)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def token_types(self):
+        # Nombres de los tipos presentes, para ofrecerlos como filtro
+        if self._type_codes is not None:
+            names = {code: name for name, code in self._type_codes.items()}
+            return sorted(names[code] for code in set(self.tokens.types))
+        return sorted({token[0] for token in self.tokens})
+
+    def set_type_filter(self, type_name):
+        # Muestra solo los tokens del tipo indicado (None: todos)
+        self._type_filter = type_name
+        self._refresh()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        keys = (self._type, self._value, self._line, self._column)[column]
+        if column == 1:
+            key = lambda index: str(keys(index))
+        elif column == 3:
+            # Sin columna (tokens del Parser) todas valen lo mismo
+            key = lambda index: keys(index) or 0
+        else:
+            key = keys
+        # sorted es estable, así que a igual clave se mantiene el orden original
+        self._order = array('I', sorted(range(len(self.tokens)), key=key,
+                                        reverse=order == Qt.SortOrder.DescendingOrder))
+        self._refresh()
+
+    def _refresh(self):
+        self.beginResetModel()
+        type_filter = self._type_filter
+        indexes = range(len(self.tokens)) if self._order is None else self._order
+        if type_filter is None:
+            self._rows = self._order
+        elif self._type_codes is not None:
+            # Se compara el código de tipo del array, sin crear Token
+            code = self._type_codes[type_filter]
+            types = self.tokens.types
+            self._rows = array('I', (index for index in indexes if types[index] == code))
+        else:
+            tokens = self.tokens
+            self._rows = array('I', (index for index in indexes if tokens[index][0] == type_filter))
+        self.endResetModel()
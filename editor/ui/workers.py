@@ -0,0 +1,232 @@
+# Ejecución de los análisis en segundo plano.
+#
+# AnalysisRunner lanza cada trabajo en un QThreadPool propio de un solo hilo:
+# el Parser compartido (get_parser) no es reentrante, así que los análisis se
+# ejecutan de uno en uno, pero fuera del hilo de la interfaz. Al lanzar un
+# trabajo nuevo se cancela el anterior; la cancelación es cooperativa: el
+# trabajo informa de su progreso con job.report(), que lanza JobCancelled si
+# ya no se quiere su resultado. Progreso y resultados llegan al hilo de la
+# interfaz mediante señales (conexiones en cola), y los de trabajos ya
+# descartados se ignoran.
+#
+# FileLoader carga archivos de texto en su propio pool, varios a la vez: cada
+# FileLoadJob lee y decodifica su archivo por trozos y los envía a la
+# interfaz a medida que los tiene, para que el editor los vaya añadiendo.
+import os
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from editor.fileio import TextReader
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class _JobSignals(QObject):
+    progress = pyqtSignal(int, int)  # id del trabajo, porcentaje
+    finished = pyqtSignal(int, object)  # id del trabajo, resultado
+    failed = pyqtSignal(int, object)  # id del trabajo, excepción
+
+
+class Job(QRunnable):
+    def __init__(self, job_id, work, signals):
+        super().__init__()
+        self.job_id = job_id
+        self.work = work
+        self.signals = signals
+        self.cancelled = threading.Event()
+        self._percent = -1
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def report(self, percent):
+        # Se llama desde el hilo del trabajo
+        if self.cancelled.is_set():
+            raise JobCancelled()
+        percent = max(0, min(int(percent), 100))
+        if percent != self._percent:
+            self._percent = percent
+            self.signals.progress.emit(self.job_id, percent)
+
+    def run(self):
+        try:
+            result = self.work(self)
+        except JobCancelled:
+            return
+        except Exception as e:
+            if not self.cancelled.is_set():
+                self.signals.failed.emit(self.job_id, e)
+            return
+        if not self.cancelled.is_set():
+            self.signals.finished.emit(self.job_id, result)
+
+
+class AnalysisRunner(QObject):
+    started = pyqtSignal(str)  # descripción del trabajo
+    progress = pyqtSignal(int)  # porcentaje del trabajo en curso
+    stopped = pyqtSignal()  # el trabajo en curso terminó o se canceló
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._signals = _JobSignals()
+        self._signals.progress.connect(self._on_progress)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+        self._job = None
+        self._callbacks = None
+        self._next_id = 0
+
+    def submit(self, description, work, on_result, on_error=None):
+        # work(job) se ejecuta en el pool y debe llamar a job.report();
+        # on_result(resultado) y on_error(excepción) se llaman en el hilo de
+        # la interfaz
+        self.cancel()
+        self._next_id += 1
+        job = Job(self._next_id, work, self._signals)
+        self._job = job
+        self._callbacks = (on_result, on_error)
+        self.started.emit(description)
+        self.pool.start(job)
+        return job
+
+    def busy(self):
+        return self._job is not None
+
+    def cancel(self):
+        job = self._job
+        if job is not None:
+            job.cancel()
+            self._job = None
+            self._callbacks = None
+            self.stopped.emit()
+
+    def wait(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
+
+    def _current(self, job_id):
+        return self._job is not None and self._job.job_id == job_id
+
+    def _on_progress(self, job_id, percent):
+        if self._current(job_id):
+            self.progress.emit(percent)
+
+    def _finish(self):
+        callbacks = self._callbacks
+        self._job = None
+        self._callbacks = None
+        self.stopped.emit()
+        return callbacks
+
+    def _on_finished(self, job_id, result):
+        if self._current(job_id):
+            on_result, _ = self._finish()
+            on_result(result)
+
+    def _on_failed(self, job_id, error):
+        if self._current(job_id):
+            _, on_error = self._finish()
+            if on_error is not None:
+                on_error(error)
+
+
+class _LoadSignals(QObject):
+    chunk = pyqtSignal(str)  # trozo de texto decodificado
+    progress = pyqtSignal(int)  # porcentaje leído
+    # Lo enviado hasta ahora no vale: se vuelve a empezar con esta codificación
+    restarted = pyqtSignal(str)
+    finished = pyqtSignal(object)  # TextEncoding con la que se leyó
+    failed = pyqtSignal(object)  # excepción
+
+
+class FileLoadJob(QRunnable):
+    def __init__(self, path, chunk_size, max_pending=1):
+        super().__init__()
+        self.path = path
+        self.chunk_size = chunk_size
+        self.signals = _LoadSignals()
+        self.cancelled = threading.Event()
+        # Trozos enviados que la interfaz aún no ha añadido (consumed()): el
+        # hilo espera en vez de llenar la cola de eventos, que dejaría a la
+        # interfaz sin pintar hasta procesarlos todos
+        self._pending = threading.Semaphore(max_pending)
+
+    def consumed(self):
+        # Se llama desde el hilo de la interfaz tras usar cada trozo
+        self._pending.release()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        try:
+            encoding = self.load()
+        except JobCancelled:
+            return
+        except Exception as e:
+            if not self.cancelled.is_set():
+                self.signals.failed.emit(e)
+            return
+        if not self.cancelled.is_set():
+            self.signals.finished.emit(encoding)
+
+    def load(self):
+        # Se ejecuta en el hilo del pool. El archivo se lee una sola vez
+        # (editor.fileio); si la codificación cambia a mitad se avisa con
+        # restarted y el texto vuelve a empezar
+        total = max(os.path.getsize(self.path), 1)
+        with open(self.path, 'rb') as file:
+            reader = TextReader(file, self.chunk_size)
+            percent = -1
+            for chunk in reader.chunks():
+                if chunk is None:
+                    self.signals.restarted.emit(reader.encoding.encoding)
+                    continue
+                while not self._pending.acquire(timeout=0.1):
+                    if self.cancelled.is_set():
+                        raise JobCancelled()
+                if self.cancelled.is_set():
+                    raise JobCancelled()
+                self.signals.chunk.emit(chunk)
+                read = min(100, 100 * file.tell() // total)
+                if read != percent:
+                    percent = read
+                    self.signals.progress.emit(percent)
+        return reader.encoding
+
+
+class FileLoader(QObject):
+    def __init__(self, parent=None, max_threads=4, chunk_size=1 << 16):
+        super().__init__(parent)
+        self.chunk_size = chunk_size
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._jobs = set()
+
+    def load(self, path):
+        # Devuelve el trabajo sin empezarlo: sus señales (job.signals) se
+        # conectan antes de start(), porque lo que se emite antes se pierde.
+        # Llegan en el hilo de la interfaz
+        job = FileLoadJob(path, self.chunk_size)
+        job.signals.finished.connect(lambda _: self._jobs.discard(job))
+        job.signals.failed.connect(lambda _: self._jobs.discard(job))
+        return job
+
+    def start(self, job):
+        self._jobs.add(job)
+        self.pool.start(job)
+
+    def cancel(self, job):
+        job.cancel()
+        self._jobs.discard(job)
+
+    def cancel_all(self):
+        for job in list(self._jobs):
+            self.cancel(job)
+
+    def wait(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
@@ -0,0 +1,53 @@
+# Comprobaciones del análisis incremental de CodeEditor (sin ventana).
+#
+#     QT_QPA_PLATFORM=offscreen python -m unittest discover tests
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtWidgets import QApplication
+
+from editor.editor.code_editor import CodeEditor
+
+app = QApplication.instance() or QApplication(sys.argv[:1])
+
+
+class IncrementalAnalysisTest(unittest.TestCase):
+    def editor(self, text):
+        editor = CodeEditor()
+        editor.setPlainText(text)
+        editor.enable_incremental_analysis()
+        return editor
+
+    def edit(self, editor, start, end, text):
+        # start y end en unidades de Qt (UTF-16)
+        cursor = QTextCursor(editor.document())
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+        cursor.insertText(text)
+
+    def test_edit_after_character_outside_bmp(self):
+        # El emoji ocupa dos unidades UTF-16 en Qt y un carácter en Python:
+        # la posición 9 de Qt es el comienzo de la segunda línea
+        editor = self.editor('x = "😀"\ny = 1\n')
+        self.edit(editor, 9, 9, 'ab')
+        self.assertEqual(editor.analysis.text(), 'x = "😀"\naby = 1\n')
+        self.assertEqual(editor.analysis.text(), editor.toPlainText())
+
+    def test_edits_across_lines_with_characters_outside_bmp(self):
+        editor = self.editor('a = "😀😀"\nb = 2\nc = 3\n')
+        self.edit(editor, 7, 14, '𝔘\n')  # Del segundo emoji a mitad de 'b = 2'
+        self.edit(editor, 0, 0, '# 😀\n')
+        editor.undo()
+        self.assertEqual(editor.analysis.text(), editor.toPlainText())
+        fresh = editor.analysis.analyzer.incremental(editor.toPlainText())
+        self.assertEqual(editor.analysis.tokens().to_tuples(), fresh.tokens().to_tuples())
+        self.assertEqual(editor.analysis.stats, fresh.stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
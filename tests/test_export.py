@@ -0,0 +1,147 @@
+# Comprobaciones de editor.export: el árbol sintáctico escrito con write_ast
+# se vuelve a leer igual con read_ast, y las exportaciones a archivo.
+#
+#     python -m unittest discover tests
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ply.yacc as yacc
+
+from editor.analyzer_s.ast_nodes import walk
+from editor.analyzer_s.sintax_analyzer import get_parser
+from editor.export import export_ast, export_file, read_ast, write_ast
+
+PROGRAM = '''x = 1
+y = [x, 'á', "😀", 2.5]
+print(x + y * (3 - x))
+def f(a, b):
+    if a < b:
+        return [a]
+    else:
+        while a > b:
+            a = a - 1
+        for i in range(3):
+            f(i, [])
+'''
+
+
+class AstRoundTripTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.parser = get_parser(errorlog=yacc.NullLogger())
+
+    def round_trip(self, ast):
+        out = io.StringIO()
+        count = write_ast(ast, out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(count, len(lines))
+        return read_ast(lines)
+
+    def assertSameTree(self, first, second):
+        # __eq__ compara la estructura; las posiciones, nodo a nodo
+        self.assertEqual(first, second)
+        self.assertEqual([(node.kind, node.line, node.column) for node in walk(first)],
+                         [(node.kind, node.line, node.column) for node in walk(second)])
+
+    def test_round_trip(self):
+        success, errors, ast = self.parser.parse(PROGRAM)
+        self.assertTrue(success, errors)
+        self.assertSameTree(self.round_trip(ast), ast)
+
+    def test_round_trip_partial_tree(self):
+        # Con errores, el árbol parcial que queda tras la recuperación
+        with contextlib.redirect_stdout(io.StringIO()):
+            success, _, ast = self.parser.parse('x = 1\ny = )\nprint(x)\n')
+        self.assertFalse(success)
+        self.assertSameTree(self.round_trip(ast), ast)
+
+    def test_round_trip_deep_tree(self):
+        # Más profundo que el límite de recursión de Python
+        code = 'x = ' + ' + '.join(['1'] * 3000) + '\n'
+        _, _, ast = self.parser.parse(code)
+        self.assertEqual(sum(1 for _ in walk(self.round_trip(ast))), sum(1 for _ in walk(ast)))
+
+    def test_incomplete_input(self):
+        _, _, ast = self.parser.parse(PROGRAM)
+        out = io.StringIO()
+        write_ast(ast, out)
+        with self.assertRaises(ValueError):
+            read_ast(out.getvalue().splitlines()[:-1])
+
+
+class ExportFileTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, name, data=None):
+        path = os.path.join(self.directory, name)
+        if data is not None:
+            with open(path, 'wb') as file:
+                file.write(data)
+        return path
+
+    def test_export_ast(self):
+        source = self.path('programa.py', PROGRAM.encode('utf-8'))
+        ast_path = self.path('programa.ast.jsonl')
+        fractions = []
+        success, errors, written = export_ast(source, ast_path, fractions.append)
+        self.assertEqual((success, errors, written), (True, [], True))
+        with open(ast_path, encoding='utf-8') as file:
+            self.assertEqual(read_ast(file), get_parser().parse(PROGRAM)[2])
+
+    def test_export_ast_without_tree(self):
+        # Si no hay árbol no se crea el archivo, y los errores se devuelven
+        source = self.path('roto.py', b')))\n')
+        ast_path = self.path('roto.ast.jsonl')
+        with contextlib.redirect_stdout(io.StringIO()):
+            success, errors, written = export_ast(source, ast_path)
+        self.assertFalse(success)
+        self.assertFalse(written)
+        self.assertTrue(errors)
+        self.assertFalse(os.path.exists(ast_path))
+
+    def test_export_ast_cancelled(self):
+        class Stop(Exception):
+            pass
+
+        def progress(fraction):
+            raise Stop
+
+        source = self.path('largo.py', b'x = 1\n' * 5000)
+        ast_path = self.path('largo.ast.jsonl')
+        with self.assertRaises(Stop):
+            export_ast(source, ast_path, progress)
+        self.assertFalse(os.path.exists(ast_path))
+
+    def test_tokens_after_encoding_fallback(self):
+        # Parece UTF-8 hasta pasada la muestra: el lexer vuelve a empezar con
+        # latin-1 y la salida no debe tener tokens repetidos
+        data = b'x = 1\n' * 20000 + "y = 'é'\n".encode('latin-1')
+        source = self.path('latin1.py', data)
+        for lexer in ('lexical', 'ply'):
+            for fmt in ('jsonl', 'csv'):
+                with self.subTest(lexer=lexer, fmt=fmt):
+                    out_path = self.path(f'tokens.{fmt}')
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        stats = export_file(source, out_path, fmt, lexer)
+                    with open(out_path, encoding='utf-8') as file:
+                        lines = file.read().splitlines()
+                    if fmt == 'csv':
+                        lines = lines[1:]
+                    self.assertEqual(stats['total_tokens'], len(lines))
+                    self.assertEqual(stats['total_tokens'], 3 * 20001)
+                    if fmt == 'jsonl':
+                        self.assertEqual(json.loads(lines[-1])['value'], "'é'")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+# Comprobaciones de IncrementalParser: tras cada edición, el árbol debe ser el
+# mismo que el de un análisis completo con Parser.
+#
+#     python -m unittest discover tests
+import contextlib
+import io
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ply.yacc as yacc
+
+from editor.analyzer_s.ast_nodes import to_tuples
+from editor.analyzer_s.incremental import MAX_MERGES, IncrementalParser
+from editor.analyzer_s.sintax_analyzer import get_parser
+
+# Fragmentos de programa correctos (cada uno, líneas completas)
+UNITS = (
+    'x = 1\n',
+    'y = x + 2 * (3 - z)\n',
+    'print(x)\n',
+    'def f(a, b):\n    return a + b\n',
+    'if x < 2:\n    y = 1\nelse:\n    y = 2\n',
+    'while y > 0:\n    y = y - 1\n',
+    'for i in range(3):\n    print(i)\n',
+    "s = 'hola'\n",
+    'l = [1, 2, x]\n',
+    'f(1, 2)\n',
+    '\n',
+    "'''comentario\nde dos líneas'''\n",
+)
+
+# Texto que se inserta en cualquier posición (y se vuelve a quitar)
+FRAGMENTS = ('x', ' ', '+', '(', ')', '\n', '1', ':', "'", '"', "'''", 'else', '=')
+
+
+class IncrementalParserTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.parser = get_parser(errorlog=yacc.NullLogger())
+
+    def setUp(self):
+        # El Parser informa de los errores con print()
+        redirect = contextlib.redirect_stdout(io.StringIO())
+        redirect.__enter__()
+        self.addCleanup(redirect.__exit__, None, None, None)
+
+    def assertSameAsFull(self, result, code):
+        # El éxito tiene que coincidir siempre; el árbol, cuando no hay
+        # errores (con errores, cada ventana se recupera por su cuenta)
+        success, _, ast = self.parser.parse(code)
+        self.assertEqual(result[0], success, code)
+        if success:
+            self.assertEqual(to_tuples(result[2]), to_tuples(ast), code)
+
+    def test_random_edits(self):
+        for seed in range(20):
+            rnd = random.Random(seed)
+            code = ''.join(rnd.choice(UNITS) for _ in range(30))
+            incremental = IncrementalParser(self.parser)
+            self.assertSameAsFull(incremental.parse(code), code)
+            for _ in range(40):
+                if rnd.random() < 0.6:
+                    # Insertar o sustituir una línea por un fragmento correcto
+                    start = rnd.choice([0] + [i + 1 for i, c in enumerate(code) if c == '\n'])
+                    end = start
+                    if rnd.random() < 0.5:
+                        end = code.find('\n', start) + 1 or len(code)
+                    text = rnd.choice(UNITS)
+                    code = code[:start] + text + code[end:]
+                    self.assertSameAsFull(incremental.apply_edit(start, end - start, text), code)
+                else:
+                    # Romper el código en cualquier sitio y deshacerlo
+                    start = rnd.randrange(len(code) + 1)
+                    text = rnd.choice(FRAGMENTS)
+                    broken = code[:start] + text + code[start:]
+                    self.assertSameAsFull(incremental.apply_edit(start, 0, text), broken)
+                    self.assertSameAsFull(incremental.apply_edit(start, len(text), ''), code)
+
+    def test_parse_deduces_edit(self):
+        rnd = random.Random(0)
+        code = ''.join(rnd.choice(UNITS) for _ in range(30))
+        incremental = IncrementalParser(self.parser)
+        incremental.parse(code)
+        for _ in range(20):
+            start = rnd.randrange(len(code) + 1)
+            code = code[:start] + rnd.choice(UNITS) + code[start:]
+            self.assertSameAsFull(incremental.parse(code), code)
+
+    def test_else_far_below_its_if(self):
+        # Entre el if y su else hay más regiones de las que se unen con
+        # MAX_MERGES
+        code = 'if x < 2:\n    y = 1\n' + 'x = 1\n' * (2 * MAX_MERGES) + 'else:\n    y = 2\n'
+        incremental = IncrementalParser(self.parser)
+        self.assertSameAsFull(incremental.parse(code), code)
+        self.assertTrue(incremental.result[0])
+
+    def test_long_chain_of_headers(self):
+        # Cada cabecera sin cuerpo propio se analiza sola con un error al
+        # final; el cuerpo de todas es el f(1, 2) de la última línea (caso
+        # reducido de test_random_edits)
+        code = ("'''a'''\ny = 1\n'''b'''\ns = 'hola'\n"
+                'def f(a, b):\nif x < 2:\nwhile y > 0:\nfor i in range(3):\n'
+                "'''c'''\n" + 'for i in range(3):\n' * 3 + 'f(1, 2)\n')
+        incremental = IncrementalParser(self.parser)
+        self.assertSameAsFull(incremental.parse(code), code)
+        self.assertTrue(incremental.result[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+# Comprobaciones de la VM de bytecode: cada programa tiene que dar la misma
+# salida, las mismas globales y los mismos errores que TreeInterpreter, que
+# ejecuta el árbol directamente.
+#
+#     python -m unittest discover tests
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ply.yacc as yacc
+
+from editor.analyzer_s.compiler import ExecutionError, Function, compile_program
+from editor.analyzer_s.interpreter import TreeInterpreter, _TreeFunction
+from editor.analyzer_s.sintax_analyzer import get_parser
+from editor.analyzer_s.vm import VM
+
+# La gramática no tiene bloques por indentación: el cuerpo de una sentencia
+# compuesta llega hasta el final del programa (o hasta el else de su if). Para
+# llamar a una función después de definirla, la definición va en la primera
+# vuelta de un bucle y la llamada en la segunda.
+PROGRAMS = {
+    'aritmética': '''
+a = 7
+b = 2
+suma = a + b
+resta = a - b * 3
+cociente = a / b
+mezcla = (a + 1.5) * (b - 4)
+print(suma)
+print(cociente)
+''',
+    'comparaciones': '''
+x = 3
+menor = x < 4
+mayor = x > 4
+igual = x == 3
+distinto = x != 3
+print(menor)
+print(x <= 3)
+print(x >= 4)
+''',
+    'cadenas y listas': '''
+s = 'ab' + "cd"
+l = [1, 2, s, [3, 4]]
+n = len(l)
+print(s)
+print(l)
+print(str(n) + ' elementos')
+''',
+    'while': '''
+total = 0
+i = 0
+while i < 100:
+    total = total + i * 2 - 1
+    i = i + 1
+''',
+    'for anidados con if': '''
+total = 0
+for i in range(20):
+    for j in range(10):
+        if j < 5:
+            total = total + i * j
+        else:
+            total = total - j
+print(total)
+''',
+    'builtins': '''
+valores = [abs(0 - 3), min(4, 2), max(4, 2), int('12'), float('2.5')]
+print(valores)
+print(None)
+print(True)
+''',
+    'función recursiva': '''
+for k in range(2):
+    if k == 1:
+        print(fact(10))
+    else:
+        def fact(n):
+            if n < 2:
+                return 1
+            else:
+                return n * fact(n - 1)
+''',
+    'variables locales': '''
+global_a = 5
+for k in range(2):
+    if k == 1:
+        resultado = doble(global_a)
+        print(resultado)
+    else:
+        def doble(a):
+            b = a * 2
+            return b + global_a
+''',
+    'nombre no definido': '''
+x = 1
+print(y)
+''',
+    'división por cero': '''
+x = 1
+y = x / 0
+''',
+    'argumentos de más': '''
+for k in range(2):
+    if k == 1:
+        f(1, 2)
+    else:
+        def f(a):
+            return a
+''',
+    'recursión infinita': '''
+for k in range(2):
+    if k == 1:
+        f(0)
+    else:
+        def f(n):
+            return f(n + 1)
+''',
+    'llamar a un valor': '''
+x = 1
+x(2)
+''',
+}
+
+
+def _plain(value):
+    # Las funciones de la VM y del intérprete son objetos distintos: se
+    # comparan por su nombre
+    if isinstance(value, Function):
+        return ('función', value.name)
+    if isinstance(value, _TreeFunction):
+        return ('función', value.node.name)
+    return value
+
+
+class VMTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.parser = get_parser(errorlog=yacc.NullLogger())
+
+    def run_both(self, code):
+        success, errors, ast = self.parser.parse(code)
+        self.assertTrue(success, errors)
+        results = []
+        for run in (lambda out: TreeInterpreter(out).run(ast),
+                    lambda out: VM(out).run(compile_program(ast))):
+            out = io.StringIO()
+            try:
+                values = {name: _plain(value) for name, value in run(out).items()}
+                error = None
+            except ExecutionError as e:
+                values = None
+                error = (str(e), e.line)
+            results.append((out.getvalue(), values, error))
+        return results
+
+    def test_same_results_as_tree_interpreter(self):
+        for name, code in PROGRAMS.items():
+            with self.subTest(name):
+                tree, vm = self.run_both(code)
+                self.assertEqual(vm, tree)
+
+    def test_errors_are_reported(self):
+        for name in ('nombre no definido', 'división por cero', 'argumentos de más',
+                     'recursión infinita', 'llamar a un valor'):
+            with self.subTest(name):
+                _, vm = self.run_both(PROGRAMS[name])
+                self.assertIsNotNone(vm[2])
+
+    def test_recursion_result(self):
+        _, vm = self.run_both(PROGRAMS['función recursiva'])
+        self.assertEqual(vm[0], '3628800\n')
+
+    def test_monitor_cancels(self):
+        class Stop(Exception):
+            pass
+
+        def monitor():
+            raise Stop
+
+        _, _, ast = self.parser.parse(PROGRAMS['while'])
+        with self.assertRaises(Stop):
+            VM(io.StringIO(), monitor=monitor, check_interval=10).run(compile_program(ast))
+
+
+if __name__ == '__main__':
+    unittest.main()